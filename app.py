@@ -0,0 +1,141 @@
+"""
+Application entry point: shows the sign-in window as early as possible, or the main window
+directly when the session of the last sign-in is still valid (see `authentication.sessions`).
+
+Set `APP_STARTUP_TRACE=<file.json>` to record the startup (imports, database initialisation,
+theme application and first paint) as a Chrome trace, viewable in chrome://tracing or Perfetto.
+
+A stall detector watches the event loop while the application runs and writes the UI freezes
+it caught to `logs/stalls.json` on exit; set `APP_STALL_DETECTOR=0` to disable it.
+
+The database is backed up in the background (see `database.backup`); set `APP_BACKUP=0`
+to disable the scheduled backups.
+
+While the user is idle, the database maintenance (checkpoint, optimize, ...) runs in the
+background (see `utils.idle_maintenance`); set `APP_MAINTENANCE=0` to disable it.
+
+Launched while it already runs, the application hands its arguments to the running instance,
+which comes to the front, and exits at once (see `utils.single_instance`); set
+`APP_SINGLE_INSTANCE=0` to allow several instances.
+"""
+import os
+import sys
+
+from utils.startup_trace import trace
+
+trace.install_import_hook()
+
+
+class FirstPaintWatcher:
+    """
+    Records the first paint of a window, then optionally quits the application
+    (used by the startup benchmark).
+    """
+
+    def __init__(self, window, app, exit_after_first_paint=False):
+        from pyside6_imports import QEvent, QObject
+
+        self.app = app
+        self.exit_after_first_paint = exit_after_first_paint
+        self.QEvent = QEvent
+
+        watcher = self
+
+        class _Filter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == watcher.QEvent.Paint:
+                    watched.removeEventFilter(self)
+                    watcher.on_first_paint()
+                return False
+
+        self.filter = _Filter()
+        window.installEventFilter(self.filter)
+
+    def on_first_paint(self):
+        trace.instant("first paint")
+        trace.remove_import_hook()
+        trace.write()
+        if self.exit_after_first_paint:
+            from pyside6_imports import QTimer
+            QTimer.singleShot(0, self.app.quit)
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+
+    single_instance = os.environ.get("APP_SINGLE_INSTANCE", "1") != "0"
+    if single_instance:
+        # Avant Qt : un second lancement se termine en quelques millisecondes
+        from utils.single_instance import forward_to_running_instance
+        if forward_to_running_instance(argv[1:]):
+            return 0
+
+    with trace.span("import Qt"):
+        from pyside6_imports import QApplication
+    app = QApplication(argv)
+
+    instance_server = None
+    if single_instance:
+        from utils.single_instance import SingleInstanceServer, bring_to_front
+        instance_server = SingleInstanceServer()
+        if not instance_server.listen(argv[1:]):
+            return 0
+        instance_server.on_message(lambda args: bring_to_front())
+
+    stall_detector = None
+    if os.environ.get("APP_STALL_DETECTOR", "1") != "0":
+        from utils.stall_detector import install_stall_detector
+        stall_detector = install_stall_detector()
+
+    window = None
+    with trace.span("restore session"):
+        from authentication.sessions import restore_session
+        user = restore_session()
+    if user is not None:
+        # Session encore valide : pas de formulaire ni de bcrypt
+        with trace.span("create MainWindow"):
+            from main import MainWindow
+            window = MainWindow()
+    else:
+        with trace.span("import SignIn"):
+            from authentication.sign_in import SignIn
+        with trace.span("create SignIn"):
+            window = SignIn()
+
+    first_paint_watcher = FirstPaintWatcher(window, app, exit_after_first_paint="--exit-after-first-paint" in argv)
+    with trace.span("show window"):
+        window.show()
+
+    backup_service = None
+    if os.environ.get("APP_BACKUP", "1") != "0":
+        from database.backup import get_backup_service
+        backup_service = get_backup_service()
+        backup_service.start()
+
+    # Après l'affichage : la configuration est rechargée quand un autre programme la modifie
+    from utils.config import get_config
+    get_config().watch()
+
+    idle_maintenance = None
+    if os.environ.get("APP_MAINTENANCE", "1") != "0":
+        from utils.idle_maintenance import install_idle_maintenance
+        idle_maintenance = install_idle_maintenance()
+
+    exit_code = app.exec()
+    # Written again to include what ran after the first paint (e.g. database initialisation)
+    trace.write()
+    if idle_maintenance is not None:
+        idle_maintenance.stop()
+    if backup_service is not None:
+        backup_service.stop()
+    if stall_detector is not None:
+        stall_detector.stop()
+        if stall_detector.reports:
+            stall_detector.export_json()
+    if instance_server is not None:
+        instance_server.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,9 @@ from pyside6_custom_widgets.labeled_line_edit import LabeledLineEdit
 from pyside6_custom_widgets.label import Label
 from pyside6_imports import QDialog, QVBoxLayout, QHBoxLayout, QIcon, QApplication,QSize, QMessageBox, QFrame
 
-from qt_material import apply_stylesheet
+from utils.theme_cache import apply_cached_stylesheet
 
 from utils.utils import  set_app_icon
-from main import MainWindow
 
 class PasswordForget(QDialog):
     """
@@ -32,7 +31,7 @@ class PasswordForget(QDialog):
         self.setup_ui()
         self.get_secret_question()
         self.setup_connection()
-        apply_stylesheet(self, theme='dark_amber.xml')
+        apply_cached_stylesheet(self, theme='dark_amber.xml')
 
     def setup_ui(self):
         """
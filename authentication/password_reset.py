@@ -3,7 +3,7 @@ from controllers.user_controller import UserController
 from pyside6_custom_widgets.button import Button
 from pyside6_custom_widgets.labeled_line_edit import LabeledLineEdit
 from pyside6_imports import QDialog, QVBoxLayout, QLineEdit, QHBoxLayout, QIcon, QApplication,QSize, QMessageBox
-from qt_material import apply_stylesheet
+from utils.theme_cache import apply_cached_stylesheet
 
 from utils.utils import set_app_icon
 
@@ -26,7 +26,7 @@ class ResetPassword(QDialog):
         self.username = username
         self.setup_ui()
         self.setup_connection()
-        apply_stylesheet(self, theme='dark_amber.xml')
+        apply_cached_stylesheet(self, theme='dark_amber.xml')
 
     def setup_ui(self):
         """
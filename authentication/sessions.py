@@ -0,0 +1,248 @@
+"""
+Persisted login sessions.
+
+Signing in costs a bcrypt verification, slow on purpose. After a successful sign-in,
+`start_session` adds a row to the `sessions` table and keeps on this computer a token
+`<session id>.<user id>.<expiry>.<signature>`, signed with HMAC-SHA256 and a local key
+generated on first use (`SESSION_KEY_FILE`). On the next launch, `restore_session` checks the
+signature and the expiry without the database (a few microseconds), then that the row has not
+been revoked (a primary key lookup), and the application opens the main window directly.
+
+Signing out (`end_session`) revokes the row and deletes the token; changing or resetting a
+password revokes every session of the user (`revoke_user_sessions`).
+
+The lifetime is the `session_lifetime_hours` setting of the configuration, `APP_SESSION_LIFETIME_HOURS`
+(168 hours) by default; 0 disables the persisted sessions.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from utils.config import BASE_DIR, get_config, set_current_user
+
+SESSION_FILE = Path(os.environ.get("APP_SESSION_FILE", BASE_DIR / "cache" / "session"))
+SESSION_KEY_FILE = Path(os.environ.get("APP_SESSION_KEY_FILE", BASE_DIR / "cache" / "session.key"))
+SESSION_LIFETIME_HOURS = float(os.environ.get("APP_SESSION_LIFETIME_HOURS", 168))
+
+logger = logging.getLogger(__name__)
+
+
+def session_lifetime():
+    """Return the session lifetime in seconds, 0 when the sessions are not persisted."""
+    return max(float(get_config().get("session_lifetime_hours", SESSION_LIFETIME_HOURS)), 0) * 3600
+
+
+def utc_now():
+    # Même convention que func.now() de SQLite : UTC, sans fuseau
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def write_private_file(path, data):
+    """Write `data` (bytes) to `path`, readable by the current user only."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+_key = None
+
+
+def session_key():
+    """
+    Return the signing key, generated on first use.
+    """
+    global _key
+    if _key is None:
+        try:
+            key = SESSION_KEY_FILE.read_bytes()
+        except FileNotFoundError:
+            key = b""
+        if len(key) < 32:
+            # Une nouvelle clé invalide les jetons existants : il faudra se reconnecter
+            key = secrets.token_bytes(32)
+            write_private_file(SESSION_KEY_FILE, key)
+        _key = key
+    return _key
+
+
+def sign(payload):
+    return hmac.new(session_key(), payload.encode("ascii"), hashlib.sha256).hexdigest()
+
+
+def make_token(session_id, user_id, expires):
+    """
+    Return the signed token of a session.
+
+    Args:
+        session_id (int): The `sessions` row.
+        user_id (int): The signed-in user.
+        expires (int): Expiry, in seconds since the epoch.
+    """
+    payload = f"{session_id}.{user_id}.{expires}"
+    return f"{payload}.{sign(payload)}"
+
+
+def parse_token(token, now=None):
+    """
+    Check the signature and the expiry of a token.
+
+    Returns:
+        tuple: (session_id, user_id), or None if the token is forged, damaged or expired.
+    """
+    try:
+        payload, signature = token.strip().rsplit(".", 1)
+        session_id, user_id, expires = (int(part) for part in payload.split("."))
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, sign(payload)):
+        return None
+    if expires <= (now or time.time()):
+        return None
+    return session_id, user_id
+
+
+def read_token():
+    try:
+        return SESSION_FILE.read_text(encoding="ascii")
+    except (OSError, ValueError):
+        return None
+
+
+def discard_token():
+    SESSION_FILE.unlink(missing_ok=True)
+
+
+def start_session(user_id):
+    """
+    Open a persisted session for a user who just signed in with their password.
+
+    Returns:
+        int: The session id, or None if the sessions are disabled.
+    """
+    lifetime = session_lifetime()
+    if not lifetime:
+        return None
+    from database.writer import get_writer
+    from models.session_model import LoginSession
+    from sqlalchemy import or_
+
+    expires = int(time.time() + lifetime)
+
+    def operation(db_session):
+        now = utc_now()
+        # Les anciennes sessions de l'utilisateur qui ne servent plus
+        db_session.query(LoginSession).filter(
+            LoginSession.user_id == user_id,
+            or_(LoginSession.expires_at <= now, LoginSession.revoked_at.isnot(None)),
+        ).delete(synchronize_session=False)
+        login_session = LoginSession(
+            user_id=user_id, created_at=now,
+            expires_at=datetime.fromtimestamp(expires, timezone.utc).replace(tzinfo=None),
+        )
+        db_session.add(login_session)
+        db_session.flush()
+        return login_session.id
+
+    session_id = get_writer().execute(operation)
+    write_private_file(SESSION_FILE, make_token(session_id, user_id, expires).encode("ascii"))
+    return session_id
+
+
+def restore_session():
+    """
+    Sign in again the user of the stored session, if it is still valid.
+
+    The database is only initialised (see `database.create_db.check_and_create_db`) once the
+    token has been checked, so a launch without a session does not load it.
+
+    Returns:
+        tuple: (user_id, username), or None if the user has to sign in.
+    """
+    token = read_token()
+    if token is None:
+        return None
+    lifetime = session_lifetime()
+    claims = parse_token(token) if lifetime else None
+    if claims is None:
+        discard_token()
+        return None
+    session_id, user_id = claims
+
+    from sqlalchemy import select
+    from sqlalchemy.exc import SQLAlchemyError
+    from database.create_db import check_and_create_db
+    from database.database import session
+    from models.session_model import LoginSession
+    from models.user import User
+
+    check_and_create_db()
+    statement = (
+        select(LoginSession.created_at, LoginSession.expires_at, LoginSession.revoked_at, User.username)
+        .join(User, User.id == LoginSession.user_id)
+        .where(LoginSession.id == session_id, LoginSession.user_id == user_id)
+    )
+    try:
+        row = session.execute(statement).first()
+    except SQLAlchemyError as e:
+        # Base indisponible : on passe par le formulaire sans jeter le jeton
+        logger.warning(f"Cannot check the stored session: {e}")
+        return None
+    finally:
+        session.close()
+
+    now = utc_now()
+    # La durée de vie est relue : la réduire dans la configuration raccourcit les sessions ouvertes
+    if row is None or row.revoked_at is not None or row.expires_at <= now or row.created_at + timedelta(seconds=lifetime) <= now:
+        discard_token()
+        return None
+    set_current_user(user_id, row.username)
+    return user_id, row.username
+
+
+def revoke_session(session_id):
+    """
+    Revoke a session, in the background.
+
+    Returns:
+        Future: Resolved once the session is revoked.
+    """
+    from database.writer import get_writer
+    from models.session_model import LoginSession
+
+    def operation(db_session):
+        db_session.query(LoginSession).filter(LoginSession.id == session_id, LoginSession.revoked_at.is_(None)).update(
+            {LoginSession.revoked_at: utc_now()}, synchronize_session=False
+        )
+
+    return get_writer().submit(operation)
+
+
+def revoke_user_sessions(db_session, user_id):
+    """
+    Revoke every session of a user (password changed), in the transaction of `db_session`.
+    """
+    from models.session_model import LoginSession
+
+    db_session.query(LoginSession).filter(LoginSession.user_id == user_id, LoginSession.revoked_at.is_(None)).update(
+        {LoginSession.revoked_at: utc_now()}, synchronize_session=False
+    )
+
+
+def end_session():
+    """
+    Sign out: revoke the stored session and delete its token.
+    """
+    token = read_token()
+    discard_token()
+    claims = parse_token(token) if token else None
+    if claims is not None:
+        return revoke_session(claims[0])
+    return None
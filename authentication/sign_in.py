@@ -1,14 +1,17 @@
+import logging
 from pathlib import Path
-from controllers.user_controller import UserController
-from database.create_db import check_and_create_db
 from pyside6_custom_widgets.button import Button
 from pyside6_custom_widgets.labeled_line_edit import LabeledLineEdit
 from pyside6_custom_widgets.label import Label
-from pyside6_imports import QDialog, QVBoxLayout, QHBoxLayout,QIcon, QLineEdit, QApplication,QSize, QMessageBox, QFrame
-from qt_material import apply_stylesheet
+from pyside6_imports import QDialog, QVBoxLayout, QHBoxLayout,QIcon, QLineEdit, QApplication,QSize, QMessageBox, QFrame, QTimer
+from utils.theme_cache import apply_cached_stylesheet
 
-from main import MainWindow
-from utils.utils import save_config_data, set_app_icon
+from authentication.sessions import start_session
+from utils.startup_trace import trace
+from utils.config import set_current_user
+from utils.utils import set_app_icon
+
+logger = logging.getLogger(__name__)
 
 class SignIn(QDialog):
     """
@@ -25,11 +28,23 @@ class SignIn(QDialog):
         self.setGeometry(100,100,400, 350)
         self.setMinimumSize(QSize(400, 350))
         self.setMaximumSize(QSize(400, 350))
-        self.controller = UserController()
+        self._controller = None
         self.setup_ui()
         self.setup_connection()
         #apply_stylesheet(self, theme='dark_amber.xml')
-        apply_stylesheet(self, theme="default_light.xml")
+        with trace.span("theme", window="SignIn"):
+            apply_cached_stylesheet(self, theme="default_light.xml")
+
+    @property
+    def controller(self):
+        """
+        The user controller, created on first use so that the database layer is not
+        imported before the window is visible.
+        """
+        if self._controller is None:
+            from controllers.user_controller import UserController
+            self._controller = UserController()
+        return self._controller
 
     def setup_ui(self):
         """
@@ -120,7 +135,12 @@ class SignIn(QDialog):
             is_authenticated = self.controller.authenticate_user(username,password)
             if is_authenticated :
                 user = self.controller.get_user(username=username)
-                save_config_data(user[0], user[1])
+                set_current_user(user[0], user[1])
+                try:
+                    start_session(user[0])
+                except Exception as e:
+                    # La session ne fait qu'éviter le mot de passe au prochain lancement
+                    logger.warning(f"Cannot persist the session: {e}")
                 self.open_dashboard()
             else:
                 QMessageBox.critical(self,"Error","Nom d'utilisateur ou Mot de passe incorrecte.")
@@ -128,6 +148,8 @@ class SignIn(QDialog):
             QMessageBox.critical(self, "Error", f"Error: {e}")
             
     def open_dashboard(self):
+        # Imported here: the dashboard and its widgets are only loaded once the user is signed in
+        from main import MainWindow
         self.dashboard = MainWindow()  
         self.dashboard.show()
         self.close()  
@@ -150,7 +172,13 @@ class SignIn(QDialog):
         
     def showEvent(self,event):
         super().showEvent(event)
-        check_and_create_db()
+        # Initialise the database once the window is on screen
+        QTimer.singleShot(0, self.init_database)
+
+    def init_database(self):
+        from database.create_db import check_and_create_db
+        with trace.span("db init"):
+            check_and_create_db()
         
 if __name__ == "__main__":
     app = QApplication([])
@@ -1,7 +1,6 @@
 from controllers.user_controller import UserController
 from database.create_db import check_and_create_db
 from pyside6_custom_widgets.signin import SignIn
-from main import MainWindow
 from pyside6_imports import QSize, QMessageBox
 from utils.utils import set_app_icon
 
@@ -35,6 +34,7 @@ class SignIn(SignIn):
             QMessageBox.critical(self, "Error", f"Error: {e}")
     
     def open_dashboard(self):
+        from main import MainWindow
         self.dashboard = MainWindow()  
         self.dashboard.show()
         self.close()  
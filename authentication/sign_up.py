@@ -10,7 +10,7 @@ from pyside6_custom_widgets.line_edit import LineEdit
 from authentication.sign_in import SignIn
 from utils.utils import secret_questions, set_app_icon
 
-from qt_material import apply_stylesheet
+from utils.theme_cache import apply_cached_stylesheet
 
 class SignUp(QDialog):
     
@@ -26,7 +26,7 @@ class SignUp(QDialog):
         self.setup_ui()
         self.setup_connections()
         
-        apply_stylesheet(self,theme="dark_teal.xml")
+        apply_cached_stylesheet(self, theme="dark_teal.xml")
         
     def setup_ui(self):
         self.main_layout = QVBoxLayout()
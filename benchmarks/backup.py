@@ -0,0 +1,131 @@
+"""
+Backup time against database size.
+
+For each size, a benchmark database is generated (or reused) and snapshotted with
+`database.backup.create_backup`, compressed and uncompressed. A writer thread inserts rows
+during the compressed snapshots; its worst commit latency shows whether the backup blocks it.
+
+Usage:
+    python -m benchmarks.backup --sizes 1000,100000,1000000 --output backup.json
+    python -m benchmarks.backup --sizes 100000 --baseline backup.json --threshold 0.3
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.results import compare_results, load_results, print_comparison, save_results, summarize
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_DIR = BASE_DIR / "benchmarks" / "data"
+DEFAULT_SIZES = "1000,100000,1000000"
+
+
+class LatencyProbe:
+    """
+    Thread committing one small insert every few milliseconds and recording the commit latencies.
+    """
+
+    def __init__(self, database, period=0.005):
+        self.database = database
+        self.period = period
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        connection = sqlite3.connect(self.database)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Même profil de connexion que l'application (voir database.database)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS bench_backup_probe (id INTEGER PRIMARY KEY, value REAL)")
+        connection.commit()
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            connection.execute("INSERT INTO bench_backup_probe (value) VALUES (?)", (started,))
+            connection.commit()
+            self.latencies.append(time.perf_counter() - started)
+            time.sleep(self.period)
+        connection.execute("DELETE FROM bench_backup_probe")
+        connection.commit()
+        connection.close()
+
+
+def run_size(size, data_dir, repeat):
+    """
+    Time the snapshots of one database size.
+
+    Returns:
+        dict: Benchmark name (prefixed with the size) -> summary.
+    """
+    from benchmarks.data import generate_database
+    from database.backup import create_backup
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    database = generate_database(data_dir / f"bench_{size}.db", size)
+
+    samples = {"backup.compressed": [], "backup.uncompressed": [], "backup.writer_max_latency": []}
+    sizes = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            snapshot = create_backup(database, directory, compressed=False)
+            samples["backup.uncompressed"].append(time.perf_counter() - started)
+            sizes["uncompressed"] = snapshot.stat().st_size
+            snapshot.unlink()
+
+            with LatencyProbe(database) as probe:
+                started = time.perf_counter()
+                snapshot = create_backup(database, directory, compressed=True)
+                samples["backup.compressed"].append(time.perf_counter() - started)
+            samples["backup.writer_max_latency"].append(max(probe.latencies, default=0.0))
+            sizes["compressed"] = snapshot.stat().st_size
+            snapshot.unlink()
+
+    print(f"  database {database.stat().st_size / 1e6:.1f} MB, snapshot {sizes['uncompressed'] / 1e6:.1f} MB, "
+          f"compressed {sizes['compressed'] / 1e6:.1f} MB")
+    return {f"{size}.{name}": summarize(values) for name, values in samples.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the backup time against the database size.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated row counts (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Snapshots per size (default: 3).")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Where generated databases are kept.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file and fail on regression.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2).")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    benchmarks = {}
+    for size in sizes:
+        print(f"Backing up {size} rows...")
+        for name, summary in run_size(size, args.data_dir, args.repeat).items():
+            benchmarks[name] = summary
+            print(f"  {name:<45} median {summary['median'] * 1000:>10.2f} ms")
+
+    results = {"benchmarks": benchmarks}
+    if args.output:
+        results = save_results(args.output, benchmarks, sizes=sizes, repeat=args.repeat)
+
+    if args.baseline:
+        comparison = compare_results(load_results(args.baseline), results, threshold=args.threshold)
+        if print_comparison(comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+
+from database.create_db import create_tables
+from models.audit_model import AuditLog
+from models.user import User
+from benchmarks.models import BenchCategory, BenchRecord
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+CATEGORY_COUNT = 50
+
+
+def generate_database(path, rows, batch_size=50_000, seed=0):
+    """
+    Create (or reuse) a benchmark database holding `rows` records.
+
+    Args:
+        path (Path): The SQLite file.
+        rows (int): Number of `BenchRecord` rows.
+        batch_size (int, optional): Rows inserted per executemany. Defaults to 50 000.
+        seed (int, optional): Random seed, so databases of the same size are identical. Defaults to 0.
+
+    Returns:
+        Path: The database file.
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    create_tables(engine)
+
+    with engine.begin() as connection:
+        existing = connection.execute(select(func.count()).select_from(BenchRecord.__table__)).scalar()
+    if existing == rows:
+        engine.dispose()
+        return path
+
+    from utils.hashing import hash_text
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    first_day = date.today() - timedelta(days=730)
+
+    with engine.begin() as connection:
+        for table in (BenchRecord.__table__, BenchCategory.__table__, AuditLog.__table__, User.__table__):
+            connection.execute(table.delete())
+
+        connection.execute(insert(User.__table__), [{
+            "id": 1,
+            "username": BENCH_USERNAME,
+            "password": hash_text(BENCH_PASSWORD),
+            "secret_question": "1",
+            "secret_answer": hash_text("bench"),
+        }])
+        connection.execute(insert(BenchCategory.__table__), [
+            {"id": index, "title": f"Catégorie {index}", "created_at": now, "updated_at": now}
+            for index in range(1, CATEGORY_COUNT + 1)
+        ])
+
+        for start in range(0, rows, batch_size):
+            connection.execute(insert(BenchRecord.__table__), [
+                {
+                    "label": f"Opération {index}",
+                    "amount": round(rng.uniform(100, 500_000), 2),
+                    "date": first_day + timedelta(days=rng.randrange(730)),
+                    "category_id": rng.randint(1, CATEGORY_COUNT),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for index in range(start, min(start + batch_size, rows))
+            ])
+
+    engine.dispose()
+    return path
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from models.base_model import BaseModel
+
+
+class BenchCategory(BaseModel):
+    """
+    Category referenced by `BenchRecord`, used to exercise foreign key combo boxes.
+    """
+    __tablename__ = 'bench_categories'
+    __verbose_name__ = "catégorie"
+
+    title = Column(String, nullable=False, unique=True, info={"verbose_name": "Titre", "tab_col_index": 2})
+
+    records = relationship("BenchRecord", back_populates="category")
+
+    def __repr__(self):
+        return self.title
+
+
+class BenchRecord(BaseModel):
+    """
+    Cash-register like record used by the benchmark suite.
+    """
+    __tablename__ = 'bench_records'
+    __verbose_name__ = "opération"
+    # Totaux journaliers et mensuels par catégorie tenus à jour par triggers (voir database.summaries),
+    # exercices clos archivables (voir database.archive)
+    __table_args__ = {"sqlite_autoincrement": True, "info": {"archive": "date", "summaries": [
+        {"bucket": "day", "date": "date", "sums": ["amount"]},
+        {"bucket": "month", "date": "date", "group_by": ["category_id"], "sums": ["amount"]},
+    ]}}
+
+    label = Column(String, nullable=False, info={"verbose_name": "Libellé", "tab_col_index": 2})
+    amount = Column(Float, nullable=False, info={"verbose_name": "Montant", "tab_col_index": 3, "column_type": "numeric"})
+    date = Column(Date, nullable=False, info={"verbose_name": "Date", "tab_col_index": 4, "order_column": True, "index_hint": ["amount"]})
+    category_id = Column(Integer, ForeignKey('bench_categories.id'), nullable=False, info={"verbose_name": "Catégorie", "tab_col_index": 5, "related_column": "title"})
+
+    category = relationship("BenchCategory", back_populates="records", lazy="joined")
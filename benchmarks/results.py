@@ -0,0 +1,119 @@
+import json
+import platform
+import statistics
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+
+def summarize(samples):
+    """
+    Summarize timing samples (in seconds).
+
+    Args:
+        samples (list of float): The measured durations.
+
+    Returns:
+        dict: Number of runs, min, median, mean and max durations.
+    """
+    return {
+        "runs": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+def measure(func, repeat=5, warmup=0):
+    """
+    Time a callable.
+
+    Args:
+        func (callable): The code to time.
+        repeat (int, optional): Number of timed calls. Defaults to 5.
+        warmup (int, optional): Number of untimed calls made first. Defaults to 0.
+
+    Returns:
+        list of float: The duration of each call, in seconds.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def save_results(path, benchmarks, **metadata):
+    """
+    Save benchmark results as JSON.
+
+    Args:
+        path (str): The output file.
+        benchmarks (dict): Benchmark name -> summary returned by `summarize`.
+        **metadata: Extra values saved with the results (e.g. database sizes).
+    """
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metadata": metadata,
+        "benchmarks": benchmarks,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+def load_results(path):
+    with Path(path).open("r") as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=0.2, metric="median", thresholds=None):
+    """
+    Compare two sets of results.
+
+    Args:
+        baseline (dict): Results loaded with `load_results`.
+        current (dict): Results to check against the baseline.
+        threshold (float, optional): Allowed relative slowdown (0.2 = 20%). Defaults to 0.2.
+        metric (str, optional): The summary value compared. Defaults to "median".
+        thresholds (dict, optional): Per-benchmark thresholds, as glob pattern -> allowed slowdown
+            (e.g. {"*.get_all": 0.5}). The first matching pattern wins over `threshold`.
+
+    Returns:
+        list of dict: One entry per benchmark present in both results, with the ratio and
+        whether it regressed beyond the threshold.
+    """
+    comparison = []
+    for name, summary in current["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if not reference or not reference.get(metric):
+            continue
+        ratio = summary[metric] / reference[metric]
+        allowed = next((value for pattern, value in (thresholds or {}).items() if fnmatch(name, pattern)), threshold)
+        comparison.append({
+            "name": name,
+            "baseline": reference[metric],
+            "current": summary[metric],
+            "ratio": ratio,
+            "threshold": allowed,
+            "regressed": ratio > 1 + allowed,
+        })
+    return comparison
+
+
+def print_comparison(comparison):
+    """
+    Print a comparison and return True if any benchmark regressed.
+    """
+    for entry in comparison:
+        status = "REGRESSION" if entry["regressed"] else "ok"
+        print(f"{entry['name']:<45} {entry['baseline'] * 1000:>10.2f} ms -> {entry['current'] * 1000:>10.2f} ms  x{entry['ratio']:.2f}  {status}")
+    return any(entry["regressed"] for entry in comparison)
@@ -0,0 +1,94 @@
+"""
+Time-to-first-window benchmark.
+
+Launches `app.py` in a fresh interpreter several times (offscreen, against a throw-away
+database) and measures the time between spawning the process and the first paint of the
+sign-in window, using the startup trace written by the application.
+
+Usage:
+    python -m benchmarks.startup --runs 10 --output startup.json
+    python -m benchmarks.startup --baseline startup.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.results import compare_results, load_results, print_comparison, save_results, summarize
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure_startup(work_dir):
+    """
+    Launch the application once and return its startup timings.
+
+    Args:
+        work_dir (Path): Directory receiving the trace and the database.
+
+    Returns:
+        dict: Seconds from spawn to first paint, and from spawn to interpreter ready (trace origin).
+    """
+    trace_path = work_dir / "trace.json"
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["APP_STARTUP_TRACE"] = str(trace_path)
+    env["APP_DATABASE_URL"] = f"sqlite:///{work_dir / 'db.db'}"
+    # Mesure du formulaire de connexion : pas de session enregistrée, la vraie n'est pas touchée
+    env["APP_SESSION_FILE"] = str(work_dir / "session")
+
+    spawned_at = time.time()
+    subprocess.run(
+        [sys.executable, str(BASE_DIR / "app.py"), "--exit-after-first-paint"],
+        cwd=BASE_DIR, env=env, check=True, timeout=120,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    with trace_path.open("r") as f:
+        startup_trace = json.load(f)
+    origin = startup_trace["otherData"]["origin_epoch"]
+    first_paint = next(event for event in startup_trace["traceEvents"] if event["name"] == "first paint")
+    return {
+        "time_to_first_window": origin + first_paint["ts"] / 1e6 - spawned_at,
+        "interpreter_startup": origin - spawned_at,
+    }
+
+
+def run(runs):
+    samples = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as work_dir:
+            for name, value in measure_startup(Path(work_dir)).items():
+                samples.setdefault(name, []).append(value)
+    return {f"startup.{name}": summarize(values) for name, values in samples.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the time to the first window of the application.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches (default: 5).")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2).")
+    args = parser.parse_args(argv)
+
+    benchmarks = run(args.runs)
+    for name, summary in benchmarks.items():
+        print(f"{name:<45} median {summary['median'] * 1000:.1f} ms (min {summary['min'] * 1000:.1f} ms)")
+
+    results = {"benchmarks": benchmarks}
+    if args.output:
+        results = save_results(args.output, benchmarks, runs=args.runs)
+
+    if args.baseline:
+        comparison = compare_results(load_results(args.baseline), results, threshold=args.threshold)
+        if print_comparison(comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Headless performance benchmarks for the widgets and controllers.
+
+Each database size runs in its own interpreter (offscreen Qt platform, `APP_DATABASE_URL`
+pointing at a generated SQLite database), so module level engines and caches never leak
+from one size to the next. Generated databases are kept in `--data-dir` and reused.
+
+Usage:
+    python -m benchmarks.suite --sizes 1000,100000,1000000 --output results.json
+    python -m benchmarks.suite --sizes 1000 --baseline results.json --threshold 0.2 --thresholds thresholds.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.results import compare_results, load_results, measure, print_comparison, save_results, summarize
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_DIR = BASE_DIR / "benchmarks" / "data"
+DEFAULT_SIZES = "1000,100000,1000000"
+
+
+def run_worker(size, database, repeat, output):
+    """
+    Run every benchmark against one database and write the raw samples to `output`.
+    Must run in a process whose `APP_DATABASE_URL` points at `database`.
+    """
+    from benchmarks.data import BENCH_PASSWORD, BENCH_USERNAME, generate_database
+    generate_database(database, size)
+
+    from pyside6_imports import QApplication
+    app = QApplication([])
+
+    from benchmarks.models import BenchRecord
+    from controllers.base_controller import BaseController
+    from controllers.user_controller import UserController
+    from pyside6_custom_widgets.sidebar import SideBar
+    from pyside6_custom_widgets.table_widget import CustomTableWidget
+    from views.generic import CreateView, UpdateView
+
+    controller = BaseController(BenchRecord)
+    # Full scans are repeated less on the largest databases
+    scan_repeat = max(1, min(repeat, 1_000_000 // size))
+    samples = {}
+
+    def dispose(widget):
+        widget.deleteLater()
+        app.processEvents()
+
+    samples["controller.get_all"] = measure(controller.get_all, scan_repeat)
+    samples["controller.search"] = measure(lambda: controller.search(category_id=7), scan_repeat)
+    samples["controller.get_by_id"] = measure(lambda: controller.get_by_id(size // 2), repeat)
+    samples["controller.aggregate"] = measure(
+        lambda: controller.aggregate(measures={"total": ("sum", "amount")}, time_bucket=("date", "day")), scan_repeat
+    )
+
+    table = None
+
+    def create_table():
+        nonlocal table
+        if table is not None:
+            dispose(table)
+        table = CustomTableWidget(model=BenchRecord, controller=controller, items_per_page=10)
+
+    samples["table.create"] = measure(create_table, scan_repeat)
+    page = table.filtered_instances[:table.items_per_page]
+    samples["table.populate_table"] = measure(lambda: table.populate_table(page), repeat)
+
+    def next_page():
+        table.current_page = 0
+        table.show_next_page()
+
+    samples["table.next_page"] = measure(next_page, repeat)
+
+    def search_table():
+        table.search_bar.set_text("")
+        table.search_bar.set_text("Opération 99")
+
+    samples["table.search"] = measure(search_table, scan_repeat)
+    dispose(table)
+
+    samples["form.create_view"] = measure(lambda: dispose(CreateView("Benchmark", model=BenchRecord, controller=controller)), repeat)
+    samples["form.update_view"] = measure(lambda: dispose(UpdateView("Benchmark", model=BenchRecord, controller=controller, id=size // 2)), repeat)
+
+    sidebar_buttons = [
+        (f"Menu {index}", "fa.home", None, [(f"Sub {index}.{sub}", "fa.star", lambda: None) for sub in range(5)])
+        for index in range(20)
+    ]
+    samples["sidebar.create"] = measure(lambda: dispose(SideBar(buttons=sidebar_buttons)), repeat)
+
+    user_controller = UserController()
+
+    def sign_in():
+        if user_controller.authenticate_user(BENCH_USERNAME, BENCH_PASSWORD):
+            user_controller.get_user(BENCH_USERNAME)
+
+    samples["auth.sign_in"] = measure(sign_in, repeat)
+
+    with Path(output).open("w") as f:
+        json.dump(samples, f)
+
+
+def run_size(size, data_dir, repeat):
+    """
+    Run the benchmarks for one database size in a subprocess.
+
+    Returns:
+        dict: Benchmark name (prefixed with the size) -> summary.
+    """
+    data_dir.mkdir(parents=True, exist_ok=True)
+    database = data_dir / f"bench_{size}.db"
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["APP_DATABASE_URL"] = f"sqlite:///{database}"
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        output = Path(work_dir) / "samples.json"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--worker", "--sizes", str(size),
+             "--database", str(database), "--repeat", str(repeat), "--output", str(output)],
+            cwd=BASE_DIR, env=env, check=True,
+        )
+        with output.open("r") as f:
+            samples = json.load(f)
+
+    return {f"{size}.{name}": summarize(values) for name, values in samples.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the widgets and controllers.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated row counts (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per benchmark (default: 5).")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Where generated databases are kept.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file and fail on regression.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2).")
+    parser.add_argument("--thresholds", help="JSON file of per-benchmark thresholds (glob pattern -> allowed slowdown).")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    if args.worker:
+        run_worker(sizes[0], Path(args.database), args.repeat, args.output)
+        return 0
+
+    benchmarks = {}
+    for size in sizes:
+        print(f"Running benchmarks on {size} rows...")
+        for name, summary in run_size(size, args.data_dir, args.repeat).items():
+            benchmarks[name] = summary
+            print(f"  {name:<45} median {summary['median'] * 1000:>10.2f} ms")
+
+    results = {"benchmarks": benchmarks}
+    if args.output:
+        results = save_results(args.output, benchmarks, sizes=sizes, repeat=args.repeat)
+
+    if args.baseline:
+        thresholds = None
+        if args.thresholds:
+            with open(args.thresholds, "r") as f:
+                thresholds = json.load(f)
+        comparison = compare_results(load_results(args.baseline), results, threshold=args.threshold, thresholds=thresholds)
+        if print_comparison(comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
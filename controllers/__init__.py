@@ -1,2 +1,19 @@
-from .base_controller import BaseController
-from .user_controller import UserController
+from importlib import import_module
+
+# Importés à la demande : `controllers.user_controller` (écran de connexion) ne charge pas
+# `base_controller` et ses dépendances (journal d'audit, thread d'écriture).
+_LAZY_CONTROLLERS = {
+    "AuditLogController": ".audit_controller",
+    "BaseController": ".base_controller",
+    "UserController": ".user_controller",
+}
+
+__all__ = list(_LAZY_CONTROLLERS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_CONTROLLERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_CONTROLLERS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,107 @@
+"""
+Read access to the audit log, paginated by key.
+
+Pages are ordered by (timestamp, id), newest first. The next page is fetched with the key of
+the last row of the current one (`WHERE (timestamp, id) < (:timestamp, :id)`) instead of an
+OFFSET, so every page costs the same however deep it is. Each filter has an index ending with
+`timestamp` (the id being the rowid, it follows implicitly):
+
+- no filter: `ix_audit_log_timestamp`;
+- user: `ix_audit_log_user_id_timestamp`;
+- table: `ix_audit_log_table_name_timestamp`;
+- table and record: `ix_audit_log_table_name_record_id_timestamp`.
+
+The entries compacted by the retention policy are read with `database.audit.archived_entries`.
+"""
+from sqlalchemy import String, select, text, tuple_, type_coerce
+
+from database.audit import AUDIT_SCHEMA, archived_entries, audit_table
+from database.database import session
+from models.audit_model import AuditLog
+from models.user import User
+
+PAGE_SIZE = 50
+
+
+class AuditLogController:
+    """
+    Keyset-paginated reads of the audit log.
+    """
+
+    def __init__(self):
+        self.model = AuditLog
+        self.table = audit_table()
+        # Valeur brute stockée : une date reconvertie par SQLAlchemy ne se compare pas à l'identique
+        self.timestamp = type_coerce(self.table.c.timestamp, String)
+
+    def page(self, after=None, limit=PAGE_SIZE, user_id=None, table_name=None, record_id=None):
+        """
+        Return a page of audit entries, newest first.
+
+        Args:
+            after (tuple, optional): The key of the last row of the previous page, see `key`.
+            limit (int, optional): Page size. Defaults to `PAGE_SIZE`.
+            user_id (int, optional): Only the entries of this user.
+            table_name (str, optional): Only the entries of this table.
+            record_id (int, optional): Only the entries of this record (with `table_name`).
+
+        Returns:
+            list of dict: The entries, with the user name under "username".
+        """
+        table = self.table
+        users = User.__table__
+        statement = (
+            select(
+                table.c.id, self.timestamp.label("timestamp"), table.c.user_id, users.c.username,
+                table.c.table_name, table.c.record_id, table.c.action, table.c.description, table.c.changes,
+            )
+            .select_from(table.outerjoin(users, users.c.id == table.c.user_id))
+            .order_by(self.timestamp.desc(), table.c.id.desc())
+            .limit(limit)
+        )
+        if user_id is not None:
+            statement = statement.where(table.c.user_id == user_id)
+        if table_name is not None:
+            statement = statement.where(table.c.table_name == table_name)
+            if record_id is not None:
+                statement = statement.where(table.c.record_id == record_id)
+        if after is not None:
+            statement = statement.where(tuple_(self.timestamp, table.c.id) < tuple_(*after))
+
+        try:
+            return [dict(row) for row in session.execute(statement).mappings()]
+        finally:
+            session.close()
+
+    @staticmethod
+    def key(entry):
+        """Return the pagination key of an entry returned by `page`."""
+        return (entry["timestamp"], entry["id"])
+
+    def table_names(self):
+        """
+        Return the audited table names, read by skipping through the (table_name, ...) index
+        rather than scanning it.
+        """
+        statement = text(
+            "WITH RECURSIVE names(name) AS ("
+            f" SELECT min(table_name) FROM {AUDIT_SCHEMA}.audit_log"
+            f" UNION ALL SELECT (SELECT min(table_name) FROM {AUDIT_SCHEMA}.audit_log WHERE table_name > names.name)"
+            " FROM names WHERE names.name IS NOT NULL"
+            ") SELECT name FROM names WHERE name IS NOT NULL"
+        )
+        try:
+            return session.execute(statement).scalars().all()
+        finally:
+            session.close()
+
+    def users(self):
+        """Return the (username, id) pairs of the users, for a filter."""
+        try:
+            return [tuple(row) for row in session.execute(select(User.username, User.id).order_by(User.username))]
+        finally:
+            session.close()
+
+    def archived_history(self, table_name, record_id=None):
+        """Return the compacted entries of a table or record, oldest first."""
+        return list(archived_entries(table_name, record_id))
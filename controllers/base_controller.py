@@ -1,17 +1,28 @@
 import logging
-from sqlalchemy.inspection import inspect
+from sqlalchemy import Date, DateTime, func, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from datetime import datetime
-
-from database.database import session
+from sqlalchemy.orm import aliased
+from datetime import date, datetime
+from decimal import Decimal
+
+from database.database import SessionLocal, session
+from database.writer import get_writer
+from controllers.filters import Q, get_filter_compiler
+from database.archive import archive_source
+from database.audit import audit_entry, diff_values, record_values, write_audit_entries
+from database.summaries import summary_statement
 from models.audit_model import AuditLog
-from utils.utils import read_config_file_data
+from models.meta import get_model_meta
+from utils.config import current_user_id
 
 # Configurer le logger pour capturer les erreurs SQLAlchemy
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-user_id = read_config_file_data()["user_id"]
+AGGREGATE_FUNCTIONS = ("sum", "count", "avg", "min", "max")
+# Format strftime de SQLite de chaque période
+TIME_BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m", "year": "%Y"}
 
 class ActionLogger:
     """
@@ -26,7 +37,7 @@ class ActionLogger:
         """
         self.log_model = AuditLog
 
-    def log(self, action, user_id, table_name, record_id, description=None):
+    def log(self, action, user_id, table_name, record_id, description=None, db_session=None, changes=None):
         """
         Log an action performed on a record.
 
@@ -36,24 +47,32 @@ class ActionLogger:
             table_name (str): The name of the table affected.
             record_id (int): The ID of the affected record.
             description (str, optional): A description or details about the action.
+                Defaults to a summary of the action (see `database.audit.describe`).
+            db_session (Session, optional): The writer session of the mutation being logged.
+                When given, the entry is written with that transaction. Otherwise it is
+                queued to the database writer.
+            changes (dict, optional): The JSON diff of the action (see `database.audit`).
         """
-        
+        entry = audit_entry(action, user_id, table_name, record_id, changes=changes, description=description)
+
+        if db_session is not None:
+            return self.log_many([entry], db_session)
+
         try:
-            log_entry = self.log_model(
-                action=action,
-                user_id=user_id,
-                table_name=table_name,
-                record_id=record_id,
-                description=description,
-            )
-            session.add(log_entry)
-            session.commit()
+            return get_writer().execute(lambda writer_session: self.log_many([entry], writer_session))
         except SQLAlchemyError as e:
             logger.error(f"Failed to log action: {e}")
-            session.rollback()
             raise
-        finally:
-            session.close()
+
+    def log_many(self, entries, db_session):
+        """
+        Log several actions in the transaction of a writer session.
+
+        Args:
+            entries (list of dict): Entries built with `database.audit.audit_entry`.
+            db_session (Session): The writer session of the mutations being logged.
+        """
+        write_audit_entries(db_session, entries)
 
 class BaseController:
     """
@@ -61,7 +80,9 @@ class BaseController:
 
     Attributes:
         model (Type[Base]): The SQLAlchemy model class associated with this controller.
+        meta (ModelMeta): The cached metadata of the model.
         action_logger (ActionLogger): The logger to record database actions.
+        writer (DatabaseWriter): The single writer through which every mutation is committed.
     """
 
     def __init__(self, model):
@@ -73,7 +94,10 @@ class BaseController:
             log_model (Type[Base]): The SQLAlchemy model class for logging actions.
         """
         self.model = model
+        self.meta = get_model_meta(model)
+        self.filter_compiler = get_filter_compiler(model)
         self.action_logger = ActionLogger()
+        self.writer = get_writer()
 
     def create(self, **kwargs):
         """
@@ -91,20 +115,161 @@ class BaseController:
             SQLAlchemyError: For any SQLAlchemy-related errors.
         """
         
-        try:
+        return self.create_async(**kwargs).result()
+
+    def create_async(self, **kwargs):
+        """
+        Queue the creation of a new record to the database writer.
+
+        Args:
+            **kwargs: Field values for the new record.
+
+        Returns:
+            Future: Resolved with the created record instance once committed.
+        """
+        
+        user_id = current_user_id()
+
+        def operation(db_session):
             instance = self.model(**kwargs)
-            session.add(instance)
-            session.commit()
-            self.action_logger.log('create', user_id, self.model.__tablename__, instance.id, description=f"Created record with values {kwargs}")
+            db_session.add(instance)
+            try:
+                db_session.flush()
+            except IntegrityError:
+                raise RecordAlreadyExistsError("A record with the provided information already exists.")
+            self.action_logger.log('create', user_id, self.model.__tablename__, instance.id, db_session=db_session, changes=kwargs)
             return instance
-        except IntegrityError:
-            session.rollback()
-            raise RecordAlreadyExistsError("A record with the provided information already exists.")
-        except SQLAlchemyError as e:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+
+        return self.writer.submit(operation)
+
+    def upsert_many(self, rows, conflict_columns, update_columns=None, batch_size=500):
+        """
+        Insert or update many records at once, with SQLite `INSERT ... ON CONFLICT DO UPDATE`.
+
+        Rows whose `conflict_columns` match an existing record update it, the others are
+        inserted. A record is only updated (and audited) when one of `update_columns` actually
+        changes. All the rows must have the same keys; when several rows share the same
+        conflict values, the last one wins.
+
+        Args:
+            rows (list of dict): Field values of the records.
+            conflict_columns (list of str): Columns identifying a record; they must be covered by a unique index or constraint.
+            update_columns (list of str, optional): Columns updated on conflict. Defaults to every other column of the rows.
+            batch_size (int, optional): Rows per statement. Defaults to 500.
+
+        Returns:
+            dict: The number of "inserted", "updated" and "unchanged" records.
+
+        Raises:
+            ValueError: If a conflict value does not match the type of its column.
+            SQLAlchemyError: For any SQLAlchemy-related errors; nothing is written in that case.
+        """
+        
+        return self.upsert_many_async(rows, conflict_columns, update_columns, batch_size).result()
+
+    def upsert_many_async(self, rows, conflict_columns, update_columns=None, batch_size=500):
+        """
+        Queue an `upsert_many` to the database writer. All the batches are written in one transaction.
+
+        Returns:
+            Future: Resolved with the "inserted", "updated" and "unchanged" counts once committed.
+        """
+        conflict_columns = list(conflict_columns)
+        # Clés converties au type des colonnes : RETURNING renvoie des valeurs typées ("1" revient en 1)
+        rows = [{**row, **self._key_values(row, conflict_columns)} for row in rows]
+        # Dernière occurrence gagnante pour les clés en double
+        rows = list({tuple(row[column] for column in conflict_columns): row for row in rows}.values())
+        if update_columns is None:
+            update_columns = sorted({key for row in rows for key in row} - set(conflict_columns) - {"id"})
+
+        user_id = current_user_id()
+
+        def operation(db_session):
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+            for start in range(0, len(rows), batch_size):
+                self._upsert_batch(db_session, rows[start:start + batch_size], conflict_columns, update_columns, counts, user_id)
+            return counts
+
+        return self.writer.submit(operation)
+
+    def _key_values(self, row, conflict_columns):
+        """
+        Return the conflict values of a row converted to the Python type of their column.
+
+        Raises:
+            ValueError: If a value cannot be converted.
+        """
+        values = {}
+        for name in conflict_columns:
+            column = self.model.__table__.c[name]
+            value = row[name]
+            try:
+                python_type = column.type.python_type
+            except NotImplementedError:
+                values[name] = value
+                continue
+            if python_type is date and isinstance(value, datetime):
+                value = value.date()
+            if value is None or isinstance(value, python_type):
+                values[name] = value
+                continue
+            try:
+                if python_type in (date, datetime) and isinstance(value, str):
+                    value = python_type.fromisoformat(value)
+                elif python_type in (int, float, str, Decimal) and not isinstance(value, (date, datetime)):
+                    value = python_type(value)
+                else:
+                    raise TypeError
+            except (TypeError, ValueError, ArithmeticError):
+                raise ValueError(
+                    f"Invalid value {value!r} for the key column '{name}' of {self.model.__name__}, expected {python_type.__name__}."
+                ) from None
+            values[name] = value
+        return values
+
+    def _upsert_batch(self, db_session, rows, conflict_columns, update_columns, counts, user_id):
+        table = self.model.__table__
+        key_columns = [table.c[column] for column in conflict_columns]
+
+        # Valeurs actuelles des enregistrements existants : distinguer insertions et mises à jour, et décrire les changements
+        keys = [tuple(row[column] for column in conflict_columns) for row in rows]
+        if len(key_columns) == 1:
+            key_filter = key_columns[0].in_([key[0] for key in keys])
+        else:
+            key_filter = tuple_(*key_columns).in_(keys)
+        existing = {
+            tuple(record[:len(key_columns)]): dict(zip(update_columns, record[len(key_columns):]))
+            for record in db_session.execute(select(*key_columns, *(table.c[column] for column in update_columns)).where(key_filter))
+        }
+
+        statement = sqlite_insert(table)
+        if update_columns:
+            set_ = {column: statement.excluded[column] for column in update_columns}
+            if "updated_at" in table.c and "updated_at" not in set_:
+                set_["updated_at"] = func.now()
+            changed = or_(*(table.c[column].is_distinct_from(statement.excluded[column]) for column in update_columns))
+            statement = statement.on_conflict_do_update(index_elements=key_columns, set_=set_, where=changed)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+        # Seules les lignes insérées ou réellement modifiées sont retournées
+        written = db_session.execute(statement.returning(table.c.id, *key_columns), rows).all()
+
+        rows_by_key = dict(zip(keys, rows))
+        audit_entries = []
+        for record_id, *key in written:
+            key = tuple(key)
+            row = rows_by_key[key]
+            old_values = existing.get(key)
+            if old_values is None:
+                counts["inserted"] += 1
+                audit_entries.append(audit_entry("create", user_id, table.name, record_id, changes=row))
+            else:
+                counts["updated"] += 1
+                changes = diff_values(old_values, {column: row[column] for column in update_columns})
+                audit_entries.append(audit_entry("update", user_id, table.name, record_id, changes=changes))
+        counts["unchanged"] += len(rows) - len(written)
+
+        self.action_logger.log_many(audit_entries, db_session)
 
     def get_by_id(self, id_):
         """
@@ -149,25 +314,37 @@ class BaseController:
             SQLAlchemyError: For any SQLAlchemy-related errors.
         """
         
-        try:
-            instance = session.query(self.model).filter(self.model.id == id_).first()
+        return self.update_async(id_, **kwargs).result()
+
+    def update_async(self, id_, **kwargs):
+        """
+        Queue the update of an existing record to the database writer.
+
+        Args:
+            id_ (int): The ID of the record to update.
+            **kwargs: New field values for the record.
+
+        Returns:
+            Future: Resolved with the updated record instance once committed.
+        """
+        
+        user_id = current_user_id()
+
+        def operation(db_session):
+            instance = db_session.query(self.model).filter(self.model.id == id_).first()
             if instance is None:
                 raise RecordNotFoundError("Record not found.")
 
+            changes = diff_values({key: getattr(instance, key) for key in kwargs}, kwargs)
             for key, value in kwargs.items():
                 setattr(instance, key, value)
 
-            session.commit()
-            self.action_logger.log('update', user_id, self.model.__tablename__, id_, description=f"Updated record with values {kwargs}")
+            # Rien n'a changé : pas d'UPDATE, donc pas d'entrée d'audit
+            if changes:
+                self.action_logger.log('update', user_id, self.model.__tablename__, id_, db_session=db_session, changes=changes)
             return instance
-        except RecordNotFoundError:
-            session.rollback()
-            raise
-        except SQLAlchemyError as e:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+
+        return self.writer.submit(operation)
 
     def delete(self, id_):
         """
@@ -184,23 +361,32 @@ class BaseController:
             SQLAlchemyError: For any SQLAlchemy-related errors.
         """
         
-        try:
-            instance = session.query(self.model).filter(self.model.id == id_).first()
+        return self.delete_async(id_).result()
+
+    def delete_async(self, id_):
+        """
+        Queue the deletion of a record to the database writer.
+
+        Args:
+            id_ (int): The ID of the record to delete.
+
+        Returns:
+            Future: Resolved with True once the deletion is committed.
+        """
+        
+        user_id = current_user_id()
+
+        def operation(db_session):
+            instance = db_session.query(self.model).filter(self.model.id == id_).first()
             if instance is None:
                 raise RecordNotFoundError("Record not found.")
 
-            session.delete(instance)
-            session.commit()
-            self.action_logger.log('delete', user_id, self.model.__tablename__, id_, description=f"Deleted record with values {instance}")
+            values = record_values(instance)
+            db_session.delete(instance)
+            self.action_logger.log('delete', user_id, self.model.__tablename__, id_, db_session=db_session, changes=values)
             return True
-        except RecordNotFoundError:
-            session.rollback()
-            raise
-        except SQLAlchemyError as e:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+
+        return self.writer.submit(operation)
     
     def get_all(self):
         """
@@ -224,28 +410,218 @@ class BaseController:
         finally:
             session.close()
 
-    def search(self, **filters):
+    def search(self, *groups, **filters):
         """
         Search records based on multiple filters.
 
+        Filters are `<column>__<operator>=<value>` keywords (equality when there is no operator),
+        e.g. `amount__gte=1000`, `date__between=(start, end)`, `label__icontains="loyer"`,
+        `category_id__in=[1, 2]`. `Q` objects add OR groups: `search(Q(a=1) | Q(b__lt=2), c=3)`.
+        See `controllers.filters`. A date filter reaching an archived fiscal year also reads
+        its archive (see `database.archive`).
+
         Args:
-            filters: Key-value pairs to filter records.
+            *groups (Q): Filter groups, combined with AND.
+            **filters: Key-value pairs to filter records.
 
         Returns:
             A list of model instances that match the filters.
+
+        Raises:
+            InvalidFilterError: If a filter uses an unknown column or operator.
         """
         
+        q = Q(*groups, **filters)
         try:
-            query = session.query(self.model)
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    query = query.filter(getattr(self.model, key) == value)
-            return query.all()
+            source = archive_source(session.connection(), self.model.__table__, q)
+            if source is not None:
+                return session.execute(select(aliased(self.model, source))).scalars().all()
+            statement, parameters = self.filter_compiler.statement(q)
+            return session.execute(statement, parameters).scalars().all()
         except SQLAlchemyError as e:
             raise
         finally:
             session.close()
-    
+
+    def search_filter(self, search_text):
+        """
+        Build the SQL equivalent of the `CustomTableWidget` search: the text is looked for
+        (case-insensitively) in every searchable column. Both use `database.database.search_text`,
+        in SQL on the stored values converted like SQLAlchemy loads them, so dates, floats and
+        booleans match as displayed by `str()` ("true", "1000.0", "2024-03-01").
+
+        Args:
+            search_text (str): The searched text.
+
+        Returns:
+            A SQLAlchemy expression, usable in the `filters` of `iter_rows` and `count`.
+        """
+        # instr plutôt que LIKE : ni joker, ni minuscules limitées à l'ASCII
+        table_name = self.model.__table__.name
+        return or_(*(
+            func.instr(func.search_text(table_name, column.name, column.column), search_text.lower()) > 0
+            for column in self.meta.search_columns
+        ))
+
+    def _filter_clauses(self, filters):
+        """
+        Convert `filters` into SQL expressions: a dict of `search` filters, a `Q` object
+        or an iterable of SQLAlchemy expressions.
+        """
+        if not filters:
+            return []
+        if isinstance(filters, dict):
+            filters = Q(**filters)
+        if isinstance(filters, Q):
+            return [self.filter_compiler.clause(filters)]
+        return list(filters)
+
+    def _source(self, db_session, filters):
+        """
+        Return what a query reads and the filters left to apply: the model table and the
+        `filters` clauses, or the `UNION ALL` of the table and of the archives reached by the
+        date filter, already filtered (see `database.archive`).
+        """
+        source = archive_source(db_session.connection(), self.model.__table__, filters)
+        if source is None:
+            return self.model.__table__, self._filter_clauses(filters)
+        return source, []
+
+    def _order_clauses(self, order, entity=None):
+        """
+        Convert `order` (column names, prefixed with "-" for descending order) into SQL expressions.
+        Defaults to the `order_column` columns of the model, then the id so the order is stable.
+        """
+        entity = entity if entity is not None else self.model
+        if order is None:
+            return [*(getattr(entity, column.name) for column in self.meta.order_columns), entity.id]
+        clauses = []
+        for name in order:
+            column = getattr(entity, name.lstrip("-"))
+            clauses.append(column.desc() if name.startswith("-") else column)
+        return clauses
+
+    def count(self, filters=None):
+        """
+        Count the records matching `filters` (see `iter_rows`).
+
+        Returns:
+            int: The number of records.
+        """
+        with SessionLocal() as db_session:
+            source, clauses = self._source(db_session, filters)
+            statement = select(func.count()).select_from(source).where(*clauses)
+            return db_session.execute(statement).scalar_one()
+
+    def iter_rows(self, filters=None, order=None, batch_size=1000):
+        """
+        Iterate over the records matching `filters` without loading them all: rows are fetched
+        from the cursor `batch_size` at a time (`yield_per`), so memory stays constant whatever
+        the table size. The iteration uses its own session and may run in a background thread.
+
+        Args:
+            filters (dict, Q or iterable, optional): `search` filters or SQLAlchemy expressions.
+            order (list of str, optional): Column names, "-name" for descending order. Defaults to the `order_column` columns.
+            batch_size (int, optional): Rows fetched per batch. Defaults to 1000.
+
+        Yields:
+            The model instances.
+        """
+        with SessionLocal() as db_session:
+            source, clauses = self._source(db_session, filters)
+            entity = self.model if source is self.model.__table__ else aliased(self.model, source)
+            statement = (
+                select(entity)
+                .where(*clauses)
+                .order_by(*self._order_clauses(order, entity))
+                .execution_options(yield_per=batch_size)
+            )
+            for instance in db_session.scalars(statement):
+                yield instance
+
+    def aggregate(self, group_by=None, measures=None, filters=None, time_bucket=None, use_summaries=True):
+        """
+        Compute totals in SQL (`SUM`, `COUNT`, `AVG`, `MIN`, `MAX`), optionally grouped by columns
+        and/or by period, instead of looping over `get_all()` results. The query uses its own
+        session and may run in a background thread.
+
+        Example:
+            controller.aggregate(measures={"total": ("sum", "amount")}, time_bucket=("date", "day"),
+                                 filters={"date__year": 2024})
+
+        Args:
+            group_by (str or list of str, optional): Grouping column names.
+            measures (dict, optional): Result name -> (function, column name), e.g. `{"total": ("sum", "amount")}`;
+                the column may be None for `count`. Defaults to `{"count": ("count", None)}`.
+            filters (dict, Q or iterable, optional): `search` filters or SQLAlchemy expressions.
+            time_bucket (tuple, optional): (date column name, unit), the unit being "day", "week",
+                "month" or "year". The period is returned under the "period" key.
+            use_summaries (bool, optional): Read an installed summary table of the model instead
+                of the model table when one can answer the query (see `database.summaries`). Defaults to True.
+
+        Like `search` and `count`, the totals only include the archived fiscal years reached by
+        the date filter (see `database.archive`), whether a summary table or the model table answers.
+
+        Returns:
+            list of dict: One dict per group (a single one without grouping), ordered by group.
+
+        Raises:
+            ValueError: If a column, function or unit is unknown.
+        """
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        group_by = group_by or []
+        measures = measures or {"count": ("count", None)}
+
+        with SessionLocal() as db_session:
+            statement = None
+            if use_summaries:
+                statement = summary_statement(db_session.connection(), self.model.__table__, group_by, measures, filters, time_bucket)
+            if statement is None:
+                source, clauses = self._source(db_session, filters)
+                statement = self._aggregate_statement(source, clauses, group_by, measures, time_bucket)
+            return [dict(row) for row in db_session.execute(statement).mappings()]
+
+    def _aggregate_statement(self, source, clauses, group_by, measures, time_bucket):
+        keys = [self._aggregate_column(source, name).label(name) for name in group_by]
+        if time_bucket:
+            keys.append(self._time_bucket(source, *time_bucket).label("period"))
+
+        columns = []
+        for label, (function, name) in measures.items():
+            if function not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Unknown aggregate function '{function}', expected one of {', '.join(AGGREGATE_FUNCTIONS)}.")
+            if name is None:
+                if function != "count":
+                    raise ValueError(f"The '{function}' measure '{label}' needs a column.")
+                columns.append(func.count().label(label))
+            else:
+                columns.append(getattr(func, function)(self._aggregate_column(source, name)).label(label))
+
+        statement = select(*keys, *columns).select_from(source).where(*clauses)
+        if keys:
+            statement = statement.group_by(*keys).order_by(*keys)
+        return statement
+
+    def _aggregate_column(self, source, name):
+        if name not in source.columns:
+            raise ValueError(f"Unknown column '{name}' for {self.model.__name__}.")
+        return source.columns[name]
+
+    def _time_bucket(self, source, name, unit):
+        """
+        Return the SQL expression of the period of a date column. Daily buckets of a `Date`
+        column group on the column itself, so SQLite can use its index.
+        """
+        column = self._aggregate_column(source, name)
+        if not isinstance(column.type, (Date, DateTime)):
+            raise ValueError(f"Column '{name}' is not a date column.")
+        if unit not in TIME_BUCKETS:
+            raise ValueError(f"Unknown time bucket '{unit}', expected one of {', '.join(TIME_BUCKETS)}.")
+        if unit == "day":
+            return func.date(column) if isinstance(column.type, DateTime) else column
+        return func.strftime(TIME_BUCKETS[unit], column)
+
     def get_related_model(self, foreign_key_column_name):
         """
         Retrieve the related model dynamically based on a ForeignKey column.
@@ -256,12 +632,7 @@ class BaseController:
         Returns:
             The related model class.
         """
-        mapper = inspect(self.model)
-        
-        for prop in mapper.relationships:
-            for col in prop.local_columns:
-                if col.name == foreign_key_column_name:
-                    return prop.mapper.class_
+        return self.meta.related_model(foreign_key_column_name)
         
     def get_related_model_all(self, foreign_key_column_name):
         
@@ -302,12 +673,7 @@ class BaseController:
     #     return column_headers
     
     def _get_order_columns(self):
-        order_columns = []
-        for column in self.model.__table__.columns:
-            if column.info.get('order_column', False):
-                order_columns.append(column)
-                
-        return order_columns
+        return self.meta.order_columns
     
 class RecordNotFoundError(Exception):
     """Exception raised when a record is not found."""
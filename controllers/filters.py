@@ -0,0 +1,274 @@
+"""
+Filter expressions for `BaseController.search`.
+
+Keyword filters follow the `<column>__<operator>=<value>` convention, e.g.
+`amount__gte=1000`, `date__between=(start, end)`, `label__icontains="loyer"` or
+`category_id__in=[1, 2]`. `Q` objects combine them with `|` (OR), `&` (AND) and `~` (NOT):
+
+    controller.search(Q(label__icontains="loyer") | Q(amount__gte=100_000), date__year=2024)
+
+Comparing with None (`category_id=None`, `category_id__ne=None`) tests for NULL, like `isnull`.
+
+A filter is compiled to SQL once per *shape* (columns, operators and boolean structure,
+not values): the statement is built with bind parameters and cached, so repeated searches
+only bind new values and reuse SQLAlchemy's compiled form.
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import and_, bindparam, extract, not_, or_, select, true
+
+OPERATORS = (
+    "exact", "ne", "lt", "lte", "gt", "gte", "in", "notin", "between",
+    "contains", "icontains", "startswith", "istartswith", "endswith", "iendswith",
+    "isnull", "year", "month",
+)
+# Nombre de formes de filtres gardées en cache par modèle
+CACHE_SIZE = 256
+
+
+class InvalidFilterError(ValueError):
+    """Exception raised for a filter on an unknown column or with an unknown operator."""
+    pass
+
+
+class Q:
+    """
+    A group of filters combined with AND, which can itself be combined with other groups.
+
+    Args:
+        *children (Q): Nested groups.
+        **lookups: `<column>__<operator>=<value>` filters.
+    """
+
+    AND = "AND"
+    OR = "OR"
+
+    def __init__(self, *children, connector=AND, negated=False, **lookups):
+        self.children = list(children) + sorted(lookups.items())
+        self.connector = connector
+        self.negated = negated
+
+    def _combine(self, other, connector):
+        if not isinstance(other, Q):
+            return NotImplemented
+        return Q(self, other, connector=connector)
+
+    def __or__(self, other):
+        return self._combine(other, Q.OR)
+
+    def __and__(self, other):
+        return self._combine(other, Q.AND)
+
+    def __invert__(self):
+        return Q(self, negated=True)
+
+    def __bool__(self):
+        return bool(self.children)
+
+    def __repr__(self):
+        prefix = "NOT " if self.negated else ""
+        return f"{prefix}({f' {self.connector} '.join(map(repr, self.children))})"
+
+
+def split_lookup(lookup):
+    column, _, operator = lookup.partition("__")
+    return column, operator or "exact"
+
+
+def normalize_lookup(lookup, value):
+    """
+    Rewrite a comparison with None as a NULL test: `= NULL` and `!= NULL` are never true in SQL.
+    """
+    if value is None:
+        column, operator = split_lookup(lookup)
+        if operator in ("exact", "ne"):
+            return f"{column}__isnull", operator == "exact"
+    return lookup, value
+
+
+def filter_columns(q):
+    """
+    Return the names of the columns a filter refers to.
+    """
+    columns = set()
+    for child in q.children:
+        if isinstance(child, Q):
+            columns |= filter_columns(child)
+        else:
+            columns.add(split_lookup(child[0])[0])
+    return columns
+
+
+def escape_like(value):
+    return str(value).replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+class FilterCompiler:
+    """
+    Compiles `Q` trees into SQL for one model, caching the statements per filter shape.
+
+    Args:
+        model (Type[Base] or Table): The SQLAlchemy model class, or a table.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.table = getattr(model, "__table__", model)
+        self.columns = self.table.columns
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shape(self, q):
+        """
+        Return the hashable structure of a filter: its columns, operators and connectors, without values.
+        """
+        children = []
+        for child in q.children:
+            if isinstance(child, Q):
+                children.append(self.shape(child))
+                continue
+            lookup, value = normalize_lookup(*child)
+            if split_lookup(lookup)[1] == "isnull":
+                # IS NULL / IS NOT NULL ne prend pas de paramètre : la valeur fait partie de la forme
+                children.append(f"{lookup}={bool(value)}")
+            else:
+                children.append(lookup)
+        return (q.connector, q.negated, tuple(children))
+
+    def values(self, q, values=None):
+        """
+        Return the bind parameter values of a filter, in the order of `shape`.
+        """
+        values = [] if values is None else values
+        for child in q.children:
+            if isinstance(child, Q):
+                self.values(child, values)
+                continue
+            lookup, value = normalize_lookup(*child)
+            _, operator = split_lookup(lookup)
+            if operator == "isnull":
+                continue
+            if operator == "between":
+                low, high = value
+                values.extend((low, high))
+            elif operator in ("contains", "icontains"):
+                values.append(f"%{escape_like(value)}%")
+            elif operator in ("startswith", "istartswith"):
+                values.append(f"{escape_like(value)}%")
+            elif operator in ("endswith", "iendswith"):
+                values.append(f"%{escape_like(value)}")
+            elif operator in ("in", "notin"):
+                values.append(list(value))
+            else:
+                values.append(value)
+        return values
+
+    def compile(self, shape, counter=None):
+        """
+        Build the SQL expression of a filter shape, with bind parameters named p0, p1...
+        """
+        counter = [0] if counter is None else counter
+
+        def parameter(expanding=False):
+            name = f"p{counter[0]}"
+            counter[0] += 1
+            return bindparam(name, expanding=expanding)
+
+        clauses = []
+        connector, negated, children = shape
+        for child in children:
+            if isinstance(child, tuple):
+                clauses.append(self.compile(child, counter))
+            else:
+                clauses.append(self.compile_lookup(child, parameter))
+
+        if not clauses:
+            clause = true()
+        elif len(clauses) == 1:
+            clause = clauses[0]
+        else:
+            clause = (or_ if connector == Q.OR else and_)(*clauses)
+        return not_(clause) if negated else clause
+
+    def compile_lookup(self, lookup, parameter):
+        lookup, _, flag = lookup.partition("=")
+        name, operator = split_lookup(lookup)
+        if name not in self.columns:
+            raise InvalidFilterError(f"Unknown column '{name}' for {getattr(self.model, '__name__', self.table.name)}.")
+        if operator not in OPERATORS:
+            raise InvalidFilterError(f"Unknown operator '{operator}' in '{lookup}', expected one of {', '.join(OPERATORS)}.")
+        column = self.columns[name]
+
+        if operator == "exact":
+            return column == parameter()
+        if operator == "ne":
+            return column != parameter()
+        if operator == "lt":
+            return column < parameter()
+        if operator == "lte":
+            return column <= parameter()
+        if operator == "gt":
+            return column > parameter()
+        if operator == "gte":
+            return column >= parameter()
+        if operator == "in":
+            return column.in_(parameter(expanding=True))
+        if operator == "notin":
+            return column.not_in(parameter(expanding=True))
+        if operator == "between":
+            return column.between(parameter(), parameter())
+        if operator in ("contains", "startswith", "endswith"):
+            return column.like(parameter(), escape="/")
+        if operator in ("icontains", "istartswith", "iendswith"):
+            return column.ilike(parameter(), escape="/")
+        if operator == "isnull":
+            return column.is_(None) if flag == "True" else column.is_not(None)
+        if operator == "year":
+            return extract("year", column) == parameter()
+        if operator == "month":
+            return extract("month", column) == parameter()
+
+    def statement(self, q):
+        """
+        Return the cached SELECT statement of a filter shape and the bind parameter values.
+
+        Returns:
+            tuple: (Select, dict of parameters).
+        """
+        shape = self.shape(q)
+        with self._lock:
+            statement = self._cache.get(shape)
+            if statement is not None:
+                self._cache.move_to_end(shape)
+        if statement is None:
+            statement = select(self.model).where(self.compile(shape))
+            with self._lock:
+                self._cache[shape] = statement
+                if len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return statement, self.parameters(q)
+
+    def parameters(self, q):
+        return {f"p{index}": value for index, value in enumerate(self.values(q))}
+
+    def clause(self, q):
+        """
+        Return the SQL expression of a filter with its values bound, to combine with other statements.
+        """
+        return self.compile(self.shape(q)).params(self.parameters(q))
+
+
+_compilers = {}
+_compilers_lock = threading.Lock()
+
+
+def get_filter_compiler(model):
+    """
+    Return the filter compiler of a model, created on first use.
+    """
+    compiler = _compilers.get(model)
+    if compiler is None:
+        with _compilers_lock:
+            compiler = _compilers.setdefault(model, FilterCompiler(model))
+    return compiler
@@ -1,5 +1,6 @@
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from database.database import session  
+from authentication.sessions import revoke_user_sessions
 from models.user import User
 from utils.hashing import hash_text, verify_hashed_text
 
@@ -50,6 +51,7 @@ class UserController:
                 return False
             else:
                 user.password = hash_text(new_password)
+                revoke_user_sessions(session, user.id)
                 session.commit()
                 return True
         except SQLAlchemyError as e:
@@ -105,6 +107,7 @@ class UserController:
                 user = session.query(self.model).filter(self.model.username == username).first()
                 if user:
                     user.password = hash_text(new_password)
+                    revoke_user_sessions(session, user.id)
                     session.commit()
                     return True
             return False
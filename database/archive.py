@@ -0,0 +1,422 @@
+"""
+Fiscal-year archiving.
+
+A model opts in by naming its date column in the `info` of its table, which must be
+AUTOINCREMENT so that SQLite never gives the id of an archived row to a new one:
+
+    __table_args__ = {"sqlite_autoincrement": True, "info": {"archive": "date"}}
+
+`archive_period` moves the rows of a closed fiscal year, and their `AuditLog` rows, from the
+main database into `ARCHIVE_DIR/<year>.db`, and records the move in `archived_periods`.
+Archives are attached read-only on demand: `BaseController` queries whose date filter reaches
+an archived year read `UNION ALL` of the main table and of the matching archives (see
+`archive_source`); queries without date filter only read the main database.
+
+Summary tables (see `database.summaries`) are left untouched: they keep the totals of the
+archived years, which `BaseController.aggregate` leaves out unless the date filter reaches
+them, like every other query.
+
+Usage:
+    python -m database.archive benchmarks.models:BenchRecord 2023 [--vacuum]
+    python -m database.archive bench_records --list
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import Column, MetaData, Table, select, union_all
+from sqlalchemy.schema import CreateTable
+
+from controllers.filters import Q, filter_columns, get_filter_compiler, split_lookup
+from database.audit import AUDIT_SCHEMA
+from database.database import BASE_DIR, engine
+from models.archive_model import ArchivedPeriod
+from models.audit_model import AuditLog
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(os.environ.get("APP_ARCHIVE_DIR", BASE_DIR / "archives"))
+
+
+class ArchiveError(Exception):
+    """Exception raised when a period cannot be archived; the databases are left unchanged."""
+    pass
+
+
+class TooManyArchivesError(Exception):
+    """Exception raised when a query reaches more archived years than SQLite can attach at once."""
+    pass
+
+
+def fiscal_year_start_month():
+    # Mois de début de l'exercice, janvier par défaut ("fiscal_year_start_month" dans config.json)
+    return int(get_config().get("fiscal_year_start_month", 1))
+
+
+def fiscal_year_bounds(year):
+    """
+    Return the first day of fiscal year `year` and the first day of the next one.
+    """
+    month = fiscal_year_start_month()
+    return date(year, month, 1), date(year + 1, month, 1)
+
+
+def fiscal_year_of(day):
+    return day.year if day.month >= fiscal_year_start_month() else day.year - 1
+
+
+def archive_alias(year):
+    return f"archive_{year}"
+
+
+_archive_tables = {}
+
+
+def archive_table(table, alias):
+    """
+    Return the copy of `table` in the attached archive `alias`: same columns, no constraint
+    but the primary key (archives are read-only snapshots).
+    """
+    key = (table.name, alias)
+    if key not in _archive_tables:
+        _archive_tables[key] = Table(
+            table.name, MetaData(),
+            *(Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable) for column in table.columns),
+            schema=alias,
+        )
+    return _archive_tables[key]
+
+
+# Archivage
+
+def archive_period(model, year, bind=engine, directory=ARCHIVE_DIR, vacuum=False):
+    """
+    Move the rows of fiscal year `year` of `model`, and their `AuditLog` rows, into the archive
+    database of that year, in a single transaction.
+
+    Args:
+        model (Type[Base]): The archived model, whose table `info` names the date column ("archive").
+        year (int): The fiscal year, which must be closed (before the current fiscal year).
+        bind (Engine, optional): The main database. Defaults to the application engine.
+        directory (Path, optional): Where the archive databases are stored. Defaults to `ARCHIVE_DIR`.
+        vacuum (bool, optional): Run `VACUUM` on the main database afterwards. Defaults to False.
+
+    Returns:
+        dict: Numbers of moved rows ("rows") and audit rows ("audit_rows").
+
+    Raises:
+        ArchiveError: If the model is not archivable, the year is not closed, or the move fails.
+    """
+    table = model.__table__
+    date_column = table.info.get("archive")
+    if not date_column:
+        raise ArchiveError(f"Table '{table.name}' is not archivable (no \"archive\" date column in its info).")
+    start, end = fiscal_year_bounds(year)
+    if end > fiscal_year_bounds(fiscal_year_of(date.today()))[0]:
+        raise ArchiveError(f"Fiscal year {year} is not closed.")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{year}.db"
+    alias = archive_alias(year)
+    audit_table = AuditLog.__table__
+    columns = ", ".join(column.name for column in table.columns)
+    audit_columns = ", ".join(column.name for column in audit_table.columns)
+    period = f"{date_column} >= ? AND {date_column} < ?"
+    bounds = (start.isoformat(), end.isoformat())
+
+    raw_connection = bind.raw_connection()
+    dbapi_connection = raw_connection.driver_connection
+    previous_isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    try:
+        dbapi_connection.execute("ATTACH DATABASE ? AS " + alias, (str(path),))
+        try:
+            dbapi_connection.execute("BEGIN IMMEDIATE")
+            try:
+                for archived in (table, audit_table):
+                    ddl = CreateTable(archive_table(archived, alias), if_not_exists=True).compile(dialect=bind.dialect)
+                    dbapi_connection.execute(str(ddl))
+                dbapi_connection.execute(f"CREATE INDEX IF NOT EXISTS {alias}.ix_{table.name}_{date_column} ON {table.name} ({date_column})")
+                dbapi_connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {alias}.ix_audit_log_table_name_record_id_timestamp ON audit_log (table_name, record_id, timestamp)"
+                )
+                # Archive créée avant l'ajout d'une colonne au journal d'audit
+                archived_audit_columns = {row[1] for row in dbapi_connection.execute(f"PRAGMA {alias}.table_info(audit_log)")}
+                for column in audit_table.columns:
+                    if column.name not in archived_audit_columns:
+                        dbapi_connection.execute(f"ALTER TABLE {alias}.audit_log ADD COLUMN {column.name} {column.type.compile(bind.dialect)}")
+
+                # Sans AUTOINCREMENT, SQLite attribue max(id) + 1 : supprimer les lignes les plus récentes
+                # redonnerait à de nouvelles lignes les id archivés
+                sql = dbapi_connection.execute(
+                    "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+                ).fetchone()[0]
+                if "AUTOINCREMENT" not in sql.upper():
+                    raise ArchiveError(
+                        f"Table '{table.name}' is not AUTOINCREMENT, the ids of its archived rows could be reused "
+                        f"(declare it with {{\"sqlite_autoincrement\": True}} and rebuild it)."
+                    )
+                # Table reconstruite à partir d'un export : la séquence doit rester au-dessus des id archivés
+                archived_last_id = dbapi_connection.execute(f"SELECT max(id) FROM main.{table.name} WHERE {period}", bounds).fetchone()[0]
+                if archived_last_id is not None and not dbapi_connection.execute(
+                    "UPDATE main.sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (archived_last_id, table.name)
+                ).rowcount:
+                    dbapi_connection.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, archived_last_id))
+
+                rows = dbapi_connection.execute(
+                    f"INSERT INTO {alias}.{table.name} ({columns}) SELECT {columns} FROM main.{table.name} WHERE {period}", bounds
+                ).rowcount
+                archived_ids = f"SELECT id FROM main.{table.name} WHERE {period}"
+                audit_rows = dbapi_connection.execute(
+                    f"INSERT INTO {alias}.audit_log ({audit_columns}) SELECT {audit_columns} FROM {AUDIT_SCHEMA}.audit_log "
+                    f"WHERE table_name = ? AND record_id IN ({archived_ids})", (table.name, *bounds)
+                ).rowcount
+                dbapi_connection.execute(
+                    f"DELETE FROM {AUDIT_SCHEMA}.audit_log WHERE table_name = ? AND record_id IN ({archived_ids})", (table.name, *bounds)
+                )
+
+                # Les lignes sont déplacées, pas supprimées : les triggers (résumés...) ne doivent pas s'exécuter
+                triggers = dbapi_connection.execute(
+                    "SELECT name, sql FROM main.sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table.name,)
+                ).fetchall()
+                for name, _ in triggers:
+                    dbapi_connection.execute(f"DROP TRIGGER main.{name}")
+                dbapi_connection.execute(f"DELETE FROM main.{table.name} WHERE {period}", bounds)
+                for _, sql in triggers:
+                    dbapi_connection.execute(sql)
+
+                dbapi_connection.execute(
+                    "INSERT INTO main.archived_periods (table_name, year, start_date, end_date, path, row_count, audit_row_count, archived_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (table_name, year) DO UPDATE SET "
+                    "row_count = row_count + excluded.row_count, audit_row_count = audit_row_count + excluded.audit_row_count, "
+                    "path = excluded.path, archived_at = excluded.archived_at",
+                    (table.name, year, start.isoformat(), date.fromordinal(end.toordinal() - 1).isoformat(), str(path),
+                     rows, audit_rows, datetime.now().isoformat(" ")),
+                )
+                dbapi_connection.execute("COMMIT")
+            except Exception as e:
+                dbapi_connection.execute("ROLLBACK")
+                if isinstance(e, ArchiveError):
+                    raise
+                raise ArchiveError(f"Archiving {table.name} {year} failed: {e}") from e
+        finally:
+            dbapi_connection.execute(f"DETACH DATABASE {alias}")
+
+        logger.info(f"Archived {rows} rows of {table.name} ({audit_rows} audit rows) into {path}.")
+        if vacuum:
+            dbapi_connection.execute("VACUUM")
+    finally:
+        dbapi_connection.isolation_level = previous_isolation_level
+        raw_connection.close()
+    return {"rows": rows, "audit_rows": audit_rows}
+
+
+# Lecture
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def lookup_bounds(operator, value):
+    """
+    Return the (first, last) dates a lookup may match, None meaning unbounded.
+    """
+    if operator == "exact":
+        return as_date(value), as_date(value)
+    if operator in ("lt", "lte"):
+        return None, as_date(value)
+    if operator in ("gt", "gte"):
+        return as_date(value), None
+    if operator == "between":
+        low, high = value
+        return as_date(low), as_date(high)
+    if operator == "year":
+        return date(int(value), 1, 1), date(int(value), 12, 31)
+    if operator == "in" and value:
+        days = [as_date(day) for day in value]
+        return min(days), max(days)
+    return None, None
+
+
+def date_bounds(q, column):
+    """
+    Return the (first, last) dates a filter may match on `column` (None meaning unbounded),
+    or None if the filter does not constrain the column.
+    """
+    if column not in filter_columns(q):
+        return None
+    if q.negated:
+        return None, None
+
+    bounds = []
+    for child in q.children:
+        if isinstance(child, Q):
+            child_bounds = date_bounds(child, column)
+        else:
+            name, operator = split_lookup(child[0])
+            child_bounds = lookup_bounds(operator, child[1]) if name == column else None
+        bounds.append(child_bounds)
+
+    if q.connector == Q.OR:
+        if any(child_bounds is None for child_bounds in bounds):
+            return None, None
+        lows, highs = [low for low, _ in bounds], [high for _, high in bounds]
+        return (None if None in lows else min(lows)), (None if None in highs else max(highs))
+
+    low = high = None
+    for child_bounds in bounds:
+        if child_bounds is None:
+            continue
+        child_low, child_high = child_bounds
+        if child_low is not None:
+            low = child_low if low is None else max(low, child_low)
+        if child_high is not None:
+            high = child_high if high is None else min(high, child_high)
+    return low, high
+
+
+def archived_periods(connection, table, low=None, high=None):
+    """
+    Return the (year, path, start_date, end_date) of the archived fiscal years of `table` overlapping [low, high].
+    """
+    if not table.info.get("archive"):
+        return []
+    statement = select(ArchivedPeriod.year, ArchivedPeriod.path, ArchivedPeriod.start_date, ArchivedPeriod.end_date).where(ArchivedPeriod.table_name == table.name)
+    if low is not None:
+        statement = statement.where(ArchivedPeriod.end_date >= low)
+    if high is not None:
+        statement = statement.where(ArchivedPeriod.start_date <= high)
+    return connection.execute(statement.order_by(ArchivedPeriod.year)).all()
+
+
+def attached_limit(connection):
+    """Return the maximum number of databases SQLite can attach to `connection`."""
+    dbapi_connection = connection.connection.driver_connection
+    # getlimit : Python 3.11+ ; 10 est la limite par défaut de SQLite
+    if hasattr(dbapi_connection, "getlimit"):
+        return dbapi_connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    return 10
+
+
+def attach_archives(connection, periods):
+    """
+    Attach read-only the archive databases of `periods` to `connection`, detaching the other archives.
+
+    Returns:
+        list of str: The schema names of the archives of `periods`.
+
+    Raises:
+        TooManyArchivesError: If SQLite cannot attach that many databases (10 by default,
+            the audit database included).
+    """
+    attached = {row[1] for row in connection.exec_driver_sql("PRAGMA database_list")}
+    needed = {archive_alias(period.year): period.path for period in periods}
+    others = [alias for alias in attached if alias not in ("main", "temp") and not alias.startswith("archive_")]
+    available = attached_limit(connection) - len(others)
+    if len(needed) > available:
+        years = [period.year for period in periods]
+        raise TooManyArchivesError(
+            f"The query reaches {len(needed)} archived fiscal years ({min(years)}-{max(years)}), "
+            f"at most {available} can be read at once: narrow the date filter."
+        )
+    for alias in attached:
+        if alias.startswith("archive_") and alias not in needed:
+            connection.exec_driver_sql(f"DETACH DATABASE {alias}")
+    for alias, path in needed.items():
+        if alias not in attached:
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {alias}", (f"{Path(path).resolve().as_uri()}?mode=ro",))
+    return list(needed)
+
+
+def periods_read(connection, table, filters):
+    """
+    Return the archived fiscal years (see `archived_periods`) read by a query of `table`
+    filtered by `filters`: those its date filter reaches, none without date filter.
+    """
+    date_column = table.info.get("archive")
+    if not date_column or not filters:
+        return []
+    if isinstance(filters, dict):
+        filters = Q(**filters)
+    if not isinstance(filters, Q):
+        return []
+    bounds = date_bounds(filters, date_column)
+    if bounds is None:
+        return []
+    return archived_periods(connection, table, *bounds)
+
+
+def archive_source(connection, table, filters):
+    """
+    Return the `UNION ALL` of `table` and of its archives reached by the date filter of `filters`,
+    with the filters applied to each part, or None when only the main table has to be read.
+
+    Args:
+        connection (Connection): The connection of the query, to which the archives are attached.
+        table (Table): The queried table.
+        filters (dict or Q): The query filters; other kinds of filters never read the archives.
+
+    Returns:
+        Subquery or None.
+    """
+    periods = periods_read(connection, table, filters)
+    if not periods:
+        return None
+    filters = Q(**filters) if isinstance(filters, dict) else filters
+
+    attach_archives(connection, periods)
+    parts = []
+    for source in [table, *(archive_table(table, archive_alias(period.year)) for period in periods)]:
+        parts.append(select(*source.columns).where(get_filter_compiler(source).clause(filters)))
+    return union_all(*parts).subquery(f"{table.name}_all")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move a closed fiscal year of a model into its archive database.")
+    parser.add_argument("model", help='Table name (e.g. "users") or model path (e.g. "models.user:User").')
+    parser.add_argument("year", type=int, nargs="?", help="The fiscal year to archive.")
+    parser.add_argument("--list", action="store_true", help="List the archived fiscal years of the model.")
+    parser.add_argument("--vacuum", action="store_true", help="Run VACUUM on the main database afterwards.")
+    parser.add_argument("--url", default=None, help="Database URL (default: the application database).")
+    args = parser.parse_args(argv)
+
+    from database.database import create_app_engine
+    from utils.importer import resolve_model
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    model = resolve_model(args.model)
+    bind = create_app_engine(args.url) if args.url else engine
+    try:
+        if args.list:
+            with bind.connect() as connection:
+                periods = connection.execute(
+                    select(ArchivedPeriod.__table__).where(ArchivedPeriod.table_name == model.__tablename__).order_by(ArchivedPeriod.year)
+                ).all()
+            for period in periods:
+                print(f"{period.year}: {period.row_count} rows, {period.audit_row_count} audit rows in {period.path} ({period.archived_at:%Y-%m-%d})")
+            return 0
+        if args.year is None:
+            parser.error("the fiscal year is required")
+        try:
+            counts = archive_period(model, args.year, bind=bind, vacuum=args.vacuum)
+        except ArchiveError as e:
+            print(e)
+            return 1
+        print(f"Archived {counts['rows']} rows and {counts['audit_rows']} audit rows.")
+        return 0
+    finally:
+        bind.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""
+Audit log storage.
+
+Each audit entry has a short `description` ("Updated amount, label") and a compact JSON diff
+in `changes`: the values given on creation, `{column: [old, new]}` for the columns an update
+actually changed, and the values of a deleted record.
+
+By default the entries are inserted in the transaction of the change they describe. When
+`APP_AUDIT_DATABASE` names a file, they are stored there instead: the database is attached to
+every connection as `audit` for reading, and the entries are written behind by `AuditWriter`
+once the change is committed, so the audit volume no longer weighs on the main database (an
+entry still queued when the application is killed is lost).
+
+Retention: the entries older than `AUDIT_RETENTION_MONTHS` whole months are compacted by
+`compact_audit_log` (an idle-time maintenance task, see `database.maintenance`) into
+`audit_log_archive`, one zlib-compressed chunk per month and table. `archived_entries` reads
+them back.
+
+Usage:
+    entries = [audit_entry("update", user_id, "records", 12, changes=diff_values(old, new))]
+    write_audit_entries(db_session, entries)
+
+    python -m database.audit compact [--months 12]
+    python -m database.audit history <table> [<record_id>]
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timezone
+
+from sqlalchemy import MetaData, insert, select
+
+from database.database import AUDIT_DATABASE, BUSY_TIMEOUT_MS, compact_json, engine
+from database.writer import after_commit, get_writer
+from models.audit_model import AuditArchive, AuditLog
+from utils.metrics import registry
+
+# Schéma contenant la table audit_log
+AUDIT_SCHEMA = "audit" if AUDIT_DATABASE else "main"
+
+AUDIT_DATABASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER NOT NULL PRIMARY KEY,
+    table_name VARCHAR NOT NULL,
+    action VARCHAR NOT NULL,
+    record_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    timestamp DATETIME NOT NULL,
+    description VARCHAR NOT NULL,
+    changes JSON
+);
+CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_record_id_timestamp ON audit_log (table_name, record_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_timestamp ON audit_log (table_name, timestamp);
+CREATE INDEX IF NOT EXISTS ix_audit_log_user_id_timestamp ON audit_log (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_audit_log_timestamp ON audit_log (timestamp);
+DROP INDEX IF EXISTS ix_audit_log_user_id;
+CREATE TABLE IF NOT EXISTS audit_log_archive (
+    id INTEGER NOT NULL PRIMARY KEY,
+    month VARCHAR NOT NULL,
+    table_name VARCHAR NOT NULL,
+    row_count INTEGER NOT NULL,
+    first_timestamp VARCHAR NOT NULL,
+    last_timestamp VARCHAR NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_audit_log_archive_table_name_month ON audit_log_archive (table_name, month);
+"""
+
+AUDIT_COLUMNS = ("action", "user_id", "table_name", "record_id", "timestamp", "description", "changes")
+
+# Mois complets gardés dans audit_log ; 0 désactive le compactage
+AUDIT_RETENTION_MONTHS = int(os.environ.get("APP_AUDIT_RETENTION_MONTHS", 12))
+# Entrées compactées par transaction
+COMPACTION_CHUNK_SIZE = 5000
+ARCHIVED_COLUMNS = ("id", "table_name", "action", "record_id", "user_id", "timestamp", "description", "changes")
+
+logger = logging.getLogger(__name__)
+
+
+def record_values(instance, exclude=("id",)):
+    """
+    Return the non-null column values of a model instance.
+    """
+    values = {}
+    for column in instance.__table__.columns:
+        if column.name in exclude:
+            continue
+        value = getattr(instance, column.key, None)
+        if value is not None:
+            values[column.name] = value
+    return values
+
+
+def diff_values(old, new):
+    """
+    Return `{column: [old, new]}` for the columns of `new` whose value differs from `old`.
+    """
+    return {column: [old.get(column), value] for column, value in new.items() if old.get(column) != value}
+
+
+def describe(action, changes=None):
+    """Return the short description of an audit entry, e.g. "Updated amount, label"."""
+    if action == "update" and changes:
+        return f"Updated {', '.join(changes)}"
+    return {"create": "Created", "update": "Updated", "delete": "Deleted"}.get(action, action.capitalize())
+
+
+def audit_entry(action, user_id, table_name, record_id, changes=None, description=None):
+    """
+    Build an audit entry (a dict of `AuditLog` column values).
+
+    Args:
+        action (str): 'create', 'update', 'delete', 'import'...
+        user_id (int): The user performing the action.
+        table_name (str): The table of the record.
+        record_id (int): The record.
+        changes (dict, optional): The JSON diff, see the module documentation.
+        description (str, optional): Defaults to a summary of the action and the changed columns.
+    """
+    return {
+        "action": action,
+        "user_id": user_id,
+        "table_name": table_name,
+        "record_id": record_id,
+        "description": description or describe(action, changes),
+        "changes": changes or None,
+    }
+
+
+def write_audit_entries(db_session, entries):
+    """
+    Store audit entries: in the transaction of `db_session` (a writer session), or, with an
+    audit database, through the `AuditWriter` once that transaction is committed.
+    """
+    if not entries:
+        return
+    if AUDIT_DATABASE:
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        for entry in entries:
+            entry.setdefault("timestamp", timestamp)
+        audit_writer = get_audit_writer()
+        after_commit(db_session, lambda: audit_writer.put(entries))
+    else:
+        db_session.execute(insert(AuditLog.__table__), entries)
+
+
+_audit_metadata = MetaData()
+
+
+def audit_table(table=AuditLog.__table__):
+    """
+    Return the table to read the audit log (or, given `AuditArchive.__table__`, its archive)
+    from: the table itself, or its copy in the attached audit database.
+    """
+    if not AUDIT_DATABASE:
+        return table
+    key = f"{AUDIT_SCHEMA}.{table.name}"
+    if key not in _audit_metadata.tables:
+        table.to_metadata(_audit_metadata, schema=AUDIT_SCHEMA)
+    return _audit_metadata.tables[key]
+
+
+def retention_cutoff(months=AUDIT_RETENTION_MONTHS, today=None):
+    """
+    Return the first day of the oldest month kept in `audit_log`.
+    """
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def compact_audit_log(connection, cutoff=None, deadline=None, chunk_size=COMPACTION_CHUNK_SIZE):
+    """
+    Move the audit entries older than `cutoff` into `audit_log_archive`, oldest first, one
+    transaction per chunk of `chunk_size` entries of the same month.
+
+    Args:
+        connection (sqlite3.Connection): An autocommit connection reaching `AUDIT_SCHEMA`.
+        cutoff (date, optional): Defaults to `retention_cutoff()`.
+        deadline (float, optional): `time.perf_counter()` value after which no chunk is started.
+        chunk_size (int, optional): Defaults to `COMPACTION_CHUNK_SIZE`.
+
+    Returns:
+        dict: Numbers of compacted entries ("rows") and archive rows written ("chunks"), and
+        whether every entry older than `cutoff` is compacted ("done").
+    """
+    cutoff = (cutoff or retention_cutoff()).isoformat()
+    counts = {"rows": 0, "chunks": 0, "done": False}
+    while deadline is None or time.perf_counter() < deadline:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                f"SELECT {', '.join(ARCHIVED_COLUMNS)} FROM {AUDIT_SCHEMA}.audit_log WHERE timestamp < ? ORDER BY timestamp, id LIMIT ?",
+                (cutoff, chunk_size),
+            ).fetchall()
+            if not rows:
+                connection.execute("COMMIT")
+                counts["done"] = True
+                break
+            # Un lot ne chevauche pas deux mois
+            month = str(rows[0][5])[:7]
+            rows = [row for row in rows if str(row[5]).startswith(month)]
+            by_table = {}
+            for row in rows:
+                by_table.setdefault(row[1], []).append(row)
+            for table_name, table_rows in by_table.items():
+                payload = zlib.compress(compact_json({"columns": ARCHIVED_COLUMNS, "rows": table_rows}).encode(), 9)
+                connection.execute(
+                    f"INSERT INTO {AUDIT_SCHEMA}.audit_log_archive (month, table_name, row_count, first_timestamp, last_timestamp, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (month, table_name, len(table_rows), str(table_rows[0][5]), str(table_rows[-1][5]), payload),
+                )
+            connection.execute(
+                f"DELETE FROM {AUDIT_SCHEMA}.audit_log WHERE id IN (SELECT value FROM json_each(?))", (json.dumps([row[0] for row in rows]),)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        counts["rows"] += len(rows)
+        counts["chunks"] += len(by_table)
+    if counts["rows"]:
+        logger.info(f"Compacted {counts['rows']} audit entries older than {cutoff} into {counts['chunks']} archive rows.")
+    return counts
+
+
+def archived_entries(table_name, record_id=None, bind=engine):
+    """
+    Read back the compacted audit entries of a table, or of one of its records, oldest first.
+
+    Yields:
+        dict: The entries, as `AuditLog` column values (`changes` decoded).
+    """
+    archive = audit_table(AuditArchive.__table__)
+    statement = select(archive.c.payload).where(archive.c.table_name == table_name).order_by(archive.c.month, archive.c.id)
+    with bind.connect() as connection:
+        payloads = connection.execute(statement).scalars().all()
+    for payload in payloads:
+        data = json.loads(zlib.decompress(payload))
+        for row in data["rows"]:
+            entry = dict(zip(data["columns"], row))
+            if record_id is not None and entry["record_id"] != record_id:
+                continue
+            if entry["changes"] is not None:
+                entry["changes"] = json.loads(entry["changes"])
+            yield entry
+
+
+def connect_audit_database(path=AUDIT_DATABASE):
+    """
+    Open the audit database, creating its schema if needed.
+
+    Returns:
+        sqlite3.Connection: An autocommit connection.
+    """
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    connection.executescript(AUDIT_DATABASE_SCHEMA)
+    return connection
+
+
+class AuditWriter:
+    """
+    Write-behind writer of the audit database: entries are queued by `put` and inserted by a
+    background thread, in batches of up to `max_batch_size` entries per transaction.
+
+    Args:
+        path (str, optional): The audit database. Defaults to `AUDIT_DATABASE`.
+        max_batch_size (int, optional): Defaults to 1000.
+    """
+
+    def __init__(self, path=AUDIT_DATABASE, max_batch_size=1000):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self.written = 0
+        self.lost = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, entries):
+        """Queue a list of audit entries."""
+        self._ensure_started()
+        self._queue.put(entries)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=5):
+        """Write the queued entries and stop the thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def stop_at_exit(self):
+        # Le writer principal d'abord : ses dernières opérations mettent encore des entrées en file
+        get_writer().stop()
+        self.stop()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="AuditWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        connection = connect_audit_database(self.path)
+        statement = f"INSERT INTO audit_log ({', '.join(AUDIT_COLUMNS)}) VALUES ({', '.join(':' + column for column in AUDIT_COLUMNS)})"
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = list(item)
+                # Tout ce qui attend déjà est écrit dans la même transaction
+                while len(batch) < self.max_batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.extend(item)
+                rows = [{**entry, "changes": None if entry["changes"] is None else compact_json(entry["changes"])} for entry in batch]
+                try:
+                    connection.execute("BEGIN")
+                    connection.executemany(statement, rows)
+                    connection.execute("COMMIT")
+                    self.written += len(rows)
+                except sqlite3.Error as e:
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    self.lost += len(rows)
+                    logger.error(f"Failed to write {len(rows)} audit entries: {e}")
+                registry.set_gauge("audit.queue_depth", self.queue_depth())
+        finally:
+            connection.close()
+
+
+_audit_writer = None
+_audit_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """
+    Return the application-wide `AuditWriter`, creating it on first use.
+    """
+    global _audit_writer
+    with _audit_writer_lock:
+        if _audit_writer is None:
+            _audit_writer = AuditWriter()
+            atexit.register(_audit_writer.stop_at_exit)
+        return _audit_writer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit log retention.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="Compact the entries older than the retention.")
+    compact_parser.add_argument("--months", type=int, default=AUDIT_RETENTION_MONTHS, help="Whole months kept (default: %(default)s).")
+    history_parser = subparsers.add_parser("history", help="Print the compacted entries of a table or record.")
+    history_parser.add_argument("table")
+    history_parser.add_argument("record_id", type=int, nargs="?")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "compact":
+        raw_connection = engine.raw_connection()
+        dbapi_connection = raw_connection.driver_connection
+        previous_isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            counts = compact_audit_log(dbapi_connection, retention_cutoff(args.months))
+        finally:
+            dbapi_connection.isolation_level = previous_isolation_level
+            raw_connection.close()
+        print(f"{counts['rows']} entries compacted into {counts['chunks']} archive rows.")
+    else:
+        for entry in archived_entries(args.table, args.record_id):
+            print(f"{entry['timestamp']}  {entry['action']:<7} #{entry['record_id']}  user {entry['user_id']}  {entry['description']}  {entry['changes'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
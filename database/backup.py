@@ -0,0 +1,472 @@
+"""
+Online backups.
+
+A snapshot is copied with the SQLite backup API, `pages` pages per step, while the source
+connection holds a read transaction: in WAL mode it pins a consistent snapshot, so writers
+are never blocked and the copy never restarts because of them. The copy is checked with
+`PRAGMA integrity_check`, then compressed to `BACKUP_DIR/db-<timestamp>.sqlite.gz`. When the
+audit log has its own database (`APP_AUDIT_DATABASE`), it is copied and checked the same way
+into `db-<timestamp>.audit.sqlite.gz`, kept, pruned, verified and restored with the snapshot.
+
+`BackupService` takes a snapshot every `interval` hours in a background thread and applies
+the retention policy: the `keep_last` most recent snapshots, plus the most recent one of
+each of the last `keep_days` days.
+
+Usage:
+    python -m database.backup create [--no-compress]
+    python -m database.backup list
+    python -m database.backup verify backups/db-20250101-120000.sqlite.gz
+    python -m database.backup restore backups/db-20250101-120000.sqlite.gz
+    python -m database.backup prune
+"""
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from database.database import AUDIT_DATABASE, BASE_DIR, BUSY_TIMEOUT_MS, DATABASE_URL
+from utils.metrics import registry
+
+BACKUP_DIR = Path(os.environ.get("APP_BACKUP_DIR", BASE_DIR / "backups"))
+# Période (en heures) entre deux sauvegardes automatiques, 0 pour les désactiver
+BACKUP_INTERVAL_HOURS = float(os.environ.get("APP_BACKUP_INTERVAL_HOURS", 24))
+BACKUP_KEEP_LAST = int(os.environ.get("APP_BACKUP_KEEP_LAST", 7))
+BACKUP_KEEP_DAYS = int(os.environ.get("APP_BACKUP_KEEP_DAYS", 30))
+BACKUP_NAME_FORMAT = "db-%Y%m%d-%H%M%S"
+AUDIT_SUFFIX = ".audit"
+
+logger = logging.getLogger(__name__)
+
+
+class BackupError(Exception):
+    """Exception raised when a snapshot cannot be taken, verified or restored."""
+    pass
+
+
+def database_path(url=DATABASE_URL):
+    """
+    Return the file of a SQLite database URL.
+    """
+    from sqlalchemy.engine import make_url
+
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        raise BackupError(f"'{url}' is not a SQLite database file.")
+    return Path(database)
+
+
+def audit_snapshot(path):
+    """
+    Return the audit database snapshot taken with a snapshot ("db-<timestamp>.audit.sqlite.gz").
+    """
+    path = Path(path)
+    name, extensions = path.name.split(".", 1)
+    return path.with_name(f"{name}{AUDIT_SUFFIX}.{extensions}")
+
+
+def check_integrity(path):
+    """
+    Run `PRAGMA integrity_check` on a database file.
+
+    Raises:
+        BackupError: If the database is corrupted.
+    """
+    connection = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{path} is not a valid database: {e}") from e
+    finally:
+        connection.close()
+    if result != ["ok"]:
+        raise BackupError(f"Integrity check of {path} failed: {'; '.join(result[:5])}")
+
+
+def copy_database(source, destination, pages=256, pause=0.001, progress=None):
+    """
+    Copy a live database with the backup API, without blocking its writers.
+
+    Args:
+        source (Path): The database file.
+        destination (Path): The copy, overwritten.
+        pages (int, optional): Pages copied per step. Defaults to 256 (1 MB with 4 KB pages).
+        pause (float, optional): Seconds slept between steps, so the copy yields the disk. Defaults to 0.001.
+        progress (callable, optional): Called with (copied pages, total pages) after each step.
+    """
+    source_connection = sqlite3.connect(source, isolation_level=None)
+    destination_connection = sqlite3.connect(destination)
+    try:
+        source_connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        # Pas de fsync à chaque étape : une copie interrompue est jetée, le fichier final est synchronisé une fois
+        destination_connection.execute("PRAGMA synchronous=OFF")
+        # La transaction de lecture fige un instantané (WAL) : les écritures concurrentes ne relancent pas la copie
+        source_connection.execute("BEGIN")
+        source_connection.execute("SELECT count(*) FROM sqlite_master").fetchone()
+
+        def on_step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+            if pause:
+                time.sleep(pause)
+
+        source_connection.backup(destination_connection, pages=pages, progress=on_step)
+        source_connection.execute("COMMIT")
+        # L'instantané doit tenir dans un seul fichier
+        destination_connection.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        destination_connection.close()
+        source_connection.close()
+
+
+def compress(path, destination):
+    with open(path, "rb") as source_file, gzip.open(destination, "wb", compresslevel=6) as destination_file:
+        shutil.copyfileobj(source_file, destination_file, length=1024 * 1024)
+
+
+def decompress(path, destination):
+    with gzip.open(path, "rb") as source_file, open(destination, "wb") as destination_file:
+        shutil.copyfileobj(source_file, destination_file, length=1024 * 1024)
+
+
+def create_backup(source=None, directory=BACKUP_DIR, compressed=True, pages=256, pause=0.001, progress=None, audit_source=None):
+    """
+    Take a verified snapshot of a live database, and of its audit database if any.
+
+    Args:
+        source (Path, optional): The database file. Defaults to the application database.
+        directory (Path, optional): Where snapshots are stored. Defaults to `BACKUP_DIR`.
+        compressed (bool, optional): Gzip the snapshot. Defaults to True.
+        pages, pause, progress: See `copy_database`.
+        audit_source (Path, optional): The audit database saved with it (see `audit_snapshot`).
+            Defaults to `APP_AUDIT_DATABASE` when `source` is the application database.
+
+    Returns:
+        Path: The snapshot.
+
+    Raises:
+        BackupError: If a copy fails or is corrupted; no snapshot is left behind.
+    """
+    if source is None and audit_source is None:
+        audit_source = AUDIT_DATABASE
+    source = Path(source) if source else database_path()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = datetime.now().strftime(BACKUP_NAME_FORMAT)
+    target = directory / (f"{name}.sqlite.gz" if compressed else f"{name}.sqlite")
+    targets = [(source, target)]
+    if audit_source:
+        targets.append((Path(audit_source), audit_snapshot(target)))
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=directory, prefix=".backup-") as work_dir:
+        partials = []
+        for database, snapshot in targets:
+            copy = Path(work_dir) / f"{snapshot.name}.copy"
+            try:
+                copy_database(database, copy, pages=pages, pause=pause, progress=progress)
+            except sqlite3.Error as e:
+                raise BackupError(f"Backup of {database} failed: {e}") from e
+            check_integrity(copy)
+            partial = Path(work_dir) / snapshot.name
+            if compressed:
+                compress(copy, partial)
+                copy.unlink()
+            else:
+                copy.replace(partial)
+            with open(partial, "rb") as f:
+                os.fsync(f.fileno())
+            partials.append((partial, snapshot))
+        # Les fichiers n'apparaissent sous leur nom final qu'une fois complets et vérifiés,
+        # la sauvegarde de l'audit d'abord : le fichier principal marque une sauvegarde complète
+        for partial, snapshot in reversed(partials):
+            partial.replace(snapshot)
+
+    duration = time.perf_counter() - started
+    registry.set_gauge("backup.last_duration_s", round(duration, 3))
+    registry.set_gauge("backup.last_size_bytes", sum(snapshot.stat().st_size for _, snapshot in targets))
+    logger.info(f"Backup of {', '.join(str(database) for database, _ in targets)} written to {target} in {duration:.2f} s.")
+    return target
+
+
+def list_backups(directory=BACKUP_DIR):
+    """
+    List the snapshots of a directory.
+
+    Returns:
+        list of tuple: (datetime, path) pairs, most recent first.
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    backups = []
+    for path in directory.iterdir():
+        name, _, extensions = path.name.partition(".")
+        if extensions.startswith(AUDIT_SUFFIX[1:] + "."):
+            # Sauvegarde de l'audit : elle suit celle de la base principale
+            continue
+        try:
+            taken_at = datetime.strptime(name, BACKUP_NAME_FORMAT)
+        except ValueError:
+            continue
+        backups.append((taken_at, path))
+    return sorted(backups, reverse=True)
+
+
+def apply_retention(directory=BACKUP_DIR, keep_last=BACKUP_KEEP_LAST, keep_days=BACKUP_KEEP_DAYS, now=None):
+    """
+    Delete the snapshots outside the retention policy: the `keep_last` most recent ones are kept,
+    and the most recent one of each of the last `keep_days` days.
+
+    Returns:
+        list of Path: The deleted snapshots.
+    """
+    now = now or datetime.now()
+    kept_days = set()
+    deleted = []
+    for index, (taken_at, path) in enumerate(list_backups(directory)):
+        day = taken_at.date()
+        keep = index < keep_last or (day not in kept_days and now - taken_at <= timedelta(days=keep_days))
+        kept_days.add(day)
+        if not keep:
+            path.unlink(missing_ok=True)
+            audit_snapshot(path).unlink(missing_ok=True)
+            deleted.append(path)
+    return deleted
+
+
+def verify_backup(path):
+    """
+    Check that a snapshot (compressed or not), and its audit snapshot if any, are sound databases.
+
+    Raises:
+        BackupError: If a snapshot is corrupted.
+    """
+    path = Path(path)
+    audit_path = audit_snapshot(path)
+    for snapshot in [path, *([audit_path] if audit_path.exists() else [])]:
+        with tempfile.TemporaryDirectory() as work_dir:
+            extract_snapshot(snapshot, Path(work_dir) / "db.sqlite")
+
+
+def extract_snapshot(path, destination):
+    """
+    Copy a snapshot (decompressed) to `destination` and check it.
+
+    Raises:
+        BackupError: If the snapshot is corrupted.
+    """
+    path = Path(path)
+    try:
+        if path.name.endswith(".gz"):
+            decompress(path, destination)
+        else:
+            shutil.copyfile(path, destination)
+    except (OSError, EOFError, zlib.error) as e:
+        raise BackupError(f"{path} cannot be read: {e}") from e
+    check_integrity(destination)
+
+
+def restore_backup(path, target=None, keep_current=True, audit_target=None):
+    """
+    Replace a database, and its audit database, with a snapshot. The snapshots are verified
+    first, and copied with the backup API so the targets' WAL is handled; the application must be closed.
+
+    Args:
+        path (Path): The snapshot.
+        target (Path, optional): The restored database. Defaults to the application database.
+        keep_current (bool, optional): Save the current databases next to them first
+            ("<name>.before-restore"). Defaults to True.
+        audit_target (Path, optional): The restored audit database. Defaults to `APP_AUDIT_DATABASE`
+            when `target` is the application database.
+
+    Returns:
+        Path: The saved current database, if any.
+
+    Raises:
+        BackupError: If a snapshot is corrupted or a copy fails.
+    """
+    if target is None and audit_target is None:
+        audit_target = AUDIT_DATABASE
+    path = Path(path)
+    target = Path(target) if target else database_path()
+    restores = [(path, target)]
+    audit_path = audit_snapshot(path)
+    if audit_path.exists() and audit_target:
+        restores.append((audit_path, Path(audit_target)))
+    elif audit_path.exists():
+        logger.warning(f"{audit_path} is not restored: no audit database is configured (APP_AUDIT_DATABASE).")
+    elif audit_target:
+        logger.warning(f"{path} has no audit snapshot: the audit database {audit_target} is left as is.")
+
+    saved = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Tous les instantanés sont vérifiés avant de toucher à la moindre base
+        snapshots = []
+        for index, (snapshot_path, _) in enumerate(restores):
+            snapshot = Path(work_dir) / f"db-{index}.sqlite"
+            extract_snapshot(snapshot_path, snapshot)
+            snapshots.append(snapshot)
+
+        for snapshot, (snapshot_path, database) in zip(snapshots, restores):
+            try:
+                if keep_current and database.exists():
+                    previous = database.with_name(f"{database.name}.before-restore")
+                    previous.unlink(missing_ok=True)
+                    copy_database(database, previous, pages=-1, pause=0)
+                    saved = saved or previous
+                source_connection = sqlite3.connect(snapshot)
+                target_connection = sqlite3.connect(database)
+                try:
+                    source_connection.backup(target_connection)
+                finally:
+                    target_connection.close()
+                    source_connection.close()
+            except sqlite3.Error as e:
+                raise BackupError(f"Restore of {database} failed: {e}") from e
+            logger.info(f"Database {database} restored from {snapshot_path}.")
+    return saved
+
+
+class BackupService:
+    """
+    Background thread taking a snapshot every `interval` hours, then applying the retention policy.
+    The first snapshot is taken `delay` seconds after start if the last one is older than `interval`.
+
+    Args:
+        source (Path, optional): The database file. Defaults to the application database.
+        directory (Path, optional): Where snapshots are stored. Defaults to `BACKUP_DIR`.
+        interval (float, optional): Hours between snapshots. Defaults to `APP_BACKUP_INTERVAL_HOURS` (24).
+        delay (float, optional): Seconds waited before the first check, to keep startup quiet. Defaults to 60.
+        keep_last, keep_days: See `apply_retention`.
+    """
+
+    def __init__(self, source=None, directory=BACKUP_DIR, interval=BACKUP_INTERVAL_HOURS, delay=60,
+                 keep_last=BACKUP_KEEP_LAST, keep_days=BACKUP_KEEP_DAYS):
+        self.source = source
+        self.directory = Path(directory)
+        self.interval = interval
+        self.delay = delay
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+        self.last_backup = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="backup-service", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Stop the service; a snapshot in progress is finished first (within `timeout`).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def next_backup_in(self):
+        """
+        Return the seconds until the next snapshot is due (0 if it is due now).
+        """
+        backups = list_backups(self.directory)
+        if not backups:
+            return 0
+        due = backups[0][0] + timedelta(hours=self.interval)
+        return max(0.0, (due - datetime.now()).total_seconds())
+
+    def backup_now(self):
+        """
+        Take a snapshot and apply the retention policy.
+
+        Returns:
+            Path: The snapshot.
+        """
+        with self._lock:
+            try:
+                self.last_backup = create_backup(self.source, self.directory)
+                self.last_error = None
+            except (BackupError, OSError) as e:
+                self.last_error = str(e)
+                logger.error(f"Scheduled backup failed: {e}")
+                raise
+            apply_retention(self.directory, self.keep_last, self.keep_days)
+            return self.last_backup
+
+    def _run(self):
+        if self._stop.wait(self.delay):
+            return
+        while not self._stop.is_set():
+            wait = self.next_backup_in()
+            if wait > 0:
+                self._stop.wait(min(wait, 3600))
+                continue
+            try:
+                self.backup_now()
+            except (BackupError, OSError):
+                # Nouvel essai une heure plus tard
+                self._stop.wait(3600)
+
+
+_service = None
+
+
+def get_backup_service():
+    """
+    Return the backup service of the application database, created on first use.
+    """
+    global _service
+    if _service is None:
+        _service = BackupService()
+    return _service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up and restore the application database and its audit database.")
+    parser.add_argument("command", choices=("create", "list", "verify", "restore", "prune"))
+    parser.add_argument("file", nargs="?", help="The snapshot to verify or restore.")
+    parser.add_argument("--database", default=None, help="The database file (default: the application database).")
+    parser.add_argument("--directory", default=BACKUP_DIR, type=Path, help=f"Snapshots directory (default: {BACKUP_DIR}).")
+    parser.add_argument("--no-compress", action="store_true", help="Keep the snapshot uncompressed.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        if args.command == "create":
+            print(create_backup(args.database, args.directory, compressed=not args.no_compress))
+        elif args.command == "list":
+            for taken_at, path in list_backups(args.directory):
+                print(f"{taken_at:%Y-%m-%d %H:%M:%S}  {path.stat().st_size / 1e6:8.1f} MB  {path}")
+        elif args.command == "prune":
+            for path in apply_retention(args.directory):
+                print(f"Deleted {path}")
+        elif not args.file:
+            parser.error(f"{args.command} needs a snapshot file")
+        elif args.command == "verify":
+            verify_backup(args.file)
+            print(f"{args.file} is sound.")
+        else:
+            saved = restore_backup(args.file, args.database)
+            print(f"Database restored{f', previous one saved to {saved}' if saved else ''}.")
+        return 0
+    except BackupError as e:
+        print(e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,140 @@
-from database.database import Base, engine, BASE_DIR
+import logging
+from pathlib import Path
+
+from sqlalchemy import Index, UniqueConstraint, inspect
+
+from database.audit import connect_audit_database
+from database.database import AUDIT_DATABASE, Base, engine, BASE_DIR
+from database.migrate import migrate, stamp
+from database.summaries import derive_summaries, ensure_summaries
 from models.user import User
-from models.audit_model import AuditLog
+from models.audit_model import AuditArchive, AuditLog
+from models.archive_model import ArchivedPeriod
+from models.session_model import LoginSession
+from models.schema_key_model import SchemaKey
+
+logger = logging.getLogger(__name__)
+
+
+def index_name(table_name, column_names):
+    return f"ix_{table_name}_{'_'.join(column_names)}"
+
+
+def is_indexed(table, column_names):
+    """
+    Tell whether an index (or a unique constraint, or the primary key) of `table` starts with `column_names`.
+    """
+    column_names = list(column_names)
+    candidates = [[column.name for column in index.columns] for index in table.indexes]
+    candidates.append([column.name for column in table.primary_key.columns])
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            candidates.append([column.name for column in constraint.columns])
+    for column in table.columns:
+        if column.unique:
+            candidates.append([column.name])
+    return any(candidate[:len(column_names)] == column_names for candidate in candidates)
+
+
+def index_candidates(table):
+    """
+    List the indexes a table needs according to its column metadata.
+
+    A column is indexed when its `info` has `order_column` (used by `get_all` ordering),
+    `searchable` set to True, or `index_hint`, or when it is a foreign key. `index_hint` is
+    either True or a list of the columns following this one in a composite index.
+
+    Args:
+        table (Table): The table.
+
+    Returns:
+        list of tuple: The column names of each index, in index order.
+    """
+    candidates = []
+    for column in table.columns:
+        if column.primary_key:
+            continue
+        info = column.info
+        hint = info.get("index_hint")
+        if hint and hint is not True:
+            candidates.append((column.name, *([hint] if isinstance(hint, str) else hint)))
+        elif hint or info.get("order_column") or info.get("searchable") is True or column.foreign_keys:
+            candidates.append((column.name,))
+    return candidates
+
+
+def derive_indexes(metadata=Base.metadata):
+    """
+    Add to `metadata` the indexes derived from the column metadata (see `index_candidates`)
+    that no existing index already covers.
+
+    Returns:
+        list of Index: The indexes added.
+    """
+    added = []
+    for table in metadata.sorted_tables:
+        for column_names in index_candidates(table):
+            if is_indexed(table, column_names):
+                continue
+            added.append(Index(index_name(table.name, column_names), *(table.columns[name] for name in column_names)))
+    return added
+
+
+def ensure_indexes(bind=engine, metadata=Base.metadata):
+    """
+    Create the missing indexes of `metadata` in an existing database. Tables missing from the database are skipped.
+    """
+    derive_indexes(metadata)
+    with bind.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def create_tables(bind=engine, metadata=Base.metadata):
+    """
+    Create the missing tables, then the missing indexes (including the derived ones) and
+    the declared summary tables (see `database.summaries`).
+    """
+    derive_indexes(metadata)
+    derive_summaries(metadata)
+    metadata.create_all(bind=bind)
+    ensure_indexes(bind, metadata)
+    ensure_summaries(bind, metadata, force=True)
+
 
 def check_and_create_db():
-    """Checks if the database exists; if not, creates it.
+    """Checks if the database exists; if not, creates it from the models and stores the latest
+    migration version. Otherwise applies the pending migrations and installs the summary
+    tables declared since, which costs a `PRAGMA user_version` query and a `schema_keys`
+    lookup when the database is up to date.
     """
-    db_file_path = BASE_DIR / 'db.db'
-    
+    db_file_path = Path(engine.url.database) if engine.url.database else BASE_DIR / 'db.db'
+
     if not db_file_path.exists():
         try:
-            Base.metadata.create_all(bind=engine)
+            create_tables(engine)
+            stamp(engine)
         except Exception as e:
-            print(f"Error occurred while creating the database: {e}")    
\ No newline at end of file
+            print(f"Error occurred while creating the database: {e}")
+    else:
+        applied = []
+        try:
+            applied = migrate(engine)
+            if applied:
+                # Le schéma a changé : on complète les index dérivés des modèles
+                ensure_indexes(engine)
+        except Exception as e:
+            logger.error(f"Error occurred while migrating the database: {e}")
+        try:
+            # Résumés déclarés depuis le dernier lancement ; tous revérifiés après une migration
+            ensure_summaries(engine, Base.metadata, force=bool(applied))
+        except Exception as e:
+            logger.error(f"Error occurred while installing the summary tables: {e}")
+
+    if AUDIT_DATABASE:
+        # Le schéma de la base d'audit attachée doit exister avant la première lecture
+        connect_audit_database().close()
@@ -1,27 +1,115 @@
+import json
+import os
 from pathlib import Path
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from database.instrumentation import install_sql_instrumentation
+
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATABASE_URL = f"sqlite:///{BASE_DIR}/db.db"
+DATABASE_URL = os.environ.get("APP_DATABASE_URL", f"sqlite:///{BASE_DIR}/db.db")
+
+# Mesure des requêtes SQL (latence, appelant, journal des requêtes lentes), désactivable avec APP_SQL_INSTRUMENTATION=0
+SQL_INSTRUMENTATION = os.environ.get("APP_SQL_INSTRUMENTATION", "1") != "0"
+
+# Base séparée du journal d'audit, attachée sous le nom "audit" et écrite en différé (voir database.audit)
+AUDIT_DATABASE = os.environ.get("APP_AUDIT_DATABASE") or None
+
+# Temps (en millisecondes) pendant lequel SQLite attend un verrou avant de lever `database is locked`
+BUSY_TIMEOUT_MS = 5000
+
+
+def compact_json(value):
+    """Serialize a JSON column value without whitespace; dates and decimals are stored as strings."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def search_text(value):
+    """
+    Return the text the table searches look in: the value as displayed by `str()`, lowercased.
+    """
+    return str(value).lower()
+
+
+@lru_cache(maxsize=None)
+def result_processor(dialect, table_name, column_name):
+    return Base.metadata.tables[table_name].columns[column_name].type.result_processor(dialect, None)
+
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def stored_search_text(dialect, table_name, column_name, value):
+    """
+    Return `search_text` of a stored value, once converted like SQLAlchemy loads it
+    (dates, booleans...), so SQL searches match exactly the rows the screen search keeps.
+    """
+    processor = result_processor(dialect, table_name, column_name)
+    return search_text(processor(value) if processor is not None else value)
+
+
+def create_app_engine(url=DATABASE_URL):
+    """
+    Create an engine with the connection profile used by the application.
+
+    Every SQLite connection is switched to WAL journaling, so readers never block
+    the writer, and waits on locks instead of failing immediately. Statements are
+    recorded in the metrics registry unless `APP_SQL_INSTRUMENTATION=0`.
+
+    Args:
+        url (str, optional): The database URL. Defaults to `DATABASE_URL`.
+
+    Returns:
+        Engine: The configured SQLAlchemy engine.
+    """
+    # uri=True : les archives sont attachées en lecture seule avec une URI "file:...?mode=ro"
+    app_engine = create_engine(url, connect_args={"check_same_thread": False, "uri": True}, json_serializer=compact_json)
+
+    @event.listens_for(app_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Sans effet sur une base existante (il faut un VACUUM) : les nouvelles bases rendent
+        # leurs pages libres par `PRAGMA incremental_vacuum` (voir database.maintenance).
+        # Doit précéder journal_mode=WAL, qui écrit l'en-tête d'une nouvelle base
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        if AUDIT_DATABASE:
+            cursor.execute("ATTACH DATABASE ? AS audit", (AUDIT_DATABASE,))
+        cursor.close()
+        # search_text(table, colonne, valeur) en SQL : voir BaseController.search_filter
+        dbapi_connection.create_function(
+            "search_text", 3, lambda table, column, value: stored_search_text(app_engine.dialect, table, column, value),
+            deterministic=True,
+        )
+
+    if SQL_INSTRUMENTATION:
+        install_sql_instrumentation(app_engine)
+
+    return app_engine
+
+
+engine = create_app_engine()
 SessionLocal  = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 session = SessionLocal()
 Base = declarative_base()
 
 
-# @contextmanager
-# def get_session():
-#     """
-#     Gestionnaire de contexte qui fournit une session SQLAlchemy et s'assure de bien la fermer
-#     après usage.
-#     """
-#     session = SessionLocal()
-#     try:
-#         yield session
-#         session.commit()  
-#     except:
-#         session.rollback()  
-#         raise
\ No newline at end of file
+@contextmanager
+def get_session(**kwargs):
+    """
+    Gestionnaire de contexte qui fournit une session SQLAlchemy et s'assure de bien la fermer
+    après usage.
+
+    Args:
+        **kwargs: Options passed to `SessionLocal` (e.g. `expire_on_commit=False`).
+    """
+    new_session = SessionLocal(**kwargs)
+    try:
+        yield new_session
+        new_session.commit()
+    except:
+        new_session.rollback()
+        raise
+    finally:
+        new_session.close()
@@ -0,0 +1,232 @@
+"""
+Synthetic data generator for load testing.
+
+Fills the table of any registered model with realistic rows, generated from the column
+definitions: SQLAlchemy types, `Enum` values, foreign keys (only existing ids are referenced)
+and the `column_type` info hint. Rows are bulk inserted with executemany,
+one transaction per batch, through the same engine profile as the application.
+Qt is never imported.
+
+Usage:
+    python -m database.generate_data users --rows 1000
+    python -m database.generate_data models.audit_model:AuditLog --rows 1000000 --seed 42 --anchor 2024-12-31 --batch-size 20000
+"""
+import argparse
+import importlib
+import logging
+import pkgutil
+import random
+import string
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, Numeric, String, Text, func, insert, select
+
+import models
+from database.create_db import create_tables
+from database.database import DATABASE_URL, Base, create_app_engine
+
+logger = logging.getLogger(__name__)
+
+WORDS = [
+    "achat", "vente", "caisse", "recette", "dépense", "client", "fournisseur", "facture", "loyer",
+    "transport", "salaire", "électricité", "eau", "marchandise", "remboursement", "avance", "stock",
+    "service", "commission", "taxe", "banque", "versement", "retrait", "divers",
+]
+
+
+def load_models():
+    """Import every module of the `models` package so all models are registered."""
+    for module in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f"models.{module.name}")
+
+
+def resolve_table(name):
+    """
+    Find a table from a table name (e.g. "users") or a model path (e.g. "models.user:User").
+
+    Returns:
+        Table: The SQLAlchemy table.
+    """
+    if ":" in name:
+        module_name, class_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), class_name).__table__
+
+    load_models()
+    if name not in Base.metadata.tables:
+        raise ValueError(f"Unknown table '{name}'. Known tables: {', '.join(sorted(Base.metadata.tables))}")
+    return Base.metadata.tables[name]
+
+
+class DataGenerator:
+    """
+    Generates and inserts rows for a table.
+
+    Args:
+        engine (Engine): The target engine.
+        seed (int, optional): Random seed; the same seed and `anchor` produce the same rows. Defaults to None.
+        batch_size (int, optional): Rows per executemany / transaction. Defaults to 10 000.
+        days (int, optional): Date and datetime values are spread over this many days before `anchor`. Defaults to 730.
+        parent_rows (int, optional): Rows generated in a referenced table found empty. Defaults to 100.
+        anchor (date or datetime, optional): The most recent generated date, a date meaning its
+            midnight. Defaults to now, so the dates move from one run to the next.
+    """
+
+    def __init__(self, engine, seed=None, batch_size=10_000, days=730, parent_rows=100, anchor=None):
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.parent_rows = parent_rows
+        if anchor is None:
+            anchor = datetime.now()
+        elif not isinstance(anchor, datetime):
+            anchor = datetime.combine(anchor, datetime.min.time())
+        self.now = anchor
+
+    def generate(self, table, rows, progress=None):
+        """
+        Insert `rows` generated rows in `table`.
+
+        Args:
+            table (Table): The target table.
+            rows (int): Number of rows.
+            progress (callable, optional): Called with (table name, inserted rows, total rows) after each batch.
+
+        Returns:
+            int: Number of inserted rows.
+        """
+        foreign_ids = self.load_foreign_ids(table)
+        columns = [column for column in table.columns if not self.is_generated_by_database(column)]
+        offset = self.count_rows(table)
+
+        inserted = 0
+        while inserted < rows:
+            batch = [
+                {column.name: self.column_value(column, offset + index, foreign_ids) for column in columns}
+                for index in range(inserted, min(inserted + self.batch_size, rows))
+            ]
+            with self.engine.begin() as connection:
+                connection.execute(insert(table), batch)
+            inserted += len(batch)
+            if progress:
+                progress(table.name, inserted, rows)
+        return inserted
+
+    def load_foreign_ids(self, table):
+        """
+        Load the ids usable by each foreign key column, generating parent rows when the
+        referenced table is empty.
+
+        Returns:
+            dict: Column name -> list of referenced values.
+        """
+        foreign_ids = {}
+        for column in table.columns:
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                if target.table is table:
+                    continue
+                if self.count_rows(target.table) == 0:
+                    logger.info(f"Table {target.table.name} is empty, generating {self.parent_rows} rows")
+                    self.generate(target.table, self.parent_rows)
+                with self.engine.connect() as connection:
+                    foreign_ids[column.name] = connection.execute(select(target)).scalars().all()
+        return foreign_ids
+
+    def count_rows(self, table):
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(table)).scalar()
+
+    @staticmethod
+    def is_generated_by_database(column):
+        return column.primary_key and isinstance(column.type, Integer) and not column.foreign_keys
+
+    def column_value(self, column, index, foreign_ids):
+        """
+        Generate one value for a column.
+
+        Args:
+            column (Column): The column.
+            index (int): The row number in the table, used for unique values.
+            foreign_ids (dict): Values returned by `load_foreign_ids`.
+        """
+        rng = self.rng
+        if column.foreign_keys:
+            # Self-referencing keys are left empty
+            return rng.choice(foreign_ids[column.name]) if foreign_ids.get(column.name) else None
+        if column.nullable and not column.unique and rng.random() < 0.1:
+            return None
+
+        column_type = column.type
+        input_type = column.info.get("column_type", "text")
+
+        if isinstance(column_type, Enum) or input_type == "enum":
+            return rng.choice(column_type.enums) if isinstance(column_type, Enum) else rng.choice(WORDS)
+        if isinstance(column_type, Boolean):
+            return rng.random() < 0.5
+        if isinstance(column_type, DateTime):
+            if column.name == "updated_at":
+                return self.now
+            return self.now - timedelta(days=rng.randrange(self.days), seconds=rng.randrange(86400))
+        if isinstance(column_type, Date):
+            return self.now.date() - timedelta(days=rng.randrange(self.days))
+        if isinstance(column_type, (Float, Numeric)):
+            return round(rng.uniform(100, 500_000), 2)
+        if isinstance(column_type, Integer):
+            return index + 1 if column.unique else rng.randint(0, 1000)
+        if isinstance(column_type, (String, Text)):
+            return self.string_value(column, index, input_type)
+        return None
+
+    def string_value(self, column, index, input_type):
+        rng = self.rng
+        if input_type == "email":
+            value = f"{rng.choice(WORDS)}.{index}@example.com"
+        elif input_type == "numeric":
+            value = "".join(rng.choice(string.digits) for _ in range(8))
+        else:
+            value = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).capitalize()
+
+        if column.unique:
+            value = f"{value} {index}"
+        length = getattr(column.type, "length", None)
+        return value[:length] if length else value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk insert synthetic rows into a model table.")
+    parser.add_argument("model", help='Table name (e.g. "users") or model path (e.g. "models.user:User").')
+    parser.add_argument("--rows", type=int, default=1000, help="Number of rows to insert (default: 1000).")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed, for reproducible data.")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per transaction (default: 10000).")
+    parser.add_argument("--days", type=int, default=730, help="Dates are spread over this many past days (default: 730).")
+    parser.add_argument("--anchor", type=date.fromisoformat, default=None,
+                        help="Most recent generated date, YYYY-MM-DD (default: today); with --seed, reproducible data.")
+    parser.add_argument("--parent-rows", type=int, default=100, help="Rows generated in empty referenced tables (default: 100).")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (default: the application database).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    table = resolve_table(args.model)
+    engine = create_app_engine(args.url)
+    create_tables(engine)
+
+    generator = DataGenerator(
+        engine, seed=args.seed, batch_size=args.batch_size, days=args.days, parent_rows=args.parent_rows, anchor=args.anchor,
+    )
+    start = time.perf_counter()
+
+    def progress(table_name, inserted, total):
+        elapsed = time.perf_counter() - start
+        print(f"\r{table_name}: {inserted}/{total} rows ({inserted / elapsed:,.0f} rows/s)", end="", flush=True)
+
+    generator.generate(table, args.rows, progress=progress)
+    print()
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
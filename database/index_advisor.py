@@ -0,0 +1,220 @@
+"""
+Index advisor: reads the slow-query log written by `database.instrumentation` and proposes
+composite indexes for the statements whose query plan scans a table or sorts in a temporary
+B-tree, as a SQL migration.
+
+Usage:
+    python -m database.index_advisor [--log logs/slow_queries.log] [--min-count 1] [--output proposal.sql | --write]
+
+With `--write`, the proposal is saved as the next migration of the `migrations` directory,
+applied at the next startup by `database.migrate`.
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import inspect
+
+from database.create_db import index_name
+from database.database import DATABASE_URL, create_app_engine
+from database.instrumentation import SLOW_QUERY_LOG
+from database.migrate import MIGRATIONS_DIR, latest_version
+
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+TEMP_SORT_RE = re.compile(r"USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY")
+ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS\s+(\w+))?", re.IGNORECASE)
+WHERE_RE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+ORDER_BY_RE = re.compile(r"\bORDER BY\b(.*?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+
+
+def read_slow_queries(path=SLOW_QUERY_LOG):
+    """
+    Read the slow-query log and its rotated files (`.1`, `.2`...).
+
+    Returns:
+        list of dict: The logged statements.
+    """
+    path = Path(path)
+    files = sorted(path.parent.glob(f"{path.name}.*"), reverse=True) + [path]
+    entries = []
+    for file in files:
+        if not file.exists():
+            continue
+        with file.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries
+
+
+def table_aliases(statement):
+    """
+    Map every table name and alias of a statement to its table name.
+    """
+    aliases = {}
+    for table, alias in ALIAS_RE.findall(statement):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def columns_of(clause, alias, operators):
+    """
+    Return, in order of appearance, the columns of `alias` compared with one of `operators` in `clause`.
+    """
+    pattern = re.compile(rf"\b{re.escape(alias)}\.(\w+)\s*(?:{operators})", re.IGNORECASE)
+    columns = []
+    for column in pattern.findall(clause):
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def suggest_indexes(entry):
+    """
+    Derive the index columns that would avoid the scans and sorts of one slow statement.
+
+    Equality columns come first, then the ORDER BY columns when the plan sorts in a temporary
+    B-tree, otherwise the first range column. `LIKE` comparisons are ignored: a pattern
+    starting with a wildcard cannot use an index.
+
+    Args:
+        entry (dict): A slow-query log entry, with its `statement` and `plan`.
+
+    Returns:
+        list of tuple: (table name, column names) pairs.
+    """
+    statement = entry.get("statement", "")
+    plan = entry.get("plan") or []
+    aliases = table_aliases(statement)
+
+    scanned = [match.group(1) for match in map(SCAN_RE.match, plan) if match]
+    sorts = any(TEMP_SORT_RE.search(line) for line in plan)
+    if sorts and aliases:
+        # Le tri temporaire porte sur la table principale de la requête
+        first_alias = next(iter(aliases))
+        if first_alias not in scanned:
+            scanned.append(first_alias)
+
+    where_match = WHERE_RE.search(statement)
+    where = where_match.group(1) if where_match else ""
+    order_match = ORDER_BY_RE.search(statement)
+    order_by = order_match.group(1) if order_match else ""
+
+    suggestions = []
+    for alias in scanned:
+        table = aliases.get(alias, alias)
+        equality = columns_of(where, alias, r"=|\bIS\b|\bIN\b")
+        ranges = [column for column in columns_of(where, alias, r"<|>|\bBETWEEN\b") if column not in equality]
+        ordering = [column for column in re.findall(rf"\b{re.escape(alias)}\.(\w+)", order_by) if column not in equality]
+
+        columns = equality + (ordering if sorts and ordering else ranges[:1])
+        if columns:
+            suggestions.append((table, tuple(dict.fromkeys(columns))))
+    return suggestions
+
+
+def existing_indexes(engine):
+    """
+    Return, per table, the column lists of the indexes and primary key of the database.
+    """
+    inspector = inspect(engine)
+    indexes = {}
+    for table in inspector.get_table_names():
+        columns = [index["column_names"] for index in inspector.get_indexes(table)]
+        columns.append(inspector.get_pk_constraint(table).get("constrained_columns", []))
+        indexes[table] = [list(column_names) for column_names in columns if column_names]
+    return indexes
+
+
+def advise(entries, indexes=None, min_count=1):
+    """
+    Aggregate the suggested indexes of the slow statements.
+
+    Args:
+        entries (list of dict): The slow-query log entries.
+        indexes (dict, optional): The existing indexes (see `existing_indexes`); covered suggestions are dropped.
+        min_count (int, optional): Minimum number of slow statements for an index to be proposed. Defaults to 1.
+
+    Returns:
+        list of dict: The proposed indexes, by decreasing total time of the statements they would speed up.
+    """
+    indexes = indexes or {}
+    proposals = {}
+    for entry in entries:
+        for table, columns in suggest_indexes(entry):
+            if any(existing[:len(columns)] == list(columns) for existing in indexes.get(table, [])):
+                continue
+            proposal = proposals.setdefault((table, columns), {
+                "table": table, "columns": columns, "name": index_name(table, columns),
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "callers": set(), "example": entry.get("statement"),
+            })
+            duration = entry.get("duration_ms", 0.0)
+            proposal["count"] += 1
+            proposal["total_ms"] += duration
+            proposal["max_ms"] = max(proposal["max_ms"], duration)
+            if entry.get("caller"):
+                proposal["callers"].add(entry["caller"])
+
+    selected = [proposal for proposal in proposals.values() if proposal["count"] >= min_count]
+    return sorted(selected, key=lambda proposal: proposal["total_ms"], reverse=True)
+
+
+def migration_sql(proposals):
+    """
+    Render the proposed indexes as a SQL migration script.
+    """
+    lines = [f"-- Index proposés par database.index_advisor le {datetime.now():%Y-%m-%d %H:%M}"]
+    for proposal in proposals:
+        callers = ", ".join(sorted(proposal["callers"])) or "appelant inconnu"
+        lines.append("")
+        lines.append(f"-- {proposal['count']} requête(s) lente(s), {proposal['total_ms']:.0f} ms au total, max {proposal['max_ms']:.0f} ms ({callers})")
+        lines.append(f"-- ex. : {' '.join(proposal['example'].split())[:200]}")
+        lines.append(f"CREATE INDEX IF NOT EXISTS {proposal['name']} ON {proposal['table']} ({', '.join(proposal['columns'])});")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Propose indexes from the slow-query log.")
+    parser.add_argument("--log", default=SLOW_QUERY_LOG, help="Slow-query log (default: logs/slow_queries.log).")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database checked for existing indexes (default: the application database).")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum number of slow statements per proposed index (default: 1).")
+    parser.add_argument("--output", default=None, help="Write the migration to this file instead of the standard output.")
+    parser.add_argument("--write", action="store_true", help="Save the proposal as the next migration of the migrations directory.")
+    args = parser.parse_args(argv)
+
+    entries = read_slow_queries(args.log)
+    if not entries:
+        print(f"No slow statements in {args.log}.")
+        return 0
+
+    engine = create_app_engine(args.url)
+    try:
+        proposals = advise(entries, existing_indexes(engine), args.min_count)
+    finally:
+        engine.dispose()
+
+    if not proposals:
+        print(f"{len(entries)} slow statements analysed, no index to propose.")
+        return 0
+
+    sql = migration_sql(proposals)
+    if args.write:
+        MIGRATIONS_DIR.mkdir(exist_ok=True)
+        args.output = MIGRATIONS_DIR / f"{latest_version() + 1:04d}_advisor_indexes.sql"
+    if args.output:
+        Path(args.output).write_text(sql, encoding="utf-8")
+        print(f"{len(proposals)} index(es) proposed in {args.output}.")
+    else:
+        print(sql, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from sqlalchemy import event
+
+from utils.metrics import registry
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONTROLLERS_DIR = str(BASE_DIR / "controllers")
+SLOW_QUERY_LOG = Path(os.environ.get("APP_SLOW_QUERY_LOG", BASE_DIR / "logs" / "slow_queries.log"))
+# Durée (en millisecondes) au-delà de laquelle une requête est journalisée comme lente
+SLOW_QUERY_MS = float(os.environ.get("APP_SLOW_QUERY_MS", 100))
+
+slow_query_logger = logging.getLogger("sql.slow")
+
+
+def setup_slow_query_log(path=SLOW_QUERY_LOG, max_bytes=1_000_000, backup_count=5):
+    """
+    Send the slow statements to a rotating log file, one JSON object per line.
+
+    Args:
+        path (Path, optional): The log file. Defaults to `logs/slow_queries.log`.
+        max_bytes (int, optional): Size at which the file is rotated. Defaults to 1 MB.
+        backup_count (int, optional): Number of rotated files kept. Defaults to 5.
+    """
+    if slow_query_logger.handlers:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+    slow_query_logger.propagate = False
+
+
+def find_caller():
+    """
+    Return the controller method on the current stack, e.g. "UserController.authenticate_user".
+
+    Returns:
+        str: The qualified name of the innermost frame of the `controllers` package, or None.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(CONTROLLERS_DIR):
+            # Operations queued to the writer are closures: report the method that created them
+            qualname = getattr(code, "co_qualname", code.co_name).split(".<locals>")[0]
+            instance = frame.f_locals.get("self")
+            if instance is not None and "." in qualname:
+                # Name the concrete controller rather than the class defining the method
+                qualname = f"{type(instance).__name__}.{qualname.split('.', 1)[1]}"
+            return qualname
+        frame = frame.f_back
+    return None
+
+
+def explain_query_plan(dbapi_connection, statement, parameters):
+    """
+    Run `EXPLAIN QUERY PLAN` for a statement.
+
+    Returns:
+        list of str: The plan details, or an empty list when the plan cannot be computed.
+    """
+    if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+        return []
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        return []
+
+
+def install_sql_instrumentation(engine, slow_query_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG):
+    """
+    Record the latency, row count and calling controller method of every statement run by
+    `engine` into the metrics registry. Statements slower than `slow_query_ms` are written to
+    the slow-query log with their query plan.
+
+    Args:
+        engine (Engine): The instrumented engine.
+        slow_query_ms (float, optional): Slow statement threshold in milliseconds. Defaults to `APP_SLOW_QUERY_MS` or 100.
+        log_path (Path, optional): The slow-query log file. Defaults to `logs/slow_queries.log`.
+    """
+    slow_query_seconds = slow_query_ms / 1000
+    log_ready = False
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append((time.perf_counter(), find_caller()))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal log_ready
+        start, caller = conn.info["query_start_time"].pop()
+        duration = time.perf_counter() - start
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+        registry.record_statement(statement, caller, duration, rows)
+
+        if duration < slow_query_seconds:
+            return
+
+        if not log_ready:
+            setup_slow_query_log(log_path)
+            log_ready = True
+        plan = [] if executemany else explain_query_plan(cursor.connection, statement, parameters)
+        slow_query_logger.info(json.dumps({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "parameters": None if executemany else parameters,
+            "caller": caller,
+            "rows": rows,
+            "plan": plan,
+        }, default=str))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+
+    return engine
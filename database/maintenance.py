@@ -0,0 +1,235 @@
+"""
+Database maintenance tasks.
+
+`MaintenanceRunner.run` executes the due tasks on its own connection within a time budget:
+
+- `wal_checkpoint`: `PRAGMA wal_checkpoint(TRUNCATE)`, so the WAL file does not keep growing;
+- `optimize`: `PRAGMA optimize`, refreshing the statistics the query planner relies on when needed;
+- `incremental_vacuum`: gives the free pages back to the file system (databases in
+  `auto_vacuum=INCREMENTAL` mode, the default of new databases);
+- `analyze`: a full (but bounded by `analysis_limit`) `ANALYZE`;
+- `audit_retention`: compacts the old audit entries (see `database.audit.compact_audit_log`).
+
+A statement still running when the budget is spent, or when `cancel()` is called (e.g. the
+user is back), is interrupted; the task is retried at the next run, as is a task which ran out
+of budget before finishing (`TaskIncomplete`). The last run of each task
+is stored in `MAINTENANCE_STATE_FILE` so the intervals survive restarts.
+
+The runner is driven by `utils.idle_maintenance`, which runs it while the user is idle.
+
+Usage:
+    python -m database.maintenance [--budget 5] [--force]
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from database.audit import AUDIT_RETENTION_MONTHS, compact_audit_log
+from database.backup import database_path
+from database.database import AUDIT_DATABASE, BASE_DIR
+from utils.metrics import registry
+
+MAINTENANCE_STATE_FILE = Path(os.environ.get("APP_MAINTENANCE_STATE", BASE_DIR / "cache" / "maintenance.json"))
+
+logger = logging.getLogger(__name__)
+
+
+class TaskIncomplete(Exception):
+    """Raised by a task which stopped at the deadline with work left: it stays due."""
+    pass
+
+
+class MaintenanceTask:
+    """
+    A maintenance task: a `MaintenanceRunner` method run every `interval` seconds.
+    """
+
+    def __init__(self, name, interval, description):
+        self.name = name
+        self.interval = interval
+        self.description = description
+
+
+# Par ordre de priorité : les tâches les moins chères et les plus utiles d'abord
+TASKS = [
+    MaintenanceTask("wal_checkpoint", 15 * 60, "PRAGMA wal_checkpoint(TRUNCATE)"),
+    MaintenanceTask("optimize", 60 * 60, "PRAGMA optimize"),
+    MaintenanceTask("incremental_vacuum", 6 * 60 * 60, "PRAGMA incremental_vacuum"),
+    MaintenanceTask("analyze", 7 * 24 * 60 * 60, "ANALYZE"),
+    MaintenanceTask("audit_retention", 24 * 60 * 60, "Compact the audit entries older than the retention"),
+]
+
+
+class MaintenanceRunner:
+    """
+    Runs the maintenance tasks of a database, see the module documentation.
+
+    Args:
+        database (Path, optional): The database file. Defaults to the application database.
+        tasks (list of MaintenanceTask, optional): Defaults to `TASKS`.
+        state_file (Path, optional): Where the last runs are stored. Defaults to `MAINTENANCE_STATE_FILE`.
+    """
+
+    def __init__(self, database=None, tasks=TASKS, state_file=MAINTENANCE_STATE_FILE):
+        self.database = database
+        self.tasks = tasks
+        self.state_file = Path(state_file)
+        self.status = {task.name: {"last_run": None, "duration_ms": None, "result": None, "detail": ""} for task in tasks}
+        self.last_runs = self.load_state()
+        self.running = False
+        self._cancelled = threading.Event()
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def load_state(self):
+        try:
+            with self.state_file.open("r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            with self.state_file.open("w") as f:
+                json.dump(self.last_runs, f)
+        except OSError as e:
+            logger.warning(f"Cannot save the maintenance state: {e}")
+
+    def due_tasks(self, now=None):
+        """
+        Return the tasks whose interval has elapsed since their last successful run.
+        """
+        now = now or time.time()
+        return [task for task in self.tasks if now - self.last_runs.get(task.name, 0) >= task.interval]
+
+    def cancel(self):
+        """
+        Stop the run: the running statement is interrupted and no other task is started.
+        """
+        self._cancelled.set()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.interrupt()
+
+    def run(self, budget=2.0, force=False):
+        """
+        Run the due tasks (every task with `force`) until `budget` seconds are spent.
+
+        Returns:
+            dict: Task name -> status of the tasks run.
+        """
+        self._cancelled.clear()
+        deadline = time.monotonic() + budget
+        results = {}
+        connection = sqlite3.connect(self.database or database_path(), isolation_level=None, check_same_thread=False)
+        # Attente courte des verrous : la maintenance cède la place aux écritures de l'application
+        connection.execute("PRAGMA busy_timeout=200")
+        with self._lock:
+            self._connection = connection
+        self.running = True
+        try:
+            for task in (self.tasks if force else self.due_tasks()):
+                remaining = deadline - time.monotonic()
+                if self._cancelled.is_set() or remaining < 0.05:
+                    break
+                results[task.name] = self.run_task(connection, task, remaining)
+        finally:
+            self.running = False
+            with self._lock:
+                self._connection = None
+            connection.close()
+            self.save_state()
+        return results
+
+    def run_task(self, connection, task, remaining):
+        # Le budget est tenu en interrompant la requête en cours
+        watchdog = threading.Timer(remaining, connection.interrupt)
+        watchdog.daemon = True
+        started = time.perf_counter()
+        watchdog.start()
+        try:
+            detail = getattr(self, f"task_{task.name}")(connection, started + remaining)
+            result = "ok"
+        except TaskIncomplete as e:
+            result, detail = "partial", str(e)
+        except sqlite3.OperationalError as e:
+            result, detail = ("interrupted", "") if "interrupt" in str(e) else ("error", str(e))
+        finally:
+            watchdog.cancel()
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if result == "ok":
+            self.last_runs[task.name] = time.time()
+        status = {"last_run": datetime.now().isoformat(timespec="seconds"), "duration_ms": duration_ms, "result": result, "detail": detail}
+        self.status[task.name] = status
+        registry.set_gauge(f"maintenance.{task.name}_ms", duration_ms)
+        log = logger.warning if result == "error" else logger.info
+        log(f"Maintenance {task.name}: {result} in {duration_ms} ms{f' ({detail})' if detail else ''}")
+        return status
+
+    # Tâches : chacune reçoit la connexion et l'échéance (time.perf_counter), et renvoie un détail
+
+    def task_wal_checkpoint(self, connection, deadline):
+        busy, log_pages, checkpointed = connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            raise sqlite3.OperationalError("checkpoint blocked by a reader or a writer")
+        return f"{checkpointed} pages"
+
+    def task_optimize(self, connection, deadline):
+        connection.execute("PRAGMA analysis_limit=400")
+        connection.execute("PRAGMA optimize").fetchall()
+        return ""
+
+    def task_incremental_vacuum(self, connection, deadline):
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return "skipped: auto_vacuum is not INCREMENTAL (needs PRAGMA auto_vacuum=INCREMENTAL then VACUUM)"
+        initial = free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        # Par lots, pour s'arrêter à l'échéance. executescript : `execute` ne fait qu'un pas
+        # de la commande, qui ne libère alors qu'une seule page
+        while free_pages and time.perf_counter() < deadline:
+            connection.executescript("PRAGMA incremental_vacuum(200)")
+            free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages:
+            raise TaskIncomplete(f"{initial - free_pages} pages freed, {free_pages} left")
+        return f"{initial} pages freed"
+
+    def task_analyze(self, connection, deadline):
+        connection.execute("PRAGMA analysis_limit=1000")
+        connection.execute("ANALYZE")
+        return ""
+
+    def task_audit_retention(self, connection, deadline):
+        if not AUDIT_RETENTION_MONTHS:
+            return "skipped: no retention (APP_AUDIT_RETENTION_MONTHS=0)"
+        if AUDIT_DATABASE and "audit" not in {row[1] for row in connection.execute("PRAGMA database_list")}:
+            connection.execute("ATTACH DATABASE ? AS audit", (AUDIT_DATABASE,))
+        counts = compact_audit_log(connection, deadline=deadline)
+        if not counts["done"]:
+            raise TaskIncomplete(f"{counts['rows']} entries compacted, more left")
+        return f"{counts['rows']} entries compacted"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the database maintenance tasks.")
+    parser.add_argument("--database", default=None, help="The database file (default: the application database).")
+    parser.add_argument("--budget", type=float, default=5.0, help="Time budget in seconds (default: 5).")
+    parser.add_argument("--force", action="store_true", help="Run every task, due or not.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = MaintenanceRunner(args.database).run(budget=args.budget, force=args.force)
+    if not results:
+        print("No task is due.")
+    return 0 if all(status["result"] == "ok" for status in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Startup migration runner.
+
+Migrations are SQL files of the `migrations` directory named `<version>_<description>.sql`
+(e.g. `0002_audit_indexes.sql`). The version of a database is stored in `PRAGMA user_version`,
+so an up-to-date database is detected with one cheap query; otherwise the pending migrations
+are applied, in order, in a single transaction.
+
+Usage:
+    python -m database.migrate [--url sqlite:///db.db] [--status]
+"""
+import argparse
+import logging
+import re
+import sqlite3
+import sys
+import time
+
+from database.database import BASE_DIR, DATABASE_URL, create_app_engine
+
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+MIGRATION_FILE_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    """Exception raised when a migration fails; the database is left at its previous version."""
+    pass
+
+
+def available_migrations(directory=MIGRATIONS_DIR):
+    """
+    List the migration files of a directory.
+
+    Returns:
+        list of tuple: (version, path) pairs, by increasing version.
+    """
+    if not directory.exists():
+        return []
+    migrations = []
+    for path in directory.iterdir():
+        match = MIGRATION_FILE_RE.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), path))
+    return sorted(migrations)
+
+
+def latest_version(directory=MIGRATIONS_DIR):
+    migrations = available_migrations(directory)
+    return migrations[-1][0] if migrations else 0
+
+
+def split_statements(sql):
+    """
+    Split a SQL script into complete statements (`executescript` would commit the running transaction).
+    """
+    statements = []
+    buffer = ""
+    for line in sql.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip().strip(";").strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip() and not all(line.strip().startswith("--") for line in buffer.strip().splitlines()):
+        statements.append(buffer.strip())
+    return statements
+
+
+def current_version(dbapi_connection):
+    return dbapi_connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(dbapi_connection, migrations):
+    """
+    Apply migrations in one transaction and store the new version.
+
+    Args:
+        dbapi_connection (sqlite3.Connection): The raw SQLite connection.
+        migrations (list of tuple): The pending (version, path) pairs.
+
+    Raises:
+        MigrationError: If a statement fails; the transaction is rolled back.
+    """
+    isolation_level = dbapi_connection.isolation_level
+    # Transaction gérée explicitement : le module sqlite3 n'ouvre pas de transaction avant un DDL
+    dbapi_connection.isolation_level = None
+    try:
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+        try:
+            for version, path in migrations:
+                for statement in split_statements(path.read_text(encoding="utf-8")):
+                    try:
+                        dbapi_connection.execute(statement)
+                    except sqlite3.Error as e:
+                        raise MigrationError(f"Migration {path.name} failed on `{statement}`: {e}") from e
+            dbapi_connection.execute(f"PRAGMA user_version = {migrations[-1][0]}")
+            dbapi_connection.execute("COMMIT")
+        except BaseException:
+            dbapi_connection.execute("ROLLBACK")
+            raise
+    finally:
+        dbapi_connection.isolation_level = isolation_level
+
+
+def migrate(engine, directory=MIGRATIONS_DIR):
+    """
+    Bring a database to the latest migration version.
+
+    Returns immediately when the stored version is current.
+
+    Args:
+        engine (Engine): The database engine.
+        directory (Path, optional): The migrations directory. Defaults to `migrations`.
+
+    Returns:
+        list of int: The versions applied (empty when the database was current).
+    """
+    migrations = available_migrations(directory)
+    if not migrations:
+        return []
+
+    raw_connection = engine.raw_connection()
+    try:
+        dbapi_connection = raw_connection.driver_connection
+        version = current_version(dbapi_connection)
+        pending = [(number, path) for number, path in migrations if number > version]
+        if not pending:
+            return []
+
+        start = time.perf_counter()
+        apply_migrations(dbapi_connection, pending)
+        logger.info(f"Database migrated from version {version} to {pending[-1][0]} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return [number for number, _ in pending]
+    finally:
+        raw_connection.close()
+
+
+def stamp(engine, version=None, directory=MIGRATIONS_DIR):
+    """
+    Store a version without applying migrations, e.g. for a database just created from the models.
+    """
+    version = latest_version(directory) if version is None else version
+    raw_connection = engine.raw_connection()
+    try:
+        raw_connection.driver_connection.execute(f"PRAGMA user_version = {int(version)}")
+        raw_connection.driver_connection.commit()
+    finally:
+        raw_connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the pending SQL migrations.")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (default: the application database).")
+    parser.add_argument("--status", action="store_true", help="Only print the current and latest versions.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = create_app_engine(args.url)
+    try:
+        if args.status:
+            raw_connection = engine.raw_connection()
+            try:
+                version = current_version(raw_connection.driver_connection)
+            finally:
+                raw_connection.close()
+            print(f"Database version {version}, latest migration {latest_version()}.")
+            return 0
+
+        applied = migrate(engine)
+        print(f"Applied migrations {applied}." if applied else "Database is up to date.")
+        return 0
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+"""
+Incrementally maintained summary tables.
+
+A model opts in by listing its summaries in the `info` of its table:
+
+    __table_args__ = {"info": {"summaries": [
+        {"bucket": "day", "date": "date", "sums": ["amount"]},
+        {"bucket": "month", "date": "date", "group_by": ["category_id"], "sums": ["amount"]},
+    ]}}
+
+Each summary is a table holding, per period ("day" or "month") and group, the sum of the
+`sums` columns and the row count. SQLite triggers on the fact table keep it up to date on
+every insert, update and delete, whatever the write path (controllers, importer, upsert or
+raw SQL). `BaseController.aggregate` reads a summary instead of scanning the fact table
+whenever one can answer the query.
+
+At startup, `ensure_summaries` installs the summaries declared since the last launch; the
+declared set is recorded in `schema_keys`, so an unchanged one costs a single lookup (and a
+summary removed with `uninstall` stays removed until the declarations change).
+
+Usage:
+    python -m database.summaries install benchmarks.models:BenchRecord
+    python -m database.summaries verify bench_records
+    python -m database.summaries rebuild bench_records
+"""
+import argparse
+import hashlib
+import logging
+import math
+import sys
+
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, Table, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from controllers.filters import Q, filter_columns, get_filter_compiler
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_BUCKETS = ("day", "month")
+# Périodes que l'on peut calculer à partir de chaque type de résumé
+BUCKET_ROLLUPS = {
+    "day": {"day": None, "week": "%Y-W%W", "month": "%Y-%m", "year": "%Y"},
+    "month": {"month": None, "year": "%Y"},
+}
+ROW_COUNT = "row_count"
+
+
+class Summary:
+    """
+    A summary table of a fact table, see the module documentation.
+
+    Args:
+        fact_table (Table): The summarized table.
+        bucket (str): "day" or "month".
+        date (str): The date column of the fact table.
+        group_by (list of str, optional): Grouping columns, which must be NOT NULL.
+        sums (list of str, optional): Summed columns.
+
+    Raises:
+        ValueError: If the declaration refers to an unknown or unsuitable column.
+    """
+
+    def __init__(self, fact_table, bucket, date, group_by=(), sums=()):
+        self.fact_table = fact_table
+        self.bucket = bucket
+        self.date_column = date
+        self.group_by = list(group_by)
+        self.sums = list(sums)
+
+        if bucket not in SUMMARY_BUCKETS:
+            raise ValueError(f"Unknown summary bucket '{bucket}', expected one of {', '.join(SUMMARY_BUCKETS)}.")
+        for name in [date, *self.group_by, *self.sums]:
+            if name not in fact_table.columns:
+                raise ValueError(f"Unknown column '{name}' in the summaries of '{fact_table.name}'.")
+        if not isinstance(fact_table.columns[date].type, (Date, DateTime)):
+            raise ValueError(f"Column '{date}' of '{fact_table.name}' is not a date column.")
+        for name in self.group_by:
+            # NULL n'est jamais égal à NULL : la clé du résumé ne serait pas unique
+            if fact_table.columns[name].nullable:
+                raise ValueError(f"Summary group column '{fact_table.name}.{name}' must be NOT NULL.")
+
+        self.name = "_".join([fact_table.name, bucket, *self.group_by, "summary"])
+        # Le résumé journalier d'une colonne Date garde son nom et son type, les filtres sur la date restent valables
+        self.filters_on_date = bucket == "day" and not isinstance(fact_table.columns[date].type, DateTime)
+        self.period_column = date if bucket == "day" else "month"
+        self.table = fact_table.metadata.tables.get(self.name)
+        if self.table is None:
+            self.table = Table(
+                self.name, fact_table.metadata,
+                Column(self.period_column, Date if bucket == "day" else String, primary_key=True),
+                *(Column(name, fact_table.columns[name].type, primary_key=True) for name in self.group_by),
+                *(Column(name, Float, nullable=False, default=0) for name in self.sums),
+                Column(ROW_COUNT, Integer, nullable=False, default=0),
+                info={"summary_of": fact_table.name},
+            )
+
+    def __repr__(self):
+        return f"<Summary {self.name}>"
+
+    # Maintenance
+
+    def period_sql(self, row):
+        """
+        Return the SQL expression of the period of `row` ("NEW", "OLD" or a table name).
+        """
+        column = f"{row}.{self.date_column}"
+        if self.bucket == "month":
+            return f"strftime('%Y-%m', {column})"
+        if isinstance(self.fact_table.columns[self.date_column].type, DateTime):
+            return f"date({column})"
+        return column
+
+    def trigger_names(self):
+        return [f"{self.name}_after_{event}" for event in ("insert", "update", "delete")]
+
+    def triggers_sql(self):
+        """
+        Return the CREATE TRIGGER statements keeping the summary up to date.
+        """
+        key_columns = [self.period_column, *self.group_by]
+        columns = ", ".join([*key_columns, *self.sums, ROW_COUNT])
+        watched = ", ".join(dict.fromkeys([self.date_column, *self.group_by, *self.sums]))
+
+        def add(row):
+            values = ", ".join([self.period_sql(row), *(f"{row}.{name}" for name in self.group_by),
+                                *(f"coalesce({row}.{name}, 0)" for name in self.sums), "1"])
+            updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in [*self.sums, ROW_COUNT])
+            return (f"INSERT INTO {self.name} ({columns}) VALUES ({values}) "
+                    f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates};")
+
+        def remove(row):
+            where = " AND ".join([f"{self.period_column} = {self.period_sql(row)}",
+                                  *(f"{name} = {row}.{name}" for name in self.group_by)])
+            updates = ", ".join([*(f"{name} = {name} - coalesce({row}.{name}, 0)" for name in self.sums),
+                                 f"{ROW_COUNT} = {ROW_COUNT} - 1"])
+            return (f"UPDATE {self.name} SET {updates} WHERE {where}; "
+                    f"DELETE FROM {self.name} WHERE {where} AND {ROW_COUNT} <= 0;")
+
+        insert_trigger, update_trigger, delete_trigger = self.trigger_names()
+        fact = self.fact_table.name
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {insert_trigger} AFTER INSERT ON {fact} BEGIN {add('NEW')} END",
+            f"CREATE TRIGGER IF NOT EXISTS {update_trigger} AFTER UPDATE OF {watched} ON {fact} "
+            f"BEGIN {remove('OLD')} {add('NEW')} END",
+            f"CREATE TRIGGER IF NOT EXISTS {delete_trigger} AFTER DELETE ON {fact} BEGIN {remove('OLD')} END",
+        ]
+
+    def is_installed(self, connection):
+        """
+        Tell whether the summary table and its triggers exist in the database.
+
+        Not cached: another process may uninstall the summary while the application runs.
+        """
+        names = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"),
+            {"table": self.fact_table.name},
+        ).scalars().all()
+        return set(self.trigger_names()) <= set(names)
+
+    def install(self, connection):
+        """
+        Create the summary table and its triggers, then fill it from the fact table.
+
+        Returns:
+            bool: False if the summary was already installed.
+        """
+        self.table.create(connection, checkfirst=True)
+        if self.is_installed(connection):
+            return False
+        for statement in self.triggers_sql():
+            connection.exec_driver_sql(statement)
+        self.rebuild(connection)
+        logger.info(f"Installed summary {self.name}.")
+        return True
+
+    def uninstall(self, connection):
+        """
+        Drop the triggers and the summary table.
+        """
+        for name in self.trigger_names():
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        self.table.drop(connection, checkfirst=True)
+
+    def fact_source(self, connection):
+        """
+        Return the FROM clause of the fact rows, including the archived fiscal years (see `database.archive`).
+        """
+        from database.archive import archived_periods, attach_archives
+
+        name = self.fact_table.name
+        periods = archived_periods(connection, self.fact_table)
+        if not periods:
+            return name
+        columns = ", ".join(dict.fromkeys([self.date_column, *self.group_by, *self.sums]))
+        parts = [f"SELECT {columns} FROM main.{name}"]
+        parts += [f"SELECT {columns} FROM {alias}.{name}" for alias in attach_archives(connection, periods)]
+        return f"({' UNION ALL '.join(parts)}) AS {name}"
+
+    def expected_statement(self, connection):
+        """
+        Return the SELECT computing the summary rows from the fact table.
+        """
+        keys = ", ".join([f"{self.period_sql(self.fact_table.name)} AS {self.period_column}", *self.group_by])
+        measures = ", ".join([*(f"coalesce(sum({name}), 0) AS {name}" for name in self.sums), f"count(*) AS {ROW_COUNT}"])
+        group = ", ".join(str(index) for index in range(1, len(self.group_by) + 2))
+        return f"SELECT {keys}, {measures} FROM {self.fact_source(connection)} GROUP BY {group}"
+
+    def rebuild(self, connection):
+        """
+        Recompute the whole summary from the fact table and its archives.
+        """
+        columns = ", ".join([self.period_column, *self.group_by, *self.sums, ROW_COUNT])
+        expected = self.expected_statement(connection)
+        connection.exec_driver_sql(f"DELETE FROM {self.name}")
+        connection.exec_driver_sql(f"INSERT INTO {self.name} ({columns}) {expected}")
+
+    def verify(self, connection):
+        """
+        Compare the summary with the fact table.
+
+        Returns:
+            list of tuple: (key, expected values, summary values) of each drifted row; a missing
+            row has None values. Sums are compared with a small tolerance for rounding errors.
+        """
+        key_size = len(self.group_by) + 1
+        columns = ", ".join([self.period_column, *self.group_by, *self.sums, ROW_COUNT])
+
+        def rows(statement):
+            return {tuple(row[:key_size]): tuple(row[key_size:]) for row in connection.exec_driver_sql(statement)}
+
+        expected = rows(self.expected_statement(connection))
+        actual = rows(f"SELECT {columns} FROM {self.name}")
+        drift = []
+        for key in sorted(expected.keys() | actual.keys(), key=repr):
+            expected_values, actual_values = expected.get(key), actual.get(key)
+            if expected_values is None or actual_values is None or not all(
+                math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6) for a, b in zip(expected_values, actual_values)
+            ):
+                drift.append((key, expected_values, actual_values))
+        return drift
+
+    # Lecture
+
+    def statement(self, group_by, measures, filters, time_bucket, excluded_periods=()):
+        """
+        Return the aggregate query (see `BaseController.aggregate`) answered from the summary,
+        or None if the summary cannot answer it.
+
+        Args:
+            excluded_periods (list, optional): Archived fiscal years (see `database.archive.archived_periods`)
+                whose totals are left out.
+        """
+        if not set(group_by) <= set(self.group_by):
+            return None
+
+        keys = [self.table.columns[name].label(name) for name in group_by]
+        if time_bucket:
+            column_name, unit = time_bucket
+            if column_name != self.date_column or unit not in BUCKET_ROLLUPS[self.bucket]:
+                return None
+            period = self.table.columns[self.period_column]
+            rollup = BUCKET_ROLLUPS[self.bucket][unit]
+            if rollup is None:
+                keys.append(period.label("period"))
+            elif self.bucket == "month":
+                keys.append(func.substr(period, 1, 4).label("period"))
+            else:
+                keys.append(func.strftime(rollup, period).label("period"))
+
+        row_count = func.sum(self.table.columns[ROW_COUNT])
+        columns = []
+        for label, (function, name) in measures.items():
+            not_null = name is None or not self.fact_table.columns[name].nullable
+            if function == "count" and not_null:
+                # Aucune ligne de résumé : sum() vaut NULL, count(*) du parcours vaut 0
+                columns.append(func.coalesce(row_count, 0).label(label))
+            elif function == "sum" and name in self.sums:
+                columns.append(func.sum(self.table.columns[name]).label(label))
+            elif function == "avg" and name in self.sums and not_null:
+                columns.append((func.sum(self.table.columns[name]) / row_count).label(label))
+            else:
+                return None
+
+        clauses = []
+        if filters:
+            if isinstance(filters, dict):
+                filters = Q(**filters)
+            if not isinstance(filters, Q):
+                return None
+            allowed = set(self.group_by) | ({self.date_column} if self.filters_on_date else set())
+            if not filter_columns(filters) <= allowed:
+                return None
+            clauses.append(get_filter_compiler(self.table).clause(filters))
+        period = self.table.columns[self.period_column]
+        for archived in excluded_periods:
+            if self.bucket == "day":
+                clauses.append(~period.between(archived.start_date, archived.end_date))
+            else:
+                # Les exercices commencent un premier du mois : ils couvrent des mois entiers
+                clauses.append(~period.between(archived.start_date.strftime("%Y-%m"), archived.end_date.strftime("%Y-%m")))
+
+        statement = select(*keys, *columns).select_from(self.table).where(*clauses)
+        if keys:
+            statement = statement.group_by(*keys).order_by(*keys)
+        return statement
+
+
+_summaries = {}
+
+
+def summaries_for(fact_table):
+    """
+    Return the summaries declared in the `info` of a table (created on first use), coarsest first.
+    """
+    summaries = _summaries.get(fact_table)
+    if summaries is None:
+        declarations = fact_table.info.get("summaries", [])
+        summaries = [Summary(fact_table, **declaration) for declaration in declarations]
+        summaries.sort(key=lambda summary: (-SUMMARY_BUCKETS.index(summary.bucket), len(summary.group_by)))
+        _summaries[fact_table] = summaries
+    return summaries
+
+
+def derive_summaries(metadata):
+    """
+    Add to `metadata` the summary tables declared by its tables.
+
+    Returns:
+        list of Summary: Every declared summary.
+    """
+    return [summary for table in list(metadata.sorted_tables) for summary in summaries_for(table)]
+
+
+SUMMARIES_KEY = "summaries"
+
+
+def summaries_key(summaries):
+    """Return a fingerprint of the declared summaries, stored once they are all installed."""
+    declared = sorted(f"{summary.name}:{summary.date_column}:{','.join(summary.sums)}" for summary in summaries)
+    return hashlib.sha1("|".join(declared).encode("utf-8")).hexdigest()
+
+
+def ensure_summaries(bind, metadata, force=False):
+    """
+    Install the declared summaries missing from the database, unless `schema_keys` records
+    that the same summaries were already installed.
+
+    Args:
+        bind (Engine): The database.
+        metadata (MetaData): The metadata declaring the summaries.
+        force (bool, optional): Check every summary whatever the stored key, e.g. after a migration. Defaults to False.
+
+    Returns:
+        list of Summary: The summaries installed by this call.
+    """
+    from models.schema_key_model import SchemaKey
+
+    summaries = derive_summaries(metadata)
+    key = summaries_key(summaries)
+    keys = SchemaKey.__table__
+    with bind.begin() as connection:
+        if not force and connection.execute(select(keys.c.value).where(keys.c.name == SUMMARIES_KEY)).scalar() == key:
+            return []
+        existing_tables = set(inspect(connection).get_table_names())
+        installed = [
+            summary for summary in summaries
+            if summary.fact_table.name in existing_tables and summary.install(connection)
+        ]
+        # Table de faits pas encore créée : on revérifiera au prochain lancement
+        if all(summary.fact_table.name in existing_tables for summary in summaries):
+            connection.execute(
+                sqlite_insert(keys).values(name=SUMMARIES_KEY, value=key)
+                .on_conflict_do_update(index_elements=[keys.c.name], set_={"value": key})
+            )
+    return installed
+
+
+def summary_statement(connection, fact_table, group_by, measures, filters, time_bucket):
+    """
+    Return the aggregate query answered from the coarsest installed summary able to,
+    or None to scan the fact table.
+
+    The summaries keep the totals of the archived fiscal years; those the scan would not read
+    (see `database.archive.periods_read`) are left out, so both give the same result.
+    """
+    summaries = summaries_for(fact_table)
+    if not summaries:
+        return None
+    from database.archive import archived_periods, periods_read
+
+    archived = archived_periods(connection, fact_table)
+    read = {period.year for period in periods_read(connection, fact_table, filters)} if archived else set()
+    excluded = [period for period in archived if period.year not in read]
+    for summary in summaries:
+        statement = summary.statement(group_by, measures, filters, time_bucket, excluded)
+        if statement is not None and summary.is_installed(connection):
+            return statement
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Install, rebuild or verify the summary tables of a model.")
+    parser.add_argument("command", choices=("install", "rebuild", "verify", "uninstall"))
+    parser.add_argument("model", help='Table name (e.g. "users") or model path (e.g. "models.user:User").')
+    parser.add_argument("--url", default=None, help="Database URL (default: the application database).")
+    args = parser.parse_args(argv)
+
+    from database.database import DATABASE_URL, create_app_engine
+    from database.generate_data import resolve_table
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    table = resolve_table(args.model)
+    summaries = summaries_for(table)
+    if not summaries:
+        print(f"Table '{table.name}' declares no summary.")
+        return 1
+
+    engine = create_app_engine(args.url or DATABASE_URL)
+    status = 0
+    try:
+        with engine.begin() as connection:
+            for summary in summaries:
+                if args.command == "install":
+                    done = summary.install(connection)
+                    print(f"{summary.name}: {'installed' if done else 'already installed'}.")
+                elif args.command == "uninstall":
+                    summary.uninstall(connection)
+                    print(f"{summary.name}: removed.")
+                elif not summary.is_installed(connection):
+                    print(f"{summary.name}: not installed.")
+                    status = 1
+                elif args.command == "rebuild":
+                    summary.rebuild(connection)
+                    print(f"{summary.name}: rebuilt.")
+                else:
+                    drift = summary.verify(connection)
+                    print(f"{summary.name}: {len(drift)} drifted rows.")
+                    for key, expected, actual in drift[:20]:
+                        print(f"  {key}: expected {expected}, found {actual}")
+                    status = status or (1 if drift else 0)
+        return status
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
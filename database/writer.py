@@ -0,0 +1,281 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from database.database import SessionLocal
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWriter:
+    """
+    Single writer thread that serializes every database mutation through a queue.
+
+    SQLite only allows one writer at a time. Instead of letting each caller open its own
+    transaction (and fail with `database is locked`), callers submit a write operation and
+    get a `Future` back. The writer thread groups the operations that arrive within
+    `batch_window` seconds into a single transaction (an explicit `BEGIN IMMEDIATE`), runs
+    each one inside its own savepoint and resolves the futures once the transaction is
+    committed: other connections see the whole batch or none of it.
+
+    Attributes:
+        batch_window (float): How long (in seconds) to wait for more operations before committing.
+        max_batch_size (int): Maximum number of operations committed in one transaction.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_window=0.005, max_batch_size=256):
+        """
+        Initialize the writer. The thread is started lazily by the first `submit`.
+
+        Args:
+            session_factory (callable, optional): Factory returning new SQLAlchemy sessions. Defaults to `SessionLocal`.
+            batch_window (float, optional): Grouping window in seconds. Defaults to 0.005.
+            max_batch_size (int, optional): Maximum operations per transaction. Defaults to 256.
+        """
+        self.session_factory = session_factory
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "writes": 0,
+            "failed_writes": 0,
+            "commits": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "largest_batch_size": 0,
+            "batch_sizes": {},
+        }
+
+    def submit(self, operation):
+        """
+        Queue a write operation.
+
+        Args:
+            operation (callable): Function receiving the writer session and returning the operation result.
+                It must not commit nor close the session.
+
+        Returns:
+            Future: Resolved with the operation result once its transaction is committed,
+            or with the exception raised by the operation (or by the commit).
+        """
+        if self.is_writer_thread():
+            # The operation would wait on its own queue forever
+            raise RuntimeError("Write operations cannot be submitted from the writer thread.")
+
+        future = Future()
+
+        self._ensure_started()
+        self._queue.put((operation, future))
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return future
+
+    def execute(self, operation):
+        """
+        Queue a write operation and wait for its result.
+
+        Args:
+            operation (callable): Function receiving the writer session.
+
+        Returns:
+            The value returned by `operation`.
+        """
+        return self.submit(operation).result()
+
+    def is_writer_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def queue_depth(self):
+        """Return the number of operations waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Return a snapshot of the writer metrics.
+
+        Returns:
+            dict: Queue depth and commit-batch-size metrics.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["batch_sizes"] = dict(self._stats["batch_sizes"])
+        stats["queue_depth"] = self.queue_depth()
+        stats["average_batch_size"] = (stats["writes"] + stats["failed_writes"]) / stats["commits"] if stats["commits"] else 0
+        return stats
+
+    def stop(self, timeout=5):
+        """
+        Flush the pending operations and stop the writer thread.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the thread. Defaults to 5 seconds.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="DatabaseWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Le thread doit survivre : sans lui, plus aucune écriture n'aboutit
+                logger.exception("Write batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        """
+        Run a group of operations in one transaction, one savepoint per operation.
+        A failing operation only rolls back its own savepoint; whatever else fails (the
+        savepoints, the commit, an unexpected error), every future of the batch is resolved.
+        """
+        results = []
+        started = []
+        session = None
+        callbacks = []
+        try:
+            session = self.session_factory(expire_on_commit=False)
+            callbacks = session.info.setdefault("after_commit", [])
+            # pysqlite (mode historique) n'envoie pas de BEGIN avant SAVEPOINT : chaque savepoint
+            # serait alors la transaction externe et son RELEASE validerait l'opération seule.
+            # IMMEDIATE : le verrou d'écriture est pris d'entrée, sans échec en cours de lot
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started.append(future)
+                savepoint = session.begin_nested()
+                registered = len(callbacks)
+                try:
+                    result = operation(session)
+                    session.flush()
+                    savepoint.commit()
+                    results.append((future, result, None))
+                except Exception as e:
+                    savepoint.rollback()
+                    # Les rappels de l'opération annulée ne doivent pas s'exécuter
+                    del callbacks[registered:]
+                    results.append((future, None, e))
+
+            session.commit()
+        except Exception as e:
+            logger.error(f"Failed to commit write batch: {e}")
+            if session is not None:
+                try:
+                    session.rollback()
+                except Exception:
+                    logger.exception("Failed to roll back write batch")
+            results = [(future, None, error or e) for future, _, error in results]
+            # Opérations démarrées mais interrompues par l'échec du lot
+            answered = {future for future, _, _ in results}
+            results.extend((future, None, e) for future in started if future not in answered)
+            callbacks.clear()
+        finally:
+            if session is not None:
+                try:
+                    session.close()
+                except Exception:
+                    logger.exception("Failed to close write session")
+
+        try:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("After-commit callback failed")
+
+            failed = sum(1 for _, _, error in results if error is not None)
+            with self._stats_lock:
+                self._stats["commits"] += 1
+                self._stats["writes"] += len(results) - failed
+                self._stats["failed_writes"] += failed
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["largest_batch_size"] = max(self._stats["largest_batch_size"], len(batch))
+                self._stats["batch_sizes"][len(batch)] = self._stats["batch_sizes"].get(len(batch), 0) + 1
+            registry.set_gauge("writer.queue_depth", self.queue_depth())
+            registry.set_gauge("writer.last_batch_size", len(batch))
+            logger.debug(f"Committed write batch of {len(batch)} operation(s), queue depth {self.queue_depth()}")
+        finally:
+            for future, result, error in results:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+def after_commit(db_session, callback):
+    """
+    Run `callback` once the transaction of a writer operation is committed. It is dropped
+    if the operation fails or the transaction is rolled back.
+
+    Args:
+        db_session (Session): The writer session given to the operation.
+        callback (callable): Function called without arguments, from the writer thread.
+    """
+    db_session.info.setdefault("after_commit", []).append(callback)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """
+    Return the application-wide `DatabaseWriter`, creating it on first use.
+
+    Returns:
+        DatabaseWriter: The shared writer.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DatabaseWriter()
+            atexit.register(_writer.stop)
+        return _writer
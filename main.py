@@ -1,22 +1,25 @@
 from pyside6_custom_widgets.dashboard import Dashboard
 
+from utils.startup_trace import trace
 from utils.utils import set_app_icon
 
-from qt_material import apply_stylesheet
+from utils.theme_cache import apply_cached_stylesheet
 
 class MainWindow(Dashboard):
     
     def __init__(self):
-        super().__init__(menus=self.setup_menu(),sidebar_buttons=self.setup_sidebar())
+        super().__init__(menus=self.setup_menu(),sidebar_buttons=self.setup_sidebar(), max_live_pages=5)
         self.setWindowTitle("Gestionnaire de caisse") 
-        apply_stylesheet(self, theme="default_light.xml")
+        with trace.span("theme", window="MainWindow"):
+            apply_cached_stylesheet(self, theme="default_light.xml")
         set_app_icon(self)
         self.setup_pages()
         
         
     def setup_menu(self):
         menus = [
-            ("File", [("Fermer", self.close), ("Actualiser", lambda: print("Actualisation..."))])
+            ("File", [("Fermer", self.close), ("Actualiser", lambda: print("Actualisation..."))]),
+            ("Outils", [("Panneau développeur", self.toggle_dev_panel)]),
         ]
         return menus
     
@@ -32,13 +35,21 @@ class MainWindow(Dashboard):
     def open_signin(self):
         """Affiche le formulaire de connexion et cache le Dashboard."""
         from authentication.sign_in import SignIn
+        from authentication.sessions import end_session
+        from utils.config import clear_current_user
+        end_session()
+        clear_current_user()
         self.signin_form = SignIn()   
         self.signin_form.show()
         self.close()
 
     def setup_pages(self):
-        # self.income_category_widget = IncomeCategoryList()
-        # self.add_content_page(self.income_category_widget, "Bienvenue sur la page des catégories des recettes")
+        # Pages are given as factories, so each ListView (and its get_all()) is built on first navigation
+        # self.add_content_page(IncomeCategoryList, "Bienvenue sur la page des catégories des recettes")
+        # Journal d'audit, paginé par clé : from views.audit_log import AuditLogView
+        # self.add_content_page(AuditLogView, "Journal d'audit")
+        # Les tuiles KPI sont calculées en SQL (BaseController.aggregate), en arrière-plan
+        # self.add_kpi_tile("Recettes du jour", IncomeController(), ("sum", "amount"), filters=lambda: {"date": date.today()})
         pass
         
     
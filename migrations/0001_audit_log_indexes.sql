@@ -0,0 +1,3 @@
+-- Index de l'historique : recherche par enregistrement et par utilisateur
+CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_record_id ON audit_log (table_name, record_id);
+CREATE INDEX IF NOT EXISTS ix_audit_log_user_id ON audit_log (user_id);
@@ -0,0 +1,13 @@
+-- Exercices archivés dans des bases annuelles (voir database/archive.py)
+CREATE TABLE IF NOT EXISTS archived_periods (
+    id INTEGER NOT NULL PRIMARY KEY,
+    table_name VARCHAR NOT NULL,
+    year INTEGER NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    path VARCHAR NOT NULL,
+    row_count INTEGER NOT NULL,
+    audit_row_count INTEGER NOT NULL,
+    archived_at DATETIME NOT NULL,
+    UNIQUE (table_name, year)
+);
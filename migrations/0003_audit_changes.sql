@@ -0,0 +1,6 @@
+-- Journal d'audit : diff JSON des changements et historique d'un enregistrement trié par date
+ALTER TABLE audit_log ADD COLUMN changes JSON;
+CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_record_id_timestamp ON audit_log (table_name, record_id, timestamp);
+-- Couverts par l'index ci-dessus et par la clé primaire
+DROP INDEX IF EXISTS ix_audit_log_table_name_record_id;
+DROP INDEX IF EXISTS ix_audit_log_id;
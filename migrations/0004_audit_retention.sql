@@ -0,0 +1,17 @@
+-- Pagination par clé (timestamp, id) du journal d'audit, filtré ou non (voir controllers/audit_controller.py)
+CREATE INDEX IF NOT EXISTS ix_audit_log_timestamp ON audit_log (timestamp);
+CREATE INDEX IF NOT EXISTS ix_audit_log_user_id_timestamp ON audit_log (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_audit_log_table_name_timestamp ON audit_log (table_name, timestamp);
+-- Couvert par l'index (user_id, timestamp)
+DROP INDEX IF EXISTS ix_audit_log_user_id;
+-- Entrées compactées par la politique de rétention (voir database/audit.py)
+CREATE TABLE IF NOT EXISTS audit_log_archive (
+    id INTEGER NOT NULL PRIMARY KEY,
+    month VARCHAR NOT NULL,
+    table_name VARCHAR NOT NULL,
+    row_count INTEGER NOT NULL,
+    first_timestamp VARCHAR NOT NULL,
+    last_timestamp VARCHAR NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_audit_log_archive_table_name_month ON audit_log_archive (table_name, month);
@@ -0,0 +1,10 @@
+-- Sessions de connexion persistées (voir authentication/sessions.py)
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME,
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id);
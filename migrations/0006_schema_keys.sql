@@ -0,0 +1,5 @@
+-- État du schéma en dehors de user_version, p. ex. les résumés installés (voir database/summaries.py)
+CREATE TABLE IF NOT EXISTS schema_keys (
+    name VARCHAR NOT NULL PRIMARY KEY,
+    value VARCHAR NOT NULL
+);
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.sql import func
+from database.database import Base
+
+
+class ArchivedPeriod(Base):
+    """
+    Fiscal year of a table moved into an archive database (see `database.archive`).
+    """
+    __tablename__ = 'archived_periods'
+    __table_args__ = (UniqueConstraint("table_name", "year"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    path = Column(String, nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    audit_row_count = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime, default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedPeriod(table={self.table_name}, year={self.year}, rows={self.row_count})>"
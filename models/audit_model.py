@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import JSON, Column, Index, Integer, LargeBinary, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -7,16 +7,43 @@ from models.user import User
 
 class AuditLog(Base):
     __tablename__ = 'audit_log'
+    # Pagination par clé (timestamp, id) du journal filtré par table (voir controllers.audit_controller)
+    __table_args__ = (Index("ix_audit_log_table_name_timestamp", "table_name", "timestamp"),)
 
-    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
-    table_name = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Index composite (table_name, record_id, timestamp) : historique d'un enregistrement, dans l'ordre
+    table_name = Column(String, nullable=False, info={"index_hint": ["record_id", "timestamp"]})
     action = Column(String, nullable=False)  
     record_id = Column(Integer, nullable=False)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False) 
-    timestamp = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False, info={"index_hint": ["timestamp"]})
+    timestamp = Column(DateTime(timezone=True), default=func.now(), nullable=False, info={"index_hint": True})
+    # Résumé court ("Updated amount, label") ; le détail est dans `changes`
     description = Column(String, nullable=False)
+    # Diff JSON compact : valeurs saisies (create), {champ: [ancien, nouveau]} (update), valeurs supprimées (delete)
+    changes = Column(JSON, nullable=True)
 
     user = relationship('User', back_populates='audit_logs')
     
     def __repr__(self):
         return f"<AuditLog(table={self.table_name}, action={self.action}, record_id={self.record_id}, timestamp={self.timestamp})>"
+
+
+class AuditArchive(Base):
+    """
+    Audit entries compacted by the retention policy (see `database.audit.compact_audit_log`):
+    one row per month, table and chunk, `payload` being the zlib-compressed JSON of the entries.
+    """
+    __tablename__ = 'audit_log_archive'
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String, nullable=False)
+    table_name = Column(String, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    first_timestamp = Column(String, nullable=False)
+    last_timestamp = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (Index("ix_audit_log_archive_table_name_month", "table_name", "month"),)
+
+    def __repr__(self):
+        return f"<AuditArchive(table={self.table_name}, month={self.month}, rows={self.row_count})>"
@@ -10,5 +10,5 @@ class BaseModel(Base):
     __abstract__ = True  # Mark this class as abstract so it won't be mapped to a table
 
     id = Column(Integer, primary_key=True, autoincrement=True, info={"tab_col_index":1})
-    created_at = Column(DateTime, default=func.now(), nullable=False, info={"editable":"false", "tab_col_index":-2})
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, info={"editable":"false", "tab_col_index":-1})
+    created_at = Column(DateTime, default=func.now(), nullable=False, info={"editable":"false", "tab_col_index":-2, "index_hint":True})
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, info={"editable":"false", "tab_col_index":-1, "index_hint":True})
@@ -0,0 +1,139 @@
+import threading
+
+from sqlalchemy import Date, DateTime, Enum, Float, Integer, String
+from sqlalchemy.inspection import inspect
+
+# Types de widgets de formulaire
+LINE_EDIT = "line_edit"
+FOREIGN_KEY_COMBOBOX = "foreign_key_combobox"
+ENUM_COMBOBOX = "enum_combobox"
+DATE_EDIT = "date_edit"
+
+
+class ColumnMeta:
+    """
+    What the tables, forms and controllers need to know about one model column,
+    read once from the column type and its `info` dictionary.
+
+    Args:
+        column (Column): The SQLAlchemy column.
+        index (int): The position of the column in the table definition.
+        relationship (RelationshipProperty, optional): The relationship using this column as foreign key.
+    """
+
+    def __init__(self, column, index, relationship=None):
+        info = column.info
+        self.column = column
+        self.name = column.name
+        self.verbose_name = info.get("verbose_name", column.name)
+        self.tab_col_index = info.get("tab_col_index", index)
+        self.editable = info.get("editable", "true") != "false"
+        self.required = not column.nullable
+        self.input_type = info.get("column_type", "text")
+        self.is_primary_key = column.primary_key
+        self.is_foreign_key = bool(column.foreign_keys)
+        self.order = bool(info.get("order_column", False))
+        self.searchable = info.get("searchable", True)
+
+        # Clé étrangère : modèle lié et colonne affichée à la place de l'identifiant
+        self.related_model = relationship.mapper.class_ if relationship is not None else None
+        self.relationship_name = relationship.key if relationship is not None else self.name.replace("_id", "")
+        self.related_column = info.get("related_column")
+
+        self.widget = self._widget_kind()
+        self.enum_values = list(column.type.enums) if self.widget == ENUM_COMBOBOX else []
+
+    def _widget_kind(self):
+        column_type = self.column.type
+        if isinstance(column_type, (String, Integer, Float)) and not self.is_foreign_key and self.input_type != "enum":
+            return LINE_EDIT
+        elif self.is_foreign_key:
+            return FOREIGN_KEY_COMBOBOX
+        elif isinstance(column_type, (Date, DateTime)):
+            return DATE_EDIT
+        elif isinstance(column_type, Enum):
+            return ENUM_COMBOBOX
+        return None
+
+    @property
+    def label(self):
+        """The form label, marked with (*) when the field is required."""
+        return f"{self.verbose_name}(*)" if self.required else self.verbose_name
+
+    def __repr__(self):
+        return f"<ColumnMeta({self.name}, widget={self.widget})>"
+
+
+class ModelMeta:
+    """
+    Metadata of a model computed once, shared by `CustomTableWidget`, `BaseFormWidget`
+    and `BaseController` instead of walking `model.__table__.columns` and the mapper each time.
+
+    Use `get_model_meta(model)` to get the cached instance of a model.
+
+    Args:
+        model (Type[Base]): The SQLAlchemy model class.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+        relationships = {}
+        for relationship in inspect(model).relationships:
+            for column in relationship.local_columns:
+                if column.foreign_keys:
+                    relationships.setdefault(column.name, relationship)
+
+        self.columns = [
+            ColumnMeta(column, index, relationships.get(column.name))
+            for index, column in enumerate(model.__table__.columns)
+        ]
+        self.by_name = {column.name: column for column in self.columns}
+
+        # Colonnes du tableau : `tab_col_index` positifs ou nuls d'abord, puis les négatifs, chacun par ordre croissant
+        positive_columns = sorted((column for column in self.columns if column.tab_col_index >= 0), key=lambda column: column.tab_col_index)
+        negative_columns = sorted((column for column in self.columns if column.tab_col_index < 0), key=lambda column: column.tab_col_index)
+        self.table_columns = positive_columns + negative_columns
+        self.table_column_names = [column.name for column in self.table_columns]
+        self.headers = [column.verbose_name for column in self.table_columns]
+
+        self.form_columns = [column for column in self.columns if column.name != "id" and column.editable and column.widget]
+        self.order_columns = [column.column for column in self.columns if column.order]
+        self.search_columns = [column for column in self.table_columns if column.searchable]
+        self.foreign_keys = {column.name: column for column in self.columns if column.related_model is not None}
+
+    def column(self, name):
+        return self.by_name[name]
+
+    def related_model(self, column_name):
+        """
+        Return the model referenced by a foreign key column, or None.
+        """
+        column = self.foreign_keys.get(column_name)
+        return column.related_model if column is not None else None
+
+    def __repr__(self):
+        return f"<ModelMeta({self.model.__name__})>"
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_model_meta(model):
+    """
+    Return the metadata of a model, computed on first use.
+
+    Args:
+        model (Type[Base]): The SQLAlchemy model class.
+
+    Returns:
+        ModelMeta: The cached metadata.
+    """
+    meta = _registry.get(model)
+    if meta is None:
+        with _registry_lock:
+            meta = _registry.get(model)
+            if meta is None:
+                meta = _registry[model] = ModelMeta(model)
+    return meta
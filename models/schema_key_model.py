@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String
+from database.database import Base
+
+
+class SchemaKey(Base):
+    """
+    Named value describing the state of the schema beyond `PRAGMA user_version`, e.g. the
+    summary tables installed (see `database.summaries.ensure_summaries`).
+    """
+    __tablename__ = 'schema_keys'
+
+    name = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+
+    def __repr__(self):
+        return f"<SchemaKey(name={self.name}, value={self.value})>"
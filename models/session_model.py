@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy.sql import func
+from database.database import Base
+
+
+class LoginSession(Base):
+    """
+    Persisted login session (see `authentication.sessions`): the token kept on the computer
+    is only accepted while its row is neither expired nor revoked.
+    """
+    __tablename__ = 'sessions'
+    # AUTOINCREMENT : un identifiant supprimé n'est jamais réattribué, un ancien jeton ne peut pas revivre
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<LoginSession(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>"
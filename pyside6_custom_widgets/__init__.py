@@ -1,4 +1,20 @@
-from .content import Content as Content
-from .menubar import MenuBar as MenuBar
-from .search_bar import SearchBar as SearchBar
-from .sidebar import SideBar as SideBar
\ No newline at end of file
+from importlib import import_module
+
+# Les widgets sont importés à la première utilisation, importer un seul widget
+# (ex: `pyside6_custom_widgets.button`) ne charge pas tous les autres.
+_LAZY_WIDGETS = {
+    "Content": ".content",
+    "MenuBar": ".menubar",
+    "SearchBar": ".search_bar",
+    "SideBar": ".sidebar",
+}
+
+__all__ = list(_LAZY_WIDGETS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_WIDGETS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_WIDGETS[name], __name__), name)
+    globals()[name] = value
+    return value
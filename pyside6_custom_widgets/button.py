@@ -1,7 +1,6 @@
 import qtawesome as qta
 
 from pyside6_imports import QPushButton, QSize, QIcon, Qt
-from qt_material import apply_stylesheet
 
 from utils.qss_file_loader import load_stylesheet
 
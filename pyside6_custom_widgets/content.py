@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 from pyside6_imports import QWidget, QVBoxLayout, QStackedWidget, QHBoxLayout, QLabel
 from utils.qss_file_loader import load_stylesheet
 
@@ -5,14 +7,31 @@ class Content(QWidget):
     """
     Manages the central content area using a QStackedWidget.
     Each page added will include a title above it in a layout of fixed width.
+
+    Pages can be given as a widget or as a factory (a callable returning the widget). A factory
+    page is only built the first time it is displayed. When `max_live_pages` is set, the least
+    recently displayed factory pages beyond that limit are destroyed once hidden and rebuilt on
+    demand. Before destroying a page, its `save_state()` result (if the page defines it) is kept
+    and handed back to `restore_state()` on the rebuilt page.
     """
 
-    def __init__(self):
+    def __init__(self, max_live_pages=None):
+        """
+        Args:
+            max_live_pages (int, optional): Maximum number of factory pages kept alive. Defaults to None (no limit).
+        """
         super().__init__()
         self.layout = QVBoxLayout(self)
+        self.max_live_pages = max_live_pages
+
+        # Pages description, in insertion order: one dict per page of the stacked widget
+        self.pages = []
+        # Live factory pages, least recently displayed first
+        self.live_pages = OrderedDict()
 
         # Create stacked widget to hold content pages
         self.stacked_widget = QStackedWidget()
+        self.stacked_widget.currentChanged.connect(self.on_current_changed)
         self.layout.addWidget(self.stacked_widget)
 
     def add_page(self, page_widget, title):
@@ -20,8 +39,11 @@ class Content(QWidget):
         Adds a new page to the stacked widget with a title above it.
 
         Args:
-            page_widget (QWidget): The widget to add as a new page.
+            page_widget (QWidget or callable): The widget to add as a new page, or a factory building it on first display.
             title (str): The title of the page, displayed above the content.
+
+        Returns:
+            int: The index of the new page.
         """
         # Create a wrapper widget to hold the title and the page content
         page_wrapper = QWidget()
@@ -39,12 +61,25 @@ class Content(QWidget):
         
         title_label.setFixedHeight(45)
 
-        # Add the title layout and page content to the page layout
+        # Add the title layout to the page layout, the content is added now or on first display
         page_layout.addLayout(title_layout)
-        page_layout.addWidget(page_widget)
+
+        page = {
+            "wrapper": page_wrapper,
+            "layout": page_layout,
+            "factory": None,
+            "widget": None,
+            "state": None,
+        }
+        if isinstance(page_widget, QWidget):
+            page["widget"] = page_widget
+            page_layout.addWidget(page_widget)
+        else:
+            page["factory"] = page_widget
+        self.pages.append(page)
 
         # Add the wrapped page (with title) to the stacked widget
-        self.stacked_widget.addWidget(page_wrapper)
+        return self.stacked_widget.addWidget(page_wrapper)
 
     def set_current_page_by_index(self, index):
         """
@@ -62,8 +97,76 @@ class Content(QWidget):
         Args:
             index (QWidget): The widget of the page to display.
         """
+        for index, page in enumerate(self.pages):
+            if page_widget is page["widget"] or page_widget is page["wrapper"]:
+                self.set_current_page_by_index(index)
+                return
         self.stacked_widget.setCurrentWidget(page_widget)
 
+    def page_widget(self, index):
+        """
+        Returns the content widget of a page, building it if needed.
+
+        Args:
+            index (int): The index of the page.
+
+        Returns:
+            QWidget: The page content widget.
+        """
+        return self.ensure_page(index)
+
+    def on_current_changed(self, index):
+        if 0 <= index < len(self.pages):
+            self.ensure_page(index)
+            self.evict_pages()
+
+    def ensure_page(self, index):
+        """
+        Builds a factory page if it is not alive and marks it as the most recently used.
+
+        Args:
+            index (int): The index of the page.
+
+        Returns:
+            QWidget: The page content widget.
+        """
+        page = self.pages[index]
+        if page["factory"] is None:
+            return page["widget"]
+
+        if page["widget"] is None:
+            page["widget"] = page["factory"]()
+            page["layout"].addWidget(page["widget"])
+            if page["state"] is not None and hasattr(page["widget"], "restore_state"):
+                page["widget"].restore_state(page["state"])
+            page["state"] = None
+
+        self.live_pages[index] = page
+        self.live_pages.move_to_end(index)
+        return page["widget"]
+
+    def evict_pages(self):
+        """
+        Destroys the least recently displayed hidden factory pages beyond `max_live_pages`.
+        """
+        if not self.max_live_pages:
+            return
+
+        current_index = self.stacked_widget.currentIndex()
+        for index in list(self.live_pages):
+            if len(self.live_pages) <= self.max_live_pages:
+                break
+            if index == current_index:
+                continue
+            page = self.live_pages.pop(index)
+            widget = page["widget"]
+            if hasattr(widget, "save_state"):
+                page["state"] = widget.save_state()
+            page["layout"].removeWidget(widget)
+            widget.hide()
+            widget.deleteLater()
+            page["widget"] = None
+
 
 
 if __name__ == "__main__":
@@ -81,25 +184,24 @@ if __name__ == "__main__":
     # Add some example pages
     page1 = QLabel("This is Page 1")
     page2 = QLabel("This is Page 2")
-    page3 = QLabel("This is Page 3")
 
     content_area.add_page(page1, "Title 1")
     content_area.add_page(page2, "Title 2")
-    content_area.add_page(page3, "Title 3")
+    content_area.add_page(lambda: QLabel("This is Page 3"), "Title 3")
 
     # Create buttons to navigate between pages
     button_layout = QHBoxLayout()
     
     button1 = QPushButton("Show Page 1")
-    button1.clicked.connect(lambda: content_area.set_current_page(0))
+    button1.clicked.connect(lambda: content_area.set_current_page_by_index(0))
     button_layout.addWidget(button1)
 
     button2 = QPushButton("Show Page 2")
-    button2.clicked.connect(lambda: content_area.set_current_page(1))
+    button2.clicked.connect(lambda: content_area.set_current_page_by_index(1))
     button_layout.addWidget(button2)
 
     button3 = QPushButton("Show Page 3")
-    button3.clicked.connect(lambda: content_area.set_current_page(2))
+    button3.clicked.connect(lambda: content_area.set_current_page_by_index(2))
     button_layout.addWidget(button3)
 
     layout.addLayout(button_layout)
@@ -1,15 +1,16 @@
 import sys
 
 from pyside6_imports import (
-    QApplication, QMainWindow, QWidget, QHBoxLayout, QLabel, Qt
+    QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLabel, Qt
 )
 
 import qtawesome as qta
-from qt_material import apply_stylesheet
+from utils.theme_cache import apply_cached_stylesheet
 from pyside6_custom_widgets import MenuBar
 from pyside6_custom_widgets import SearchBar
 from pyside6_custom_widgets import SideBar
 from pyside6_custom_widgets import Content
+from pyside6_custom_widgets.kpi_tile import KpiArea, KpiTile
 from utils.qss_file_loader import load_stylesheet
 
 
@@ -27,10 +28,11 @@ class Dashboard(QMainWindow):
         menu_bar (MenuBar): The top menu bar for navigation.
         search_bar (SearchBar): Search bar placed in the top-right corner of the menu.
         side_bar (SideBar): Sidebar with navigation buttons.
+        kpi_area (KpiArea): Row of KPI tiles above the content, hidden while empty.
         content (Content): Central content area where pages are displayed.
     """
 
-    def __init__(self, menus=None, sidebar_buttons=None, style_or_theme="", use_qt_material=False):
+    def __init__(self, menus=None, sidebar_buttons=None, style_or_theme="", use_qt_material=False, max_live_pages=None):
         """
         Initializes the Dashboard layout, including the MenuBar, SideBar, Content area, and SearchBar.
 
@@ -39,6 +41,7 @@ class Dashboard(QMainWindow):
             sidebar_buttons (list, optional): List of sidebar button tuples. Defaults to None.
             style_or_theme (str, optional): Custom QSS style for the dashboard. Or the theme if uses Qt Materiel. Defaults to "".
             use_qt_material (bool, optional): Flag to use Qt Material theme. Defaults to False.
+            max_live_pages (int, optional): Maximum number of lazily built pages kept alive. Defaults to None (no limit).
         """
         super().__init__()
         self.setWindowTitle("My Dashboard")
@@ -62,10 +65,18 @@ class Dashboard(QMainWindow):
         self.menu_bar.setCornerWidget(self.search_bar, Qt.TopRightCorner)
 
         self.side_bar = SideBar(buttons=self.sidebar_buttons)
-        self.content = Content()
+        self.kpi_area = KpiArea()
+        self.content = Content(max_live_pages=max_live_pages)
+
+        # Les tuiles KPI sont affichées au-dessus des pages
+        content_layout = QVBoxLayout()
+        content_layout.setContentsMargins(0, 0, 0, 0)
+        content_layout.setSpacing(0)
+        content_layout.addWidget(self.kpi_area)
+        content_layout.addWidget(self.content)
 
         main_layout.addWidget(self.side_bar)
-        main_layout.addWidget(self.content)
+        main_layout.addLayout(content_layout)
         self.setMenuBar(self.menu_bar)
 
         # Connect pushMenu button to toggle sidebar
@@ -79,17 +90,55 @@ class Dashboard(QMainWindow):
         Adds a new page to the content area.
 
         Args:
-            page_widget (QWidget): The widget representing the page to add.
+            page_widget (QWidget or callable): The widget representing the page to add, or a factory
+                building it the first time the page is displayed.
             title (str): The title of the page.
+
+        Returns:
+            int: The index of the new page.
         """
-        self.content.add_page(page_widget, title)
+        return self.content.add_page(page_widget, title)
         
+    def add_kpi_tile(self, title, controller, measure, filters=None, **kwargs):
+        """
+        Adds a KPI tile above the content, its figure being computed in SQL in the background.
+
+        Args:
+            title (str): The tile title.
+            controller (BaseController): The controller of the aggregated model.
+            measure (tuple): (function, column name) of the figure, e.g. ("sum", "amount").
+            filters (dict, Q, iterable or callable, optional): Filters of the figure.
+            **kwargs: Other `KpiTile` arguments (formatter, refresh_interval).
+
+        Returns:
+            KpiTile: The tile.
+        """
+        return self.kpi_area.add_tile(KpiTile(title, controller, measure, filters=filters, **kwargs))
+
+    def refresh_kpis(self):
+        """
+        Recomputes the figures of every KPI tile.
+        """
+        self.kpi_area.refresh()
+
     def set_current_page_by_index(self, index):
         self.content.set_current_page_by_index(index)
         
     def set_current_page(self, page_widget):
         self.content.set_current_page(page_widget)
         
+    def toggle_dev_panel(self):
+        """
+        Shows or hides the developer panel (SQL statements statistics, ...).
+        """
+        if getattr(self, "dev_panel", None) is None:
+            from pyside6_custom_widgets.dev_panel import DevPanel
+            self.dev_panel = DevPanel()
+
+        self.dev_panel.setVisible(not self.dev_panel.isVisible())
+        if self.dev_panel.isVisible():
+            self.dev_panel.raise_()
+
     def set_style(self, style_or_theme):
         """
         Applies the QSS style or clears the styles for Qt Material usage.
@@ -130,9 +179,9 @@ class Dashboard(QMainWindow):
         self.setStyleSheet("")  # Clear any QSS when using Qt Material
         # Logic to apply the Qt Material theme would go here
         if theme:
-            apply_stylesheet(self, theme=theme)
+            apply_cached_stylesheet(self, theme=theme)
         else:
-            apply_stylesheet(self, theme="dark_teal.xml")
+            apply_cached_stylesheet(self, theme="dark_teal.xml")
 
         
 
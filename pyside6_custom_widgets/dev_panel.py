@@ -0,0 +1,247 @@
+import time
+
+from pyside6_imports import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QTimer
+)
+from pyside6_custom_widgets.button import Button
+from utils.idle_maintenance import get_idle_maintenance
+from utils.metrics import registry
+from utils.stall_detector import get_stall_detector
+from utils.utils import set_app_icon
+
+
+class SqlStatementsTab(QWidget):
+    """
+    Shows the top N SQL statements of the metrics registry, by total time.
+
+    Args:
+        top_n (int, optional): Number of statements displayed. Defaults to 20.
+    """
+
+    headers = ["Requête", "Appelant", "Appels", "Total (ms)", "Moyenne (ms)", "Max (ms)", "Lignes"]
+
+    def __init__(self, top_n=20, parent=None):
+        super().__init__(parent)
+        self.top_n = top_n
+
+        layout = QVBoxLayout(self)
+        self.gauges_label = QLabel()
+        layout.addWidget(self.gauges_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.headers))
+        self.table.setHorizontalHeaderLabels(self.headers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.reset_button = Button(text="Réinitialiser", icon_name="fa.eraser", theme_color="warning", command=self.reset)
+        button_layout.addWidget(self.reset_button)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """
+        Reloads the statements from the metrics registry.
+        """
+        gauges = registry.gauges()
+        self.gauges_label.setText("  |  ".join(f"{name}: {value}" for name, value in sorted(gauges.items())))
+
+        statements = registry.top_statements(self.top_n)
+        self.table.setRowCount(len(statements))
+        for row, stats in enumerate(statements):
+            values = [
+                " ".join(stats["statement"].split()),
+                stats["caller"] or "",
+                str(stats["count"]),
+                f"{stats['total_time'] * 1000:.2f}",
+                f"{stats['mean_time'] * 1000:.2f}",
+                f"{stats['max_time'] * 1000:.2f}",
+                str(stats["rows"]),
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 0:
+                    item.setToolTip(stats["statement"])
+                self.table.setItem(row, col, item)
+
+    def reset(self):
+        registry.reset()
+        self.refresh()
+
+
+class StallsTab(QWidget):
+    """
+    Shows the UI stalls recorded by the stall detector, aggregated by slot.
+    """
+
+    headers = ["Slot", "Gels", "Total (ms)", "Max (ms)", "Points chauds"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        layout = QVBoxLayout(self)
+        self.latency_label = QLabel()
+        layout.addWidget(self.latency_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.headers))
+        self.table.setHorizontalHeaderLabels(self.headers)
+        self.table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.export_button = Button(text="Exporter (JSON)", icon_name="fa.download", theme_color="primary", command=self.export)
+        button_layout.addWidget(self.export_button)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        detector = get_stall_detector()
+        if detector is None:
+            self.latency_label.setText("Détecteur de gels inactif.")
+            self.table.setRowCount(0)
+            return
+
+        summary = detector.summary()
+        latency = summary["event_loop_latency_ms"]
+        self.latency_label.setText(f"Latence de la boucle d'événements : moyenne {latency['mean']} ms, max {latency['max']} ms")
+
+        self.table.setRowCount(len(summary["slots"]))
+        for row, (slot, stats) in enumerate(summary["slots"].items()):
+            hotspots = ", ".join(hotspot for hotspot, _ in stats["hotspots"])
+            values = [slot, str(stats["stalls"]), f"{stats['total_ms']:.1f}", f"{stats['max_ms']:.1f}", hotspots]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 4:
+                    item.setToolTip(hotspots)
+                self.table.setItem(row, col, item)
+
+    def export(self):
+        detector = get_stall_detector()
+        if detector is not None:
+            path = detector.export_json()
+            self.latency_label.setText(f"Rapport exporté : {path}")
+
+
+class MaintenanceTab(QWidget):
+    """
+    Shows the idle-time database maintenance: state and last run of each task.
+    """
+
+    headers = ["Tâche", "Dernière exécution", "Durée (ms)", "Résultat", "Prochaine échéance", "Détail"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        layout = QVBoxLayout(self)
+        self.state_label = QLabel()
+        layout.addWidget(self.state_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.headers))
+        self.table.setHorizontalHeaderLabels(self.headers)
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.run_button = Button(text="Lancer maintenant", icon_name="fa.wrench", theme_color="primary", command=self.run_now)
+        button_layout.addWidget(self.run_button)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        maintenance = get_idle_maintenance()
+        if maintenance is None:
+            self.state_label.setText("Maintenance en période d'inactivité désactivée.")
+            self.table.setRowCount(0)
+            return
+
+        state = "en cours" if maintenance.is_running() else "en attente"
+        self.state_label.setText(
+            f"Maintenance {state} — inactivité : {maintenance.idle_for():.0f} s (seuil {maintenance.idle_after:.0f} s, budget {maintenance.budget} s)"
+        )
+
+        runner = maintenance.runner
+        now = time.time()
+        self.table.setRowCount(len(runner.tasks))
+        for row, task in enumerate(runner.tasks):
+            status = runner.status[task.name]
+            due_in = runner.last_runs.get(task.name, 0) + task.interval - now
+            values = [
+                task.name,
+                status["last_run"] or "—",
+                "" if status["duration_ms"] is None else f"{status['duration_ms']:.1f}",
+                status["result"] or "",
+                "due" if due_in <= 0 else f"dans {due_in / 60:.0f} min",
+                status["detail"],
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 0:
+                    item.setToolTip(task.description)
+                self.table.setItem(row, col, item)
+
+    def run_now(self):
+        maintenance = get_idle_maintenance()
+        if maintenance is not None:
+            maintenance.run_now(force=True)
+
+
+class DevPanel(QWidget):
+    """
+    Developer panel window, one tab per diagnostic. Every tab defining a `refresh()` method
+    is refreshed periodically while the panel is visible.
+
+    Args:
+        refresh_interval (int, optional): Refresh period in milliseconds. Defaults to 2000.
+    """
+
+    def __init__(self, refresh_interval=2000, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Panneau développeur")
+        set_app_icon(self)
+        self.resize(900, 500)
+
+        layout = QVBoxLayout(self)
+        self.tabs = QTabWidget()
+        self.tabs.currentChanged.connect(lambda _: self.refresh())
+        layout.addWidget(self.tabs)
+
+        self.add_tab(SqlStatementsTab(), "Requêtes SQL")
+        self.add_tab(StallsTab(), "Gels de l'interface")
+        self.add_tab(MaintenanceTab(), "Maintenance")
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_interval)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def add_tab(self, widget, title):
+        """
+        Adds a diagnostic tab.
+
+        Args:
+            widget (QWidget): The tab content, optionally with a `refresh()` method.
+            title (str): The tab title.
+        """
+        self.tabs.addTab(widget, title)
+
+    def refresh(self):
+        widget = self.tabs.currentWidget()
+        if widget is not None and hasattr(widget, "refresh"):
+            widget.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
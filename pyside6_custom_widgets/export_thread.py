@@ -0,0 +1,96 @@
+from pyside6_imports import QThread, Signal, QProgressDialog, QMessageBox, Qt
+from utils.export import ExportCancelled, exporter_for
+
+
+class ExportThread(QThread):
+    """
+    Runs an export (see `utils.export`) outside the GUI thread.
+
+    Args:
+        controller (BaseController): The controller of the exported model.
+        path (str): The destination file, ".csv" or ".xlsx".
+        filters (dict, Q or iterable, optional): Filters passed to `BaseController.iter_rows`.
+        order (list of str, optional): Order passed to `BaseController.iter_rows`.
+    """
+
+    progress = Signal(int, int)
+    exported = Signal(str, int)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, controller, path, filters=None, order=None, parent=None):
+        super().__init__(parent)
+        self.exporter = exporter_for(
+            path, controller, filters=filters, order=order,
+            progress=self.progress.emit, is_cancelled=self.isInterruptionRequested,
+        )
+
+    def run(self):
+        try:
+            count = self.exporter.export()
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.exported.emit(str(self.exporter.path), count)
+
+
+class ExportProgressDialog(QProgressDialog):
+    """
+    Progress dialog of an `ExportThread`; cancelling it interrupts the export.
+
+    Its methods are connected to the thread signals, so they run in the GUI thread.
+    """
+
+    def __init__(self, thread, parent=None):
+        super().__init__("Export en cours...", "Annuler", 0, 0, parent)
+        self.setWindowTitle("Export")
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(300)
+
+        self.canceled.connect(thread.requestInterruption)
+        thread.progress.connect(self.on_progress)
+        thread.exported.connect(self.on_exported)
+        thread.failed.connect(self.on_failed)
+        thread.cancelled.connect(self.on_cancelled)
+
+    def on_progress(self, done, total):
+        self.setMaximum(max(total, 1))
+        self.setValue(done)
+        self.setLabelText(f"Export en cours... {done} / {total} lignes")
+
+    def on_exported(self, path, count):
+        self.reset()
+        QMessageBox.information(self.parentWidget(), "Export", f"{count} lignes exportées dans\n{path}")
+        self.deleteLater()
+
+    def on_failed(self, message):
+        self.reset()
+        QMessageBox.critical(self.parentWidget(), "Erreur", f"L'export a échoué : \n{message}")
+        self.deleteLater()
+
+    def on_cancelled(self):
+        self.reset()
+        self.deleteLater()
+
+
+def start_export(parent, controller, path, filters=None, order=None):
+    """
+    Start an export in the background with a progress dialog, which can cancel it.
+
+    Args:
+        parent (QWidget): The widget owning the dialog.
+        controller (BaseController): The controller of the exported model.
+        path (str): The destination file, ".csv" or ".xlsx".
+        filters (dict, Q or iterable, optional): Filters passed to `BaseController.iter_rows`.
+        order (list of str, optional): Order passed to `BaseController.iter_rows`.
+
+    Returns:
+        ExportThread: The running thread.
+    """
+    thread = ExportThread(controller, path, filters=filters, order=order, parent=parent)
+    thread.progress_dialog = ExportProgressDialog(thread, parent)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return thread
@@ -0,0 +1,102 @@
+from pyside6_imports import QThread, Signal, QProgressDialog, QMessageBox, QFileDialog, Qt
+from utils.importer import CsvImporter
+
+
+class ImportThread(QThread):
+    """
+    Runs a CSV import (see `utils.importer`) outside the GUI thread.
+
+    Args:
+        controller (BaseController): The controller of the imported model.
+        path (str): The CSV file.
+    """
+
+    progress = Signal(int, int)
+    imported = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, controller, path, parent=None):
+        super().__init__(parent)
+        self.importer = CsvImporter(
+            controller, path,
+            progress=lambda done, total: self.progress.emit(done // 1024, max(total // 1024, 1)),
+            is_cancelled=self.isInterruptionRequested,
+        )
+
+    def run(self):
+        try:
+            report = self.importer.run()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.imported.emit(report)
+
+
+class ImportProgressDialog(QProgressDialog):
+    """
+    Progress dialog of an `ImportThread`; cancelling it stops the import after the current chunk.
+
+    Args:
+        thread (ImportThread): The running import.
+        on_imported (callable, optional): Called once the import is done (e.g. to refresh a table).
+    """
+
+    def __init__(self, thread, on_imported=None, parent=None):
+        super().__init__("Import en cours...", "Annuler", 0, 0, parent)
+        self.setWindowTitle("Import")
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(300)
+        self.on_imported_callback = on_imported
+
+        self.canceled.connect(thread.requestInterruption)
+        thread.progress.connect(self.on_progress)
+        thread.imported.connect(self.on_imported)
+        thread.failed.connect(self.on_failed)
+
+    def on_progress(self, done, total):
+        self.setMaximum(total)
+        self.setValue(done)
+
+    def on_imported(self, report):
+        self.reset()
+        if self.on_imported_callback:
+            self.on_imported_callback()
+
+        if report.errors:
+            reply = QMessageBox.question(
+                self.parentWidget(), "Import",
+                f"{report.summary()}\n\nEnregistrer la liste des lignes rejetées ?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes,
+            )
+            if reply == QMessageBox.Yes:
+                path, _ = QFileDialog.getSaveFileName(self.parentWidget(), "Lignes rejetées", "lignes_rejetees.csv", "CSV (*.csv)")
+                if path:
+                    report.write_errors(path)
+        else:
+            QMessageBox.information(self.parentWidget(), "Import", report.summary())
+        self.deleteLater()
+
+    def on_failed(self, message):
+        self.reset()
+        QMessageBox.critical(self.parentWidget(), "Erreur", f"L'import a échoué : \n{message}")
+        self.deleteLater()
+
+
+def start_import(parent, controller, path, on_imported=None):
+    """
+    Start a CSV import in the background with a progress dialog, which can cancel it.
+
+    Args:
+        parent (QWidget): The widget owning the dialog.
+        controller (BaseController): The controller of the imported model.
+        path (str): The CSV file.
+        on_imported (callable, optional): Called in the GUI thread once the import is done.
+
+    Returns:
+        ImportThread: The running thread.
+    """
+    thread = ImportThread(controller, path, parent=parent)
+    thread.progress_dialog = ImportProgressDialog(thread, on_imported, parent)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return thread
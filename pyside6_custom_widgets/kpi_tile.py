@@ -0,0 +1,162 @@
+from datetime import datetime
+
+from pyside6_imports import QThread, Signal, QFrame, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QTimer
+
+# Threads en cours, gardés en vie même si la tuile est détruite avant la fin du calcul
+_running_threads = set()
+
+
+def format_amount(value):
+    """
+    Format a number the French way: "1 234 567,89".
+    """
+    if value is None:
+        return "-"
+    if isinstance(value, int):
+        return f"{value:,}".replace(",", " ")
+    return f"{value:,.2f}".replace(",", " ").replace(".", ",")
+
+
+class AggregateThread(QThread):
+    """
+    Runs `BaseController.aggregate` outside the GUI thread.
+
+    Args:
+        controller (BaseController): The controller of the aggregated model.
+        **kwargs: Arguments of `BaseController.aggregate`.
+    """
+
+    computed = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, controller, **kwargs):
+        super().__init__()
+        self.controller = controller
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            rows = self.controller.aggregate(**self.kwargs)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.computed.emit(rows)
+
+
+class KpiTile(QFrame):
+    """
+    Tile displaying one figure computed in SQL by `BaseController.aggregate`, e.g. today's takings.
+    The figure is computed in a background thread; `refresh()` can be called at any time, a
+    refresh requested while computing is run once the current one is done.
+
+    Args:
+        title (str): The tile title.
+        controller (BaseController): The controller of the aggregated model.
+        measure (tuple): (function, column name) of the figure, e.g. ("sum", "amount").
+        filters (dict, Q, iterable or callable, optional): Filters of the figure. A callable is
+            called on each refresh, for filters depending on the current date.
+        formatter (callable, optional): Converts the value to text. Defaults to `format_amount`.
+        refresh_interval (int, optional): Automatic refresh period in milliseconds. Defaults to None (no timer).
+    """
+
+    def __init__(self, title, controller, measure, filters=None, formatter=format_amount, refresh_interval=None, parent=None):
+        super().__init__(parent)
+        self.setObjectName("kpiTile")
+        self.setFrameShape(QFrame.StyledPanel)
+        self.controller = controller
+        self.measure = measure
+        self.filters = filters
+        self.formatter = formatter
+        self.thread = None
+        self.refresh_pending = False
+
+        layout = QVBoxLayout(self)
+        self.title_label = QLabel(title)
+        self.title_label.setObjectName("kpiTitle")
+        self.value_label = QLabel("...")
+        self.value_label.setObjectName("kpiValue")
+        font = self.value_label.font()
+        font.setPointSize(font.pointSize() + 8)
+        font.setBold(True)
+        self.value_label.setFont(font)
+        self.updated_label = QLabel("")
+        self.updated_label.setObjectName("kpiUpdated")
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.value_label)
+        layout.addWidget(self.updated_label)
+
+        self.timer = None
+        if refresh_interval:
+            self.timer = QTimer(self)
+            self.timer.timeout.connect(self.refresh)
+            self.timer.start(refresh_interval)
+
+    def refresh(self):
+        """
+        Recompute the figure in the background.
+        """
+        if self.thread is not None:
+            self.refresh_pending = True
+            return
+
+        filters = self.filters() if callable(self.filters) else self.filters
+        thread = AggregateThread(self.controller, measures={"value": self.measure}, filters=filters)
+        thread.computed.connect(self.on_computed)
+        thread.failed.connect(self.on_failed)
+        thread.finished.connect(self.on_finished)
+        thread.finished.connect(lambda: _running_threads.discard(thread))
+        thread.finished.connect(thread.deleteLater)
+        _running_threads.add(thread)
+        self.thread = thread
+        thread.start()
+
+    def on_computed(self, rows):
+        self.value_label.setText(self.formatter(rows[0]["value"] if rows else None))
+        self.value_label.setToolTip("")
+        self.updated_label.setText(f"Mis à jour à {datetime.now():%H:%M}")
+
+    def on_failed(self, message):
+        self.value_label.setText("Erreur")
+        self.value_label.setToolTip(message)
+
+    def on_finished(self):
+        self.thread = None
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.refresh()
+
+
+class KpiArea(QWidget):
+    """
+    Row of `KpiTile`, displayed above the content of the `Dashboard`. Hidden while empty.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tiles = []
+        self.layout = QHBoxLayout(self)
+        self.layout.setContentsMargins(9, 9, 9, 0)
+        self.setVisible(False)
+
+    def add_tile(self, tile):
+        """
+        Add a tile and compute its figure.
+
+        Args:
+            tile (KpiTile): The tile.
+
+        Returns:
+            KpiTile: The tile.
+        """
+        self.tiles.append(tile)
+        self.layout.addWidget(tile)
+        self.setVisible(True)
+        tile.refresh()
+        return tile
+
+    def refresh(self):
+        """
+        Recompute the figures of every tile.
+        """
+        for tile in self.tiles:
+            tile.refresh()
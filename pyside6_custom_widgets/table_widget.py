@@ -1,7 +1,9 @@
 from datetime import date, datetime
 from babel.numbers import format_decimal
 
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QHBoxLayout, QMessageBox
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QHBoxLayout, QMessageBox, QFileDialog
+from database.database import search_text as search_text_of
+from models.meta import get_model_meta
 from pyside6_custom_widgets.button import Button
 from pyside6_custom_widgets.label import Label
 from pyside6_custom_widgets.line_edit import LineEdit
@@ -28,6 +30,7 @@ class CustomTableWidget(QWidget):
         super().__init__()
         
         self.model = model
+        self.meta = get_model_meta(model)
         self.controller = controller
         self.columns = self._get_columns()
         self.edit_column = edit_column
@@ -63,8 +66,14 @@ class CustomTableWidget(QWidget):
         self.search_layout = QHBoxLayout()
         self.create_button = Button(text="", icon_name="fa.plus", command=self.create_button_command, theme_color="success")
         self.search_bar = LineEdit(placeholder_text="Search...", on_text_changer_func=self.filter_data)
+        self.export_button = Button(text="", icon_name="fa.download", command=self.export_data, theme_color="primary")
+        self.export_button.setToolTip("Exporter les lignes filtrées (CSV ou Excel)")
         self.search_layout.addWidget(self.create_button)
         self.search_layout.addWidget(self.search_bar)
+        self.import_button = Button(text="", icon_name="fa.upload", command=self.import_data, theme_color="primary")
+        self.import_button.setToolTip("Importer un fichier CSV")
+        self.search_layout.addWidget(self.import_button)
+        self.search_layout.addWidget(self.export_button)
 
         # Table setup
         self.table = QTableWidget()
@@ -167,14 +176,13 @@ class CustomTableWidget(QWidget):
             value = getattr(instance, column, "")
             
             # Check if the column has a ForeignKey relationship
-            column_info = self.model.__table__.columns[column].info
-            if 'related_column' in column_info:
+            column_meta = self.meta.column(column)
+            if column_meta.related_column:
                 # Get the related instance
-                related_instance = getattr(instance, column.replace('_id', ''), None)
+                related_instance = getattr(instance, column_meta.relationship_name, None)
                 if related_instance:
                     # Get the specified field from the related instance
-                    related_column = column_info['related_column']
-                    value = getattr(related_instance, related_column, "")
+                    value = getattr(related_instance, column_meta.related_column, "")
 
             return value
 
@@ -184,44 +192,13 @@ class CustomTableWidget(QWidget):
     
     def _get_columns(self):
         """
-        Récupère et trie les colonnes du modèle SQLAlchemy en fonction de `tab_col_index`.
+        Récupère les colonnes du modèle triées selon `tab_col_index`.
         Les colonnes avec des valeurs négatives de `tab_col_index` apparaissent à la fin.
         """
-        # Récupérer toutes les colonnes avec leur ordre `tab_col_index` spécifié dans le modèle
-        columns_with_order = [
-            (col.info.get('tab_col_index', index), col.name) 
-            for index, col in enumerate(self.model.__table__.columns)
-        ]
-        
-        # Séparer les colonnes avec des index négatifs (qui iront en dernier) et positifs/nuls
-        positive_columns = [(index, name) for index, name in columns_with_order if index >= 0]
-        negative_columns = [(index, name) for index, name in columns_with_order if index < 0]
-
-        # Trier les colonnes positives par `tab_col_index` croissant et les négatives également
-        sorted_positive_columns = sorted(positive_columns)
-        sorted_negative_columns = sorted(negative_columns)
-
-        # Combiner les colonnes positives d'abord, puis les négatives
-        sorted_columns = [col_name for _, col_name in sorted_positive_columns + sorted_negative_columns]
-        
-        return sorted_columns
+        return list(self.meta.table_column_names)
     
     def _get_headers(self):
-
-        columns_with_order = [
-            (col.info.get('tab_col_index', index), col.info.get('verbose_name',col.name)) 
-            for index, col in enumerate(self.model.__table__.columns)
-        ]
-        
-        positive_columns = [(index, name) for index, name in columns_with_order if index >= 0]
-        negative_columns = [(index, name) for index, name in columns_with_order if index < 0]
-
-        sorted_positive_columns = sorted(positive_columns)
-        sorted_negative_columns = sorted(negative_columns)
-
-        sorted_columns = [col_name for _, col_name in sorted_positive_columns + sorted_negative_columns]
-        
-        return sorted_columns
+        return list(self.meta.headers)
     
     def _set_data(self):
         """
@@ -264,10 +241,7 @@ class CustomTableWidget(QWidget):
         Returns:
             bool: True if the instance matches the search text, False otherwise.
         """
-        # Exclude the 'Actions' column from the search
-        searchable_columns = [col for col in self.columns if col != "Actions"]
-
-        return any(search_text in str(getattr(instance, col)).lower() for col in searchable_columns)
+        return any(search_text in search_text_of(getattr(instance, column.name)) for column in self.meta.search_columns)
 
     def update_pagination(self):
         """
@@ -296,6 +270,60 @@ class CustomTableWidget(QWidget):
             # When pagination is disabled, show the total number of items
             self.pagination_info_label.setText(f"Showing all {total_items} rows")
 
+    def save_state(self):
+        """
+        Returns the pagination and search state, so the table can be rebuilt as it was.
+
+        Returns:
+            dict: The current page and search text.
+        """
+        return {"current_page": self.current_page, "search_text": self.search_bar.get_text()}
+
+    def restore_state(self, state):
+        """
+        Restores a state returned by `save_state`.
+
+        Args:
+            state (dict): The current page and search text.
+        """
+        self.search_bar.set_text(state.get("search_text", ""))
+        self.filter_data()
+        last_page = max(0, (len(self.filtered_instances) - 1) // self.items_per_page)
+        self.current_page = min(state.get("current_page", 0), last_page)
+        self.update_pagination()
+
+    def export_data(self):
+        """
+        Exports every row matching the current search (not only the current page) to a CSV or
+        XLSX file chosen by the user. The rows are streamed from the database in a background thread.
+        """
+        default_name = f"{self.model.__tablename__}.xlsx"
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter", default_name, "Excel (*.xlsx);;CSV (*.csv)")
+        if not path:
+            return
+
+        from pyside6_custom_widgets.export_thread import start_export
+
+        search_text = self.search_bar.get_text()
+        filters = [self.controller.search_filter(search_text)] if search_text else None
+        try:
+            self.export_thread = start_export(self, self.controller, path, filters=filters)
+        except ValueError as e:
+            QMessageBox.warning(self, "Export", str(e))
+
+    def import_data(self):
+        """
+        Imports a CSV file chosen by the user in a background thread, then refreshes the table.
+        The headers are matched with the column verbose names.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Importer", "", "CSV (*.csv)")
+        if not path:
+            return
+
+        from pyside6_custom_widgets.import_thread import start_import
+
+        self.import_thread = start_import(self, self.controller, path, on_imported=self.refresh_data)
+
     def show_prev_page(self):
         """
         Shows the previous page of the table.
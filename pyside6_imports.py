@@ -1,33 +1,73 @@
-from PySide6.QtCore import Qt, QDate, QSize, Signal, QEvent, QTimer
-from PySide6.QtGui import QIcon, QPixmap, QAction, QColor, QCloseEvent
-from PySide6.QtWidgets import (
-    QApplication,
-    QComboBox,
-    QCompleter,
-    QDateEdit,
-    QDialog,
-    QFrame,
-    QGraphicsDropShadowEffect,
-    QGroupBox,
-    QGridLayout,
-    QHeaderView,
-    QLabel,
-    QLineEdit,
-    QMainWindow,
-    QMessageBox,
-    QMenu,
-    QMenuBar,
-    QPushButton,
-    QScrollArea,
-    QSpacerItem,
-    QStackedWidget,
-    QTableWidget,
-    QTableWidgetItem,
-    QTextEdit,
-    QToolBar,
-    QVBoxLayout,
-    QWidget,
-    QHBoxLayout,
-    QSizePolicy,
-    QFormLayout
-)
+"""
+Central access point to the PySide6 names used by the application.
+
+Names are resolved lazily (PEP 562): importing this module costs nothing, and a Qt module
+is only loaded the first time one of its names is requested. This keeps modules that only
+need a couple of Qt names (or none, like command line tools) from loading all of QtWidgets.
+"""
+from importlib import import_module
+
+_QT_NAMES = {
+    "PySide6.QtCore": (
+        "Qt", "QDate", "QSize", "Signal", "QEvent", "QTimer", "QObject", "QThread", "QFileSystemWatcher",
+    ),
+    "PySide6.QtNetwork": (
+        "QLocalServer",
+    ),
+    "PySide6.QtGui": (
+        "QIcon", "QPixmap", "QAction", "QColor", "QCloseEvent",
+    ),
+    "PySide6.QtWidgets": (
+        "QApplication",
+        "QComboBox",
+        "QCompleter",
+        "QDateEdit",
+        "QDialog",
+        "QFileDialog",
+        "QFrame",
+        "QGraphicsDropShadowEffect",
+        "QGroupBox",
+        "QGridLayout",
+        "QHeaderView",
+        "QLabel",
+        "QLineEdit",
+        "QMainWindow",
+        "QMessageBox",
+        "QMenu",
+        "QMenuBar",
+        "QProgressDialog",
+        "QPushButton",
+        "QScrollArea",
+        "QSpacerItem",
+        "QStackedWidget",
+        "QTabWidget",
+        "QTableWidget",
+        "QTableWidgetItem",
+        "QTextEdit",
+        "QToolBar",
+        "QVBoxLayout",
+        "QWidget",
+        "QHBoxLayout",
+        "QSizePolicy",
+        "QFormLayout",
+    ),
+}
+
+_NAME_TO_MODULE = {name: module for module, names in _QT_NAMES.items() for name in names}
+
+__all__ = list(_NAME_TO_MODULE)
+
+
+def __getattr__(name):
+    module_name = _NAME_TO_MODULE.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name), name)
+    # Cache the resolved name so the next access is a plain module attribute lookup
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
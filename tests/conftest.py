@@ -0,0 +1,43 @@
+"""
+Shared test setup: every test runs against throw-away files, never the application's database
+or configuration. The environment is set before any module of the application is imported.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TEST_DIR = Path(tempfile.mkdtemp(prefix="gestion-caisse-tests-"))
+
+os.environ["APP_DATABASE_URL"] = f"sqlite:///{TEST_DIR / 'db.db'}"
+os.environ["APP_CONFIG_FILE"] = str(TEST_DIR / "config.json")
+os.environ["APP_ARCHIVE_DIR"] = str(TEST_DIR / "archives")
+os.environ["APP_SESSION_FILE"] = str(TEST_DIR / "session")
+os.environ["APP_SESSION_KEY_FILE"] = str(TEST_DIR / "session.key")
+os.environ["APP_SQL_INSTRUMENTATION"] = "0"
+os.environ.pop("APP_AUDIT_DATABASE", None)
+sys.path.insert(0, str(BASE_DIR))
+
+import pytest  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """An engine configured like the application's one, on an empty database."""
+    from database.database import create_app_engine
+
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
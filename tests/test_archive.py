@@ -0,0 +1,39 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+import benchmarks.models  # noqa: F401  (tables de test)
+import models.archive_model  # noqa: F401
+import models.audit_model  # noqa: F401
+from benchmarks.models import BenchCategory, BenchRecord
+from database.archive import ArchiveError, archive_period
+from database.database import Base
+
+
+@pytest.fixture
+def records(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(BenchCategory.__table__), [{"title": "Ventes"}])
+        connection.execute(insert(BenchRecord.__table__), [
+            {"label": f"r{day}", "amount": 10.0, "date": date(2020, 3, day), "category_id": 1} for day in (1, 2, 3)
+        ] + [{"label": "today", "amount": 10.0, "date": date.today(), "category_id": 1}])
+    return BenchRecord.__table__
+
+
+def test_archived_ids_are_not_reused(engine, records, tmp_path):
+    archive_period(BenchRecord, 2020, bind=engine, directory=tmp_path / "archives")
+    with engine.begin() as connection:
+        # Table vidée : sans AUTOINCREMENT, SQLite redonnerait l'id 1, archivé
+        connection.execute(delete(records))
+        connection.execute(insert(records), [{"label": "new", "amount": 1.0, "date": date.today(), "category_id": 1}])
+        assert connection.execute(select(records.c.id)).scalars().all() == [5]
+
+
+def test_archiving_requires_autoincrement(engine, records, tmp_path):
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE bench_records RENAME TO bench_records_old")
+        connection.exec_driver_sql("CREATE TABLE bench_records AS SELECT * FROM bench_records_old")
+    with pytest.raises(ArchiveError, match="AUTOINCREMENT"):
+        archive_period(BenchRecord, 2020, bind=engine, directory=tmp_path / "archives")
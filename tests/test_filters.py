@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+
+from controllers.filters import FilterCompiler, Q
+
+metadata = MetaData()
+items = Table(
+    "items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("label", String),
+    Column("category_id", Integer, nullable=True),
+)
+
+
+def search(compiler, connection, q):
+    statement, parameters = compiler.statement(q)
+    return sorted(row.id for row in connection.execute(statement, parameters))
+
+
+def test_comparison_with_none_tests_for_null():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    compiler = FilterCompiler(items)
+    with engine.begin() as connection:
+        connection.execute(items.insert(), [
+            {"id": 1, "label": "a", "category_id": None},
+            {"id": 2, "label": "b", "category_id": 1},
+            {"id": 3, "label": "c", "category_id": 2},
+        ])
+        assert search(compiler, connection, Q(category_id=None)) == [1]
+        assert search(compiler, connection, Q(category_id__exact=None)) == [1]
+        assert search(compiler, connection, Q(category_id__ne=None)) == [2, 3]
+        # Même forme de filtre avec une valeur : l'instruction en cache ne doit pas être celle de NULL
+        assert search(compiler, connection, Q(category_id=1)) == [2]
+        assert search(compiler, connection, Q(category_id__ne=1)) == [3]
+        assert search(compiler, connection, ~Q(category_id=None) & Q(label__ne="c")) == [2]
+    assert compiler.shape(Q(category_id=None)) == compiler.shape(Q(category_id__isnull=True))
+    assert compiler.shape(Q(category_id=None)) != compiler.shape(Q(category_id=1))
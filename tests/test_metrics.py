@@ -0,0 +1,15 @@
+from utils.metrics import MetricsRegistry
+
+
+def test_statements_are_normalized_and_bounded():
+    registry = MetricsRegistry(max_statements=3)
+    for size in range(1, 50):
+        registry.record_statement(f"SELECT * FROM t WHERE id IN ({', '.join('?' * size)})", "caller", 0.001)
+    statements = registry.top_statements(key="count")
+    assert [(stats["statement"], stats["count"]) for stats in statements] == [
+        ("SELECT * FROM t WHERE id IN (?, ...)", 48), ("SELECT * FROM t WHERE id IN (?)", 1),
+    ]
+
+    for index in range(10):
+        registry.record_statement(f"SELECT {index}", "caller", 0.001)
+    assert len(registry.top_statements(n=100)) == 3
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, insert
+
+from controllers.base_controller import BaseController
+from database.database import engine
+from models.base_model import BaseModel
+
+widgets = pytest.importorskip("pyside6_custom_widgets.table_widget")
+
+
+class SearchItem(BaseModel):
+    __tablename__ = "test_search_items"
+
+    amount = Column(Float, nullable=True)
+    day = Column(Date, nullable=True)
+    paid = Column(Boolean, nullable=True)
+    moment = Column(DateTime, nullable=True)
+
+
+@pytest.fixture(scope="module")
+def controller():
+    SearchItem.__table__.create(engine, checkfirst=True)
+    now = datetime(2024, 3, 1, 10, 0)
+    with engine.begin() as connection:
+        connection.execute(insert(SearchItem.__table__), [
+            {"amount": 1000.0, "day": date(2024, 3, 1), "paid": True, "moment": now, "created_at": now, "updated_at": now},
+            {"amount": 0.1 + 0.2, "day": date(2023, 12, 31), "paid": False, "moment": now.replace(microsecond=5), "created_at": now, "updated_at": now},
+            {"amount": 1e16, "day": None, "paid": None, "moment": None, "created_at": now, "updated_at": now},
+        ])
+    return BaseController(SearchItem)
+
+
+@pytest.mark.parametrize("text", [
+    "True", "false", "none", "1000.0", "0.30000000000000004", "e+16", "2024-03", "10:00:00", "10:00:00.000005", "1", "0", "%", "",
+])
+def test_export_search_matches_screen_search(controller, text):
+    table = SimpleNamespace(meta=controller.meta)
+    instances = list(controller.iter_rows())
+    on_screen = [
+        instance.id for instance in instances
+        if widgets.CustomTableWidget.instance_matches_search(table, instance, text.lower())
+    ]
+    exported = [instance.id for instance in controller.iter_rows(filters=[controller.search_filter(text)])]
+    assert exported == on_screen
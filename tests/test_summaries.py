@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Date, Float, Integer, MetaData, Table, text
+
+from database.summaries import ensure_summaries
+from models.schema_key_model import SchemaKey
+
+
+def fact_table(metadata, summaries):
+    return Table(
+        "facts", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("date", Date, nullable=False),
+        Column("amount", Float, nullable=False),
+        info={"summaries": summaries},
+    )
+
+
+def triggers(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger'")).scalar()
+
+
+def test_summaries_are_only_installed_when_the_declarations_change(engine):
+    SchemaKey.__table__.create(engine)
+    metadata = MetaData()
+    fact_table(metadata, [{"bucket": "month", "date": "date", "sums": ["amount"]}])
+    metadata.create_all(engine)
+
+    assert [summary.name for summary in ensure_summaries(engine, metadata)] == ["facts_month_summary"]
+    assert triggers(engine) == 3
+
+    # Résumé retiré à la main : la clé enregistrée évite de tout revérifier au lancement suivant
+    with engine.begin() as connection:
+        connection.execute(text("DROP TRIGGER facts_month_summary_after_insert"))
+    assert ensure_summaries(engine, metadata) == []
+    assert triggers(engine) == 2
+    assert [summary.name for summary in ensure_summaries(engine, metadata, force=True)] == ["facts_month_summary"]
+
+    # Nouveau résumé déclaré
+    metadata = MetaData()
+    fact_table(metadata, [
+        {"bucket": "month", "date": "date", "sums": ["amount"]},
+        {"bucket": "day", "date": "date", "sums": ["amount"]},
+    ])
+    assert [summary.name for summary in ensure_summaries(engine, metadata)] == ["facts_day_summary"]
+    assert triggers(engine) == 6
+    assert ensure_summaries(engine, metadata) == []
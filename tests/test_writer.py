@@ -0,0 +1,48 @@
+import sqlite3
+
+from sqlalchemy import text
+
+from database.writer import DatabaseWriter
+
+
+def count_rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_batch_is_committed_as_a_whole(engine, session_factory):
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT)")
+    path = engine.url.database
+    writer = DatabaseWriter(session_factory=session_factory, batch_window=0.5)
+    seen = []
+
+    def insert(label):
+        def operation(db_session):
+            db_session.execute(text("INSERT INTO items (label) VALUES (:label)"), {"label": label})
+        return operation
+
+    def observe(db_session):
+        # Une autre connexion, pendant le lot : les savepoints relâchés ne sont pas encore visibles
+        seen.append(count_rows(path))
+
+    def failing(db_session):
+        db_session.execute(text("INSERT INTO items (label) VALUES ('annulé')"))
+        raise ValueError("rolled back")
+
+    try:
+        futures = [
+            writer.submit(insert("a")), writer.submit(insert("b")), writer.submit(failing),
+            writer.submit(observe), writer.submit(insert("c")),
+        ]
+        for future in futures[:2] + futures[3:]:
+            future.result(timeout=5)
+        assert isinstance(futures[2].exception(timeout=5), ValueError)
+        assert seen == [0]
+        assert count_rows(path) == 3
+        assert writer.stats()["commits"] == 1
+    finally:
+        writer.stop()
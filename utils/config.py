@@ -0,0 +1,176 @@
+"""
+Application configuration (`config.json`) and current user.
+
+`get_config()` returns the `ConfigService` of the application: the file is parsed once and
+kept in memory, writes replace it atomically (temporary file, then rename) so a crash never
+leaves a truncated file, and `watch()` reloads it when another process edits it.
+
+The user performing the changes is the one signed in during this session (`set_current_user`);
+without a sign-in (command line tools), the last signed-in user stored in the configuration.
+
+Usage:
+    get_config().get("fiscal_year_start_month", 1)
+    get_config().update(fiscal_year_start_month=7)
+    current_user_id()
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_FILE = Path(os.environ.get("APP_CONFIG_FILE", BASE_DIR / "config.json"))
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigService:
+    """
+    In-memory copy of a JSON configuration file.
+
+    Args:
+        path (Path, optional): The configuration file. Defaults to `CONFIG_FILE`.
+    """
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = Path(path)
+        self.listeners = []
+        self.watcher = None
+        self._data = {}
+        self._signature = None
+        self._lock = threading.RLock()
+        self.reload()
+
+    def _file_signature(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        """
+        Parse the file again if it changed since it was read.
+
+        Returns:
+            bool: True if the configuration changed.
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature:
+                return False
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8")) if signature else {}
+            except (OSError, ValueError) as e:
+                # Fichier en cours d'écriture par un autre programme : on garde la version connue
+                logger.warning(f"Cannot read {self.path}: {e}")
+                return False
+            self._signature = signature
+            changed = data != self._data
+            self._data = data
+        if changed:
+            for listener in list(self.listeners):
+                listener(self.data())
+        return changed
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def data(self):
+        """Return a copy of the configuration."""
+        with self._lock:
+            return dict(self._data)
+
+    def update(self, **values):
+        """
+        Set configuration values and write the file atomically. Nothing is written if the values are unchanged.
+        """
+        with self._lock:
+            data = {**self._data, **values}
+            if data == self._data and self.path.exists():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            try:
+                # mkstemp crée le fichier en 0600 : on garde les droits du fichier remplacé
+                os.chmod(temp_path, self.path.stat().st_mode & 0o777 if self.path.exists() else 0o644)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+            self._data = data
+            self._signature = self._file_signature()
+
+    def on_change(self, listener):
+        """Call `listener(data)` whenever the file is changed by another program."""
+        self.listeners.append(listener)
+
+    def watch(self):
+        """
+        Reload the configuration when the file changes. Needs a running Qt application.
+        """
+        from pyside6_imports import QFileSystemWatcher
+
+        if self.watcher is not None:
+            return
+        self.watcher = QFileSystemWatcher()
+        # Le dossier aussi : un remplacement atomique (rename) retire le fichier surveillé
+        self.watcher.addPath(str(self.path.parent))
+        if self.path.exists():
+            self.watcher.addPath(str(self.path))
+        self.watcher.fileChanged.connect(self._on_file_changed)
+        self.watcher.directoryChanged.connect(self._on_file_changed)
+
+    def _on_file_changed(self, _path):
+        if self.path.exists() and str(self.path) not in self.watcher.files():
+            self.watcher.addPath(str(self.path))
+        self.reload()
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_config():
+    """
+    Return the application-wide `ConfigService`, reading the file on first use.
+    """
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = ConfigService()
+        return _config
+
+
+_current_user = None
+
+
+def set_current_user(user_id, user_name=None):
+    """
+    Set the user of this session and remember them as the last signed-in user.
+    """
+    global _current_user
+    _current_user = (user_id, user_name)
+    get_config().update(user_id=user_id, user_name=user_name)
+
+
+def clear_current_user():
+    """Forget the user of this session (sign out)."""
+    global _current_user
+    _current_user = None
+
+
+def current_user_id():
+    """
+    Return the id of the user of this session, or of the last signed-in user.
+    """
+    if _current_user is not None:
+        return _current_user[0]
+    return get_config().get("user_id")
@@ -0,0 +1,232 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+# Caractères de contrôle interdits en XML
+XML_INVALID_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class ExportCancelled(Exception):
+    """Exception raised when an export is cancelled; the partial file is removed."""
+    pass
+
+
+class BaseExporter:
+    """
+    Streams the records of a controller to a file, `batch_size` rows at a time.
+
+    The exported columns and headers are those of the table view (see `models.meta`);
+    foreign keys are exported with their display column.
+
+    Args:
+        controller (BaseController): The controller of the exported model.
+        path (str or Path): The destination file.
+        filters (dict, Q or iterable, optional): Filters passed to `BaseController.iter_rows`.
+        order (list of str, optional): Order passed to `BaseController.iter_rows`.
+        batch_size (int, optional): Rows fetched per batch. Defaults to 1000.
+        progress (callable, optional): Called with (exported rows, total rows) after each batch.
+        is_cancelled (callable, optional): Returns True to stop the export.
+    """
+
+    def __init__(self, controller, path, filters=None, order=None, batch_size=1000, progress=None, is_cancelled=None):
+        self.controller = controller
+        self.path = Path(path)
+        self.filters = filters
+        self.order = order
+        self.batch_size = batch_size
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+        self.columns = controller.meta.table_columns
+
+    @property
+    def headers(self):
+        return [column.verbose_name for column in self.columns]
+
+    def row_values(self, instance):
+        values = []
+        for column in self.columns:
+            value = getattr(instance, column.name, None)
+            if column.related_column:
+                related_instance = getattr(instance, column.relationship_name, None)
+                value = getattr(related_instance, column.related_column, None) if related_instance else None
+            values.append(value)
+        return values
+
+    def rows(self):
+        """
+        Yield the value lists of the exported records, reporting progress and checking for cancellation.
+        """
+        total = self.controller.count(self.filters)
+        if self.progress:
+            self.progress(0, total)
+        for index, instance in enumerate(self.controller.iter_rows(self.filters, self.order, self.batch_size), start=1):
+            yield self.row_values(instance)
+            if index % self.batch_size == 0:
+                if self.is_cancelled and self.is_cancelled():
+                    raise ExportCancelled("Export cancelled.")
+                if self.progress:
+                    self.progress(index, total)
+        if self.progress:
+            self.progress(total, total)
+
+    def export(self):
+        """
+        Write the file.
+
+        Returns:
+            int: The number of exported rows.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            return self.write()
+        except BaseException:
+            self.path.unlink(missing_ok=True)
+            raise
+
+    def write(self):
+        raise NotImplementedError
+
+
+class CsvExporter(BaseExporter):
+    """
+    Exports to CSV (UTF-8 with BOM and ";" separator, as expected by a French Excel).
+    """
+
+    delimiter = ";"
+
+    def write(self):
+        count = 0
+        with self.path.open("w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=self.delimiter)
+            writer.writerow(self.headers)
+            for values in self.rows():
+                writer.writerow(["" if value is None else self.format_value(value) for value in values])
+                count += 1
+        return count
+
+    def format_value(self, value):
+        if isinstance(value, datetime):
+            return value.strftime("%d/%m/%Y %H:%M:%S")
+        if isinstance(value, date):
+            return value.strftime("%d/%m/%Y")
+        return value
+
+
+class XlsxExporter(BaseExporter):
+    """
+    Exports to XLSX without third-party library: the worksheet XML is streamed into the zip
+    archive row by row (inline strings, no shared strings table), so memory stays constant.
+    """
+
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    # Styles : 0 = défaut, 1 = date, 2 = date et heure, 3 = en-tête en gras
+    styles = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="2"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/><numFmt numFmtId="165" formatCode="dd/mm/yyyy hh:mm:ss"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs>'
+        '</styleSheet>'
+    )
+
+    def __init__(self, controller, path, sheet_name="Export", **kwargs):
+        super().__init__(controller, path, **kwargs)
+        self.sheet_name = sheet_name
+
+    def workbook(self):
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(self.sheet_name[:31], {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        )
+
+    @staticmethod
+    def cell(value, style=0):
+        if value is None:
+            return "<c/>"
+        if isinstance(value, bool):
+            return f'<c t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float)):
+            return f"<c><v>{value!r}</v></c>"
+        if isinstance(value, datetime):
+            serial = (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+            return f'<c s="2"><v>{serial!r}</v></c>'
+        if isinstance(value, date):
+            return f'<c s="1"><v>{(value - EXCEL_EPOCH.date()).days}</v></c>'
+        text = escape(XML_INVALID_CHARS_RE.sub("", str(value)))
+        style_attribute = f' s="{style}"' if style else ""
+        return f'<c t="inlineStr"{style_attribute}><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def write(self):
+        count = 0
+        with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("[Content_Types].xml", self.content_types)
+            archive.writestr("_rels/.rels", self.root_rels)
+            archive.writestr("xl/workbook.xml", self.workbook())
+            archive.writestr("xl/_rels/workbook.xml.rels", self.workbook_rels)
+            archive.writestr("xl/styles.xml", self.styles)
+
+            with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                header = "".join(self.cell(header, style=3) for header in self.headers)
+                sheet.write(f"<row>{header}</row>".encode("utf-8"))
+                for values in self.rows():
+                    sheet.write(f"<row>{''.join(self.cell(value) for value in values)}</row>".encode("utf-8"))
+                    count += 1
+                sheet.write(b"</sheetData></worksheet>")
+        return count
+
+
+EXPORTERS = {".csv": CsvExporter, ".xlsx": XlsxExporter}
+
+
+def exporter_for(path, controller, **kwargs):
+    """
+    Return the exporter matching the extension of `path` (".csv" or ".xlsx").
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in EXPORTERS:
+        raise ValueError(f"Unsupported export format '{suffix}', expected one of {', '.join(EXPORTERS)}.")
+    return EXPORTERS[suffix](controller, path, **kwargs)
@@ -0,0 +1,131 @@
+"""
+Idle-time database maintenance.
+
+`IdleMaintenance` watches the user input of the whole application. Once the user has been idle
+for `idle_after` seconds and the writer queue is empty, the due maintenance tasks
+(see `database.maintenance`) run in a background thread within a time budget; any input
+interrupts them so the application answers at once.
+"""
+import logging
+import os
+import threading
+import time
+
+from database.maintenance import MaintenanceRunner
+from pyside6_imports import QEvent, QObject, QTimer
+
+# Secondes d'inactivité avant de lancer la maintenance, et budget d'une passe
+IDLE_AFTER = float(os.environ.get("APP_MAINTENANCE_IDLE_AFTER", 120))
+MAINTENANCE_BUDGET = float(os.environ.get("APP_MAINTENANCE_BUDGET", 2.0))
+
+INPUT_EVENTS = frozenset({
+    QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease, QEvent.Type.MouseMove,
+    QEvent.Type.KeyPress, QEvent.Type.KeyRelease, QEvent.Type.Wheel,
+    QEvent.Type.TouchBegin, QEvent.Type.TouchUpdate,
+})
+
+logger = logging.getLogger(__name__)
+
+
+class IdleMaintenance(QObject):
+    """
+    Runs the database maintenance while the user is idle.
+
+    Args:
+        idle_after (float, optional): Idle seconds before a run. Defaults to `IDLE_AFTER`.
+        budget (float, optional): Time budget of a run in seconds. Defaults to `MAINTENANCE_BUDGET`.
+        check_interval (int, optional): Milliseconds between two idle checks. Defaults to 5000.
+        runner (MaintenanceRunner, optional): Defaults to a runner on the application database.
+    """
+
+    def __init__(self, idle_after=IDLE_AFTER, budget=MAINTENANCE_BUDGET, check_interval=5000, runner=None, parent=None):
+        super().__init__(parent)
+        self.idle_after = idle_after
+        self.budget = budget
+        self.runner = runner or MaintenanceRunner()
+        self.last_input = time.monotonic()
+        self.last_run = None
+        self.thread = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(check_interval)
+        self.timer.timeout.connect(self.check)
+
+    def start(self):
+        from pyside6_imports import QApplication
+        QApplication.instance().installEventFilter(self)
+        self.timer.start()
+
+    def stop(self):
+        from pyside6_imports import QApplication
+        self.timer.stop()
+        app = QApplication.instance()
+        if app is not None:
+            app.removeEventFilter(self)
+        self.runner.cancel()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def eventFilter(self, watched, event):
+        # Appelé pour chaque événement de l'application : rester minimal
+        if event.type() in INPUT_EVENTS:
+            self.last_input = time.monotonic()
+            if self.runner.running:
+                self.runner.cancel()
+        return False
+
+    def idle_for(self):
+        """Return the seconds since the last user input."""
+        return time.monotonic() - self.last_input
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def check(self):
+        """Start a run if the user is idle, the writer is idle and a task is due."""
+        if self.is_running() or self.idle_for() < self.idle_after or not self.runner.due_tasks():
+            return
+        from database.writer import get_writer
+        if get_writer().queue_depth():
+            return
+        self.run_now()
+
+    def run_now(self, force=False):
+        """
+        Start a maintenance run in the background, unless one is running.
+
+        Args:
+            force (bool, optional): Run every task, due or not. Defaults to False.
+        """
+        if self.is_running():
+            return
+        self.thread = threading.Thread(target=self._run, args=(force,), name="db-maintenance", daemon=True)
+        self.thread.start()
+
+    def _run(self, force):
+        try:
+            self.runner.run(budget=self.budget, force=force)
+        except Exception:
+            logger.exception("Database maintenance failed")
+        self.last_run = time.time()
+
+
+_maintenance = None
+
+
+def install_idle_maintenance(**kwargs):
+    """
+    Create and start the idle-time maintenance. Must be called from the GUI thread.
+
+    Returns:
+        IdleMaintenance: The running scheduler.
+    """
+    global _maintenance
+    if _maintenance is None:
+        _maintenance = IdleMaintenance(**kwargs)
+        _maintenance.start()
+    return _maintenance
+
+
+def get_idle_maintenance():
+    """Return the running idle-time maintenance, or None."""
+    return _maintenance
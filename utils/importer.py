@@ -0,0 +1,424 @@
+"""
+CSV import pipeline.
+
+The file is streamed in chunks. Headers are mapped to columns through `info['verbose_name']`
+(or the column name), every chunk is validated column by column, foreign key labels are
+resolved with one query per column and chunk, and the valid rows are inserted by the
+database writer with executemany inside a savepoint: a failing chunk is split in halves
+until the rows violating a constraint are isolated, so they are reported without aborting
+the rest of the chunk.
+
+Usage:
+    python -m utils.importer <table|module:Model> <file.csv> [--chunk-size 1000] [--errors errors.csv]
+"""
+import argparse
+import csv
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, Numeric, String, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from database.database import SessionLocal
+from database.audit import audit_entry
+from utils.config import current_user_id
+
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+DATETIME_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+TRUE_VALUES = {"1", "true", "vrai", "oui", "yes", "o", "y"}
+FALSE_VALUES = {"0", "false", "faux", "non", "no", "n"}
+# Nombre maximal de valeurs dans une clause IN (limite des variables SQLite)
+IN_CLAUSE_SIZE = 500
+
+
+class CsvImportError(Exception):
+    """Exception raised when a file cannot be imported at all (e.g. a required column is missing)."""
+    pass
+
+
+def normalize_header(text):
+    return " ".join(text.replace("(*)", "").strip().lower().split())
+
+
+def parse_number(text, number_type):
+    # "1 234,56" (espaces insécables compris), "1.234,56" ou "1234.56"
+    text = "".join(text.split())
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    return number_type(text)
+
+
+def parse_date(text, formats, with_time):
+    for date_format in formats:
+        try:
+            value = datetime.strptime(text, date_format)
+            return value if with_time else value.date()
+        except ValueError:
+            continue
+    value = datetime.fromisoformat(text)
+    return value if with_time else value.date()
+
+
+class ImportReport:
+    """
+    Result of an import: counters and the rejected lines with their reason.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lines = 0
+        self.inserted = 0
+        self.errors = []
+        self.ignored_headers = []
+
+    def add_error(self, line, column, message):
+        self.errors.append((line, column, message))
+
+    @property
+    def rejected(self):
+        return len({line for line, _, _ in self.errors})
+
+    def write_errors(self, path):
+        """
+        Write the rejected lines to a CSV file (line, column, message).
+        """
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["Ligne", "Colonne", "Erreur"])
+            writer.writerows(sorted(self.errors, key=lambda error: error[0]))
+
+    def summary(self):
+        return f"{self.inserted} lignes importées, {self.rejected} rejetées sur {self.lines} lues."
+
+
+class CsvImporter:
+    """
+    Imports a CSV file into the table of a controller's model.
+
+    Args:
+        controller (BaseController): The controller of the imported model.
+        path (str or Path): The CSV file (UTF-8, ";" or "," separated, with a header line).
+        chunk_size (int, optional): Rows validated and inserted together. Defaults to 1000.
+        progress (callable, optional): Called with (bytes read, file size) after each chunk.
+        is_cancelled (callable, optional): Returns True to stop the import after the current chunk.
+    """
+
+    def __init__(self, controller, path, chunk_size=1000, progress=None, is_cancelled=None):
+        self.controller = controller
+        self.model = controller.model
+        self.table = controller.model.__table__
+        self.meta = controller.meta
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+        self.report = ImportReport(path)
+
+    def importable_columns(self):
+        return [column for column in self.meta.columns if not column.is_primary_key and column.editable]
+
+    def map_headers(self, headers):
+        """
+        Map the CSV headers to columns, by verbose name or column name (case-insensitive).
+
+        Returns:
+            list: For each header, the `ColumnMeta` it maps to, or None when ignored.
+
+        Raises:
+            CsvImportError: If a required column has no header.
+        """
+        by_label = {}
+        for column in self.importable_columns():
+            by_label[normalize_header(column.name)] = column
+            by_label[normalize_header(column.verbose_name)] = column
+
+        mapping = [by_label.get(normalize_header(header)) for header in headers]
+        self.report.ignored_headers = [header for header, column in zip(headers, mapping) if column is None]
+
+        mapped = {column.name for column in mapping if column is not None}
+        missing = [
+            column.verbose_name for column in self.importable_columns()
+            if column.required and column.column.default is None and column.column.server_default is None and column.name not in mapped
+        ]
+        if missing:
+            raise CsvImportError(f"Missing required column(s): {', '.join(missing)}.")
+        return mapping
+
+    def converter(self, column):
+        """
+        Return the function converting a CSV text to the value of `column`.
+        """
+        column_type = column.column.type
+        if isinstance(column_type, Boolean):
+            def convert(text):
+                lowered = text.lower()
+                if lowered in TRUE_VALUES:
+                    return True
+                if lowered in FALSE_VALUES:
+                    return False
+                raise ValueError(f"'{text}' is not a boolean")
+            return convert
+        if isinstance(column_type, DateTime):
+            return lambda text: parse_date(text, DATETIME_FORMATS + DATE_FORMATS, with_time=True)
+        if isinstance(column_type, Date):
+            return lambda text: parse_date(text, DATE_FORMATS, with_time=False)
+        if isinstance(column_type, (Float, Numeric)):
+            return lambda text: parse_number(text, float)
+        if isinstance(column_type, Integer):
+            return lambda text: parse_number(text, int)
+        if isinstance(column_type, Enum):
+            enums = set(column_type.enums)
+
+            def convert(text):
+                if text not in enums:
+                    raise ValueError(f"'{text}' is not one of {', '.join(column_type.enums)}")
+                return text
+            return convert
+
+        length = getattr(column_type, "length", None) if isinstance(column_type, String) else None
+
+        def convert(text):
+            if length and len(text) > length:
+                raise ValueError(f"longer than {length} characters")
+            return text
+        return convert
+
+    def validate_chunk(self, chunk, mapping):
+        """
+        Convert and validate a chunk column by column.
+
+        Args:
+            chunk (list of tuple): (line number, CSV values) pairs.
+            mapping (list): The header mapping returned by `map_headers`.
+
+        Returns:
+            list of tuple: (line number, values dict) of the valid rows.
+        """
+        rows = {line: {} for line, _ in chunk}
+        invalid = set()
+
+        for index, column in enumerate(mapping):
+            if column is None:
+                continue
+            texts = [(line, values[index].strip() if index < len(values) else "") for line, values in chunk]
+
+            if column.is_foreign_key:
+                converted = self.resolve_foreign_keys(column, texts)
+            else:
+                convert = self.converter(column)
+                converted = {}
+                for line, text in texts:
+                    if not text:
+                        converted[line] = None
+                        continue
+                    try:
+                        converted[line] = convert(text)
+                    except ValueError as e:
+                        self.report.add_error(line, column.verbose_name, f"Invalid value '{text}': {e}")
+                        invalid.add(line)
+
+            for line, text in texts:
+                if line in invalid or line not in converted:
+                    invalid.add(line)
+                    continue
+                value = converted[line]
+                if value is None and column.required:
+                    self.report.add_error(line, column.verbose_name, "Required value is missing")
+                    invalid.add(line)
+                    continue
+                rows[line][column.name] = value
+
+        return [(line, values) for line, values in rows.items() if line not in invalid]
+
+    def resolve_foreign_keys(self, column, texts):
+        """
+        Resolve the foreign key values of a chunk with one lookup: labels of the display column
+        (`info['related_column']`) or, without display column, ids of the referenced table.
+
+        Returns:
+            dict: Line number -> referenced id (None for empty values). Unresolved lines are left out and reported.
+        """
+        target = next(iter(column.column.foreign_keys)).column
+        by_label = bool(column.related_column)
+        lookup_column = target.table.c[column.related_column] if by_label else target
+
+        keys = {}
+        for line, text in texts:
+            if not text:
+                continue
+            try:
+                keys[line] = text if by_label else parse_number(text, int)
+            except ValueError:
+                keys[line] = None
+
+        found = {}
+        values = list({key for key in keys.values() if key is not None})
+        with SessionLocal() as db_session:
+            for start in range(0, len(values), IN_CLAUSE_SIZE):
+                part = values[start:start + IN_CLAUSE_SIZE]
+                found.update(db_session.execute(select(lookup_column, target).where(lookup_column.in_(part))).all())
+
+        converted = {}
+        for line, text in texts:
+            if not text:
+                converted[line] = None
+            elif keys[line] in found:
+                converted[line] = found[keys[line]]
+            else:
+                self.report.add_error(line, column.verbose_name, f"Unknown value '{text}'")
+        return converted
+
+    def insert_rows(self, db_session, rows):
+        """
+        Insert rows with executemany in a savepoint. When a constraint fails, the savepoint is
+        rolled back and the rows are inserted again in two halves, down to the failing rows.
+
+        Returns:
+            tuple: (inserted (line, id) pairs, rejected (line, message) pairs).
+        """
+        savepoint = db_session.begin_nested()
+        try:
+            statement = insert(self.table).returning(self.table.c.id, sort_by_parameter_order=True)
+            ids = db_session.execute(statement, [values for _, values in rows]).scalars().all()
+            savepoint.commit()
+            return list(zip((line for line, _ in rows), ids)), []
+        except IntegrityError as e:
+            savepoint.rollback()
+            if len(rows) == 1:
+                return [], [(rows[0][0], str(e.orig))]
+            middle = len(rows) // 2
+            first_inserted, first_rejected = self.insert_rows(db_session, rows[:middle])
+            second_inserted, second_rejected = self.insert_rows(db_session, rows[middle:])
+            return first_inserted + second_inserted, first_rejected + second_rejected
+
+    def submit_chunk(self, rows):
+        """
+        Queue the insertion of validated rows, with their audit entries, to the database writer.
+
+        Returns:
+            Future: Resolved with the `insert_rows` result.
+        """
+        user_id = current_user_id()
+        source = self.path.name
+        table_name = self.table.name
+
+        def operation(db_session):
+            inserted, rejected = self.insert_rows(db_session, rows)
+            self.controller.action_logger.log_many([
+                audit_entry("import", user_id, table_name, record_id, description=f"Imported from {source}, line {line}")
+                for line, record_id in inserted
+            ], db_session)
+            return inserted, rejected
+
+        return self.controller.writer.submit(operation)
+
+    def collect(self, future):
+        inserted, rejected = future.result()
+        self.report.inserted += len(inserted)
+        for line, message in rejected:
+            self.report.add_error(line, None, message)
+
+    def run(self):
+        """
+        Import the file.
+
+        Returns:
+            ImportReport: The counters and rejected lines.
+
+        Raises:
+            CsvImportError: If the file has no header or a required column is missing.
+        """
+        file_size = self.path.stat().st_size
+        pending = None
+
+        with self.path.open(newline="", encoding="utf-8-sig") as f:
+            sample = f.readline()
+            f.seek(0)
+            delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+            reader = csv.reader(f, delimiter=delimiter)
+
+            headers = next(reader, None)
+            if not headers:
+                raise CsvImportError("The file is empty.")
+            mapping = self.map_headers(headers)
+
+            chunk = []
+            for values in reader:
+                if not any(value.strip() for value in values):
+                    continue
+                chunk.append((reader.line_num, values))
+                if len(chunk) < self.chunk_size:
+                    continue
+
+                # Le chunk précédent est inséré par le writer pendant la validation de celui-ci
+                pending = self.process_chunk(chunk, mapping, pending)
+                chunk = []
+                if self.progress:
+                    self.progress(f.buffer.tell() if hasattr(f, "buffer") else 0, file_size)
+                if self.is_cancelled and self.is_cancelled():
+                    break
+            else:
+                if chunk:
+                    pending = self.process_chunk(chunk, mapping, pending)
+
+        if pending is not None:
+            self.collect(pending)
+        if self.progress:
+            self.progress(file_size, file_size)
+        return self.report
+
+    def process_chunk(self, chunk, mapping, pending):
+        self.report.lines += len(chunk)
+        rows = self.validate_chunk(chunk, mapping)
+        if pending is not None:
+            self.collect(pending)
+        return self.submit_chunk(rows) if rows else None
+
+
+def resolve_model(name):
+    """
+    Find a model class from a table name (e.g. "users") or a model path (e.g. "models.user:User").
+    """
+    from database.database import Base
+    from database.generate_data import resolve_table
+
+    table = resolve_table(name)
+    for mapper in Base.registry.mappers:
+        if mapper.local_table is table:
+            return mapper.class_
+    raise ValueError(f"No model is mapped to the table '{table.name}'.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a CSV file into a model table.")
+    parser.add_argument("model", help='Table name (e.g. "users") or model path (e.g. "models.user:User").')
+    parser.add_argument("file", help="The CSV file, with a header line of verbose names or column names.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and inserted together (default: 1000).")
+    parser.add_argument("--errors", default=None, help="Write the rejected lines to this CSV file.")
+    args = parser.parse_args(argv)
+
+    from controllers.base_controller import BaseController
+
+    controller = BaseController(resolve_model(args.model))
+    try:
+        report = CsvImporter(controller, args.file, chunk_size=args.chunk_size).run()
+    except CsvImportError as e:
+        print(f"Import failed: {e}")
+        return 1
+    finally:
+        controller.writer.stop()
+
+    print(report.summary())
+    if report.ignored_headers:
+        print(f"Ignored columns: {', '.join(report.ignored_headers)}")
+    for line, column, message in report.errors[:20]:
+        print(f"  line {line}{f' ({column})' if column else ''}: {message}")
+    if args.errors and report.errors:
+        report.write_errors(args.errors)
+        print(f"Rejected lines written to {args.errors}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
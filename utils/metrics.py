@@ -0,0 +1,123 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# Nombre de requêtes distinctes suivies ; au-delà, la moins récemment exécutée est oubliée
+MAX_STATEMENTS = 1000
+
+PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+REPEATED_GROUP_RE = re.compile(r"(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\1)+")
+
+
+@lru_cache(maxsize=MAX_STATEMENTS)
+def normalize_statement(statement):
+    """
+    Collapse the placeholder lists of a SQL text, so `IN (?, ?, ?)` of any length and
+    multi-row `VALUES (...), (...)` each count as one statement: `IN (?, ...)`, `VALUES (?, ...), ...`.
+    """
+    statement = PLACEHOLDER_LIST_RE.sub("(?, ...)", statement)
+    return REPEATED_GROUP_RE.sub(r"\1, ...", statement)
+
+
+class StatementStats:
+    """
+    Aggregated timings of one SQL statement issued from one caller.
+    """
+
+    def __init__(self, statement, caller):
+        self.statement = statement
+        self.caller = caller
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "statement": self.statement,
+            "caller": self.caller,
+            "count": self.count,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "max_time": self.max_time,
+            "rows": self.rows,
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the application metrics.
+
+    Statement timings are aggregated per (statement, caller), placeholder lists collapsed
+    (see `normalize_statement`), for at most `max_statements` statements; gauges hold the last
+    value reported by a component (e.g. the writer queue depth).
+    """
+
+    def __init__(self, max_statements=MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._statements = OrderedDict()
+        self._gauges = {}
+
+    def record_statement(self, statement, caller, duration, rows=None):
+        """
+        Record one execution of a SQL statement.
+
+        Args:
+            statement (str): The SQL text.
+            caller (str): The controller method that issued it (or None).
+            duration (float): The execution time, in seconds.
+            rows (int, optional): The number of rows affected, when known.
+        """
+        statement = normalize_statement(statement)
+        key = (statement, caller)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats(statement, caller)
+                if len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+            else:
+                self._statements.move_to_end(key)
+            stats.count += 1
+            stats.total_time += duration
+            if duration > stats.max_time:
+                stats.max_time = duration
+            if rows is not None and rows > 0:
+                stats.rows += rows
+
+    def top_statements(self, n=20, key="total_time"):
+        """
+        Return the `n` statements with the highest `key`.
+
+        Args:
+            n (int, optional): Number of statements. Defaults to 20.
+            key (str, optional): "total_time", "mean_time", "max_time" or "count". Defaults to "total_time".
+
+        Returns:
+            list of dict: The statements statistics, highest first.
+        """
+        with self._lock:
+            statements = [stats.as_dict() for stats in self._statements.values()]
+        return sorted(statements, key=lambda stats: stats[key], reverse=True)[:n]
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def gauges(self):
+        with self._lock:
+            return dict(self._gauges)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._gauges.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,161 @@
+"""
+Single instance of the application.
+
+Launching the application while it already runs (a launcher double-clicked again and again)
+must neither pay the whole startup again nor open the database from a second process.
+`forward_to_running_instance` runs first in `app.main`: it connects to the local server of the
+running instance with a plain socket (no Qt import, about a millisecond), sends its arguments,
+and the new process exits. The running instance (`SingleInstanceServer`, a `QLocalServer`)
+then brings its window, `SignIn` or `MainWindow`, to the front.
+
+The server name is derived from the installation, the database and the user, so two
+installations or two users never share it. Set `APP_SINGLE_INSTANCE=0` to allow several instances.
+"""
+import getpass
+import hashlib
+import json
+import logging
+import os
+import socket
+import tempfile
+
+from utils.config import BASE_DIR
+
+# Taille maximale d'un message : une liste d'arguments
+MAX_MESSAGE_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def server_name():
+    """
+    Return the name of the local server: a socket path on Unix, a pipe name on Windows.
+    """
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = ""
+    key = f"{BASE_DIR}|{os.environ.get('APP_DATABASE_URL', '')}|{user}"
+    name = f"gestion-caisse-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+    # Chemin complet sous Unix : le client se connecte sans Qt, au même endroit que QLocalServer
+    return name if os.name == "nt" else os.path.join(tempfile.gettempdir(), name)
+
+
+def forward_to_running_instance(args, timeout=0.5):
+    """
+    Send `args` to the running instance, if any.
+
+    Args:
+        args (list of str): The command line arguments (without the program).
+        timeout (float, optional): Seconds to wait for the running instance. Defaults to 0.5.
+
+    Returns:
+        bool: True if an instance received the arguments (this process should exit).
+    """
+    data = (json.dumps(list(args)) + "\n").encode("utf-8")
+    name = server_name()
+    try:
+        if os.name == "nt":
+            import ctypes
+            # Lancé par l'utilisateur, ce processus a le premier plan : il autorise l'instance à le prendre
+            ctypes.windll.user32.AllowSetForegroundWindow(-1)
+            with open(rf"\\.\pipe\{name}", "wb", buffering=0) as pipe:
+                pipe.write(data)
+        else:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(timeout)
+                client.connect(name)
+                client.sendall(data)
+    except OSError:
+        return False
+    return True
+
+
+class SingleInstanceServer:
+    """
+    Local server of the running instance: receives the arguments of the later launches.
+    """
+
+    def __init__(self):
+        self.name = server_name()
+        self.server = None
+        self.listeners = []
+
+    def on_message(self, listener):
+        """Call `listener(args)` with the arguments of each later launch."""
+        self.listeners.append(listener)
+
+    def listen(self, args=()):
+        """
+        Start listening. Call it right after creating the `QApplication`.
+
+        Args:
+            args (list of str, optional): The arguments of this launch, forwarded if another
+                instance started at the same time and is already listening.
+
+        Returns:
+            bool: False if another instance is running (this process should exit).
+        """
+        from pyside6_imports import QLocalServer
+
+        self.server = QLocalServer()
+        if not self.server.listen(self.name):
+            # Deux lancements simultanés : le premier à écouter garde la main
+            if forward_to_running_instance(args):
+                return False
+            # Socket laissée par une instance arrêtée brutalement
+            QLocalServer.removeServer(self.name)
+            if not self.server.listen(self.name):
+                logger.warning(f"Cannot listen on {self.name}: {self.server.errorString()}")
+                return True
+        self.server.newConnection.connect(self._on_new_connection)
+        return True
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            buffer = bytearray()
+            connection.readyRead.connect(lambda connection=connection, buffer=buffer: self._read(connection, buffer))
+            connection.disconnected.connect(connection.deleteLater)
+            if connection.bytesAvailable():
+                self._read(connection, buffer)
+
+    def _read(self, connection, buffer):
+        buffer += connection.readAll().data()
+        if b"\n" not in buffer:
+            if len(buffer) > MAX_MESSAGE_SIZE:
+                connection.abort()
+            return
+        line = bytes(buffer).split(b"\n", 1)[0]
+        buffer.clear()
+        connection.disconnectFromServer()
+        try:
+            args = json.loads(line)
+        except ValueError:
+            logger.warning("Invalid message received by the single instance server")
+            return
+        logger.info(f"Launched again with {args}")
+        for listener in list(self.listeners):
+            listener(args)
+
+
+def bring_to_front():
+    """
+    Show the visible windows of the application on top of the others, dialogs last.
+    """
+    from pyside6_imports import QApplication, Qt
+
+    windows = [
+        widget for widget in QApplication.topLevelWidgets()
+        if widget.isVisible() and widget.windowType() in (Qt.WindowType.Window, Qt.WindowType.Dialog)
+    ]
+    windows.sort(key=lambda widget: widget.windowType() == Qt.WindowType.Dialog)
+    for window in windows:
+        if window.isMinimized():
+            window.showNormal()
+        window.raise_()
+        window.activateWindow()
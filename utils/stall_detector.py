@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from pyside6_imports import QObject, QTimer
+from utils.metrics import registry
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STALL_REPORT_FILE = Path(os.environ.get("APP_STALL_REPORT", BASE_DIR / "logs" / "stalls.json"))
+# Durée (en millisecondes) de blocage de la boucle d'événements signalée comme un gel
+STALL_THRESHOLD_MS = float(os.environ.get("APP_STALL_THRESHOLD_MS", 250))
+
+logger = logging.getLogger("ui.stall")
+
+
+def is_project_file(filename):
+    return filename.startswith(str(BASE_DIR)) and "site-packages" not in filename
+
+
+def frame_name(frame):
+    """
+    Return "Class.method" for a method frame (using the class of `self`), the qualified name otherwise.
+    """
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", code.co_name)
+    instance = frame.f_locals.get("self")
+    if instance is not None and "." in qualname and "<locals>" not in qualname:
+        qualname = f"{type(instance).__name__}.{qualname.split('.', 1)[1]}"
+    return qualname
+
+
+def stack_frames(frame):
+    """
+    Return the frames of a stack, outermost first.
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class Stall:
+    """
+    One blocking of the event loop, with the stack samples taken while it lasted.
+    """
+
+    def __init__(self, started_at, loop_depth):
+        self.started_at = started_at
+        self.started_on = datetime.now()
+        self.loop_depth = loop_depth
+        self.duration = 0.0
+        self.samples = 0
+        self.slots = Counter()
+        self.hotspots = Counter()
+        self.functions = Counter()
+
+    def add_sample(self, frame):
+        """
+        Record one stack sample of the GUI thread.
+
+        The frames below `loop_depth` belong to the code running the event loop, the first
+        frame above is the slot called by Qt.
+        """
+        frames = stack_frames(frame)[self.loop_depth:]
+        if not frames:
+            return
+        self.samples += 1
+        self.slots[frame_name(frames[0])] += 1
+
+        project_frames = [f for f in frames if is_project_file(f.f_code.co_filename)]
+        if project_frames:
+            innermost = project_frames[-1]
+            self.hotspots[f"{frame_name(innermost)} ({Path(innermost.f_code.co_filename).name}:{innermost.f_lineno})"] += 1
+        for name in {frame_name(f) for f in project_frames}:
+            self.functions[name] += 1
+
+    @property
+    def slot(self):
+        return self.slots.most_common(1)[0][0] if self.slots else "<unknown>"
+
+    def as_dict(self):
+        return {
+            "started_on": self.started_on.isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 1),
+            "slot": self.slot,
+            "samples": self.samples,
+            "hotspots": self.hotspots.most_common(5),
+            "functions": self.functions.most_common(10),
+        }
+
+
+class StallDetector(QObject):
+    """
+    Watchdog measuring the Qt event-loop latency.
+
+    A heartbeat `QTimer` running in the GUI thread records when the event loop last served
+    it. A monitor thread checks that timestamp: when the loop has not come back for more
+    than `threshold` seconds, it samples the GUI thread's Python stack (`sys._current_frames`)
+    until the loop is free again, then logs a stall report naming the slot involved.
+
+    Args:
+        threshold (float, optional): Blocking time (seconds) reported as a stall. Defaults to `APP_STALL_THRESHOLD_MS` or 0.25.
+        heartbeat_interval (int, optional): Heartbeat period in milliseconds. Defaults to 50.
+        sample_interval (float, optional): Stack sampling period (seconds) during a stall. Defaults to 0.01.
+        max_reports (int, optional): Number of stall reports kept in memory. Defaults to 500.
+    """
+
+    def __init__(self, threshold=STALL_THRESHOLD_MS / 1000, heartbeat_interval=50, sample_interval=0.01, max_reports=500, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.heartbeat_interval = heartbeat_interval / 1000
+        self.sample_interval = sample_interval
+        self.max_reports = max_reports
+
+        self.gui_thread_id = threading.get_ident()
+        self.reports = []
+        self.latency = {"beats": 0, "total": 0.0, "max": 0.0}
+        self._last_beat = time.monotonic()
+        self._loop_depth = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(heartbeat_interval)
+        self.heartbeat.timeout.connect(self.on_heartbeat)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self.heartbeat.start()
+        self._stop.clear()
+        self._monitor = threading.Thread(target=self._run_monitor, name="StallDetector", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join(1)
+            self._monitor = None
+
+    def on_heartbeat(self):
+        now = time.monotonic()
+        # Number of frames running the event loop, the heartbeat frame itself excluded
+        self._loop_depth = len(stack_frames(sys._getframe(1)))
+        lag = max(0.0, now - self._last_beat - self.heartbeat_interval)
+        with self._lock:
+            self.latency["beats"] += 1
+            self.latency["total"] += lag
+            self.latency["max"] = max(self.latency["max"], lag)
+        self._last_beat = now
+
+    def _run_monitor(self):
+        stall = None
+        # Hors gel, inutile de se réveiller aussi souvent que pendant l'échantillonnage
+        idle_interval = max(self.sample_interval, self.threshold / 5)
+        while not self._stop.wait(self.sample_interval if stall is not None else idle_interval):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.heartbeat_interval
+
+            if blocked_for < self.threshold:
+                if stall is not None:
+                    self._finish(stall, last_beat)
+                    stall = None
+                continue
+
+            if stall is None:
+                stall = Stall(started_at=last_beat + self.heartbeat_interval, loop_depth=self._loop_depth)
+            frame = sys._current_frames().get(self.gui_thread_id)
+            if frame is not None:
+                stall.add_sample(frame)
+            del frame
+
+    def _finish(self, stall, resumed_at):
+        stall.duration = max(0.0, resumed_at - stall.started_at)
+        report = stall.as_dict()
+        with self._lock:
+            self.reports.append(report)
+            del self.reports[:-self.max_reports]
+            registry.set_gauge("ui.stalls", len(self.reports))
+            registry.set_gauge("ui.last_stall_ms", report["duration_ms"])
+        logger.warning(f"UI stalled for {report['duration_ms']} ms in {report['slot']} (hotspots: {report['hotspots'][:3]})")
+
+    def summary(self):
+        """
+        Aggregate the stall reports by slot.
+
+        Returns:
+            dict: Event-loop latency and, per slot, the number of stalls, total and max durations and hotspots.
+        """
+        with self._lock:
+            reports = list(self.reports)
+            latency = dict(self.latency)
+
+        slots = {}
+        for report in reports:
+            entry = slots.setdefault(report["slot"], {"stalls": 0, "total_ms": 0.0, "max_ms": 0.0, "hotspots": Counter()})
+            entry["stalls"] += 1
+            entry["total_ms"] += report["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], report["duration_ms"])
+            for hotspot, count in report["hotspots"]:
+                entry["hotspots"][hotspot] += count
+        for entry in slots.values():
+            entry["hotspots"] = entry["hotspots"].most_common(5)
+
+        return {
+            "event_loop_latency_ms": {
+                "mean": round(latency["total"] / latency["beats"] * 1000, 2) if latency["beats"] else 0.0,
+                "max": round(latency["max"] * 1000, 2),
+            },
+            "slots": dict(sorted(slots.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+        }
+
+    def export_json(self, path=STALL_REPORT_FILE):
+        """
+        Write the aggregated summary and the individual stall reports to a JSON file.
+
+        Returns:
+            Path: The written file.
+        """
+        with self._lock:
+            reports = list(self.reports)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "stalls": reports}, f, indent=2, ensure_ascii=False)
+        return path
+
+
+_detector = None
+
+
+def install_stall_detector(**kwargs):
+    """
+    Create and start the application stall detector. Must be called from the GUI thread.
+
+    Returns:
+        StallDetector: The running detector.
+    """
+    global _detector
+    if _detector is None:
+        _detector = StallDetector(**kwargs)
+        _detector.start()
+    return _detector
+
+
+def get_stall_detector():
+    """Return the running stall detector, or None."""
+    return _detector
@@ -0,0 +1,172 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from pathlib import Path
+
+# Variable d'environnement contenant le chemin du fichier de trace (désactivé si absente)
+TRACE_ENV_VAR = "APP_STARTUP_TRACE"
+
+
+class StartupTrace:
+    """
+    Records the application startup as Chrome trace events (chrome://tracing, Perfetto).
+
+    Spans are recorded as complete ("X") events, nested spans on the same thread show up
+    nested in the viewer. When the trace is disabled, every method is a cheap no-op so the
+    calls can stay in the startup path.
+
+    Attributes:
+        enabled (bool): Whether events are recorded.
+        events (list): The recorded trace events.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self.origin_ns = time.perf_counter_ns()
+        self.origin_epoch = time.time()
+        self.pid = os.getpid()
+        self._import_tracer = None
+
+    def now_us(self):
+        """Return the time elapsed since the trace origin, in microseconds."""
+        return (time.perf_counter_ns() - self.origin_ns) / 1000
+
+    @contextmanager
+    def span(self, name, category="startup", **args):
+        """
+        Record the duration of the enclosed block.
+
+        Args:
+            name (str): The event name (e.g. "theme", "db init").
+            category (str, optional): The event category. Defaults to "startup".
+            **args: Extra values shown with the event.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = self.now_us()
+        try:
+            yield
+        finally:
+            self.complete(name, start, self.now_us() - start, category, **args)
+
+    def complete(self, name, start_us, duration_us, category="startup", **args):
+        """
+        Record an event whose start and duration are already known.
+        """
+        if not self.enabled:
+            return
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_us,
+            "dur": duration_us,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    def instant(self, name, category="startup", **args):
+        """
+        Record a point in time (e.g. "first paint").
+        """
+        if not self.enabled:
+            return
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "p",
+            "ts": self.now_us(),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    def install_import_hook(self):
+        """
+        Record the execution time of every module imported from now on.
+        """
+        if not self.enabled or self._import_tracer is not None:
+            return
+        self._import_tracer = _ImportTracer(self)
+        sys.meta_path.insert(0, self._import_tracer)
+
+    def remove_import_hook(self):
+        if self._import_tracer is not None:
+            sys.meta_path.remove(self._import_tracer)
+            self._import_tracer = None
+
+    def write(self, path=None):
+        """
+        Write the recorded events as Chrome trace JSON.
+
+        Args:
+            path (str, optional): Output file. Defaults to the `APP_STARTUP_TRACE` environment variable.
+
+        Returns:
+            Path: The written file, or None when the trace is disabled.
+        """
+        path = path or os.environ.get(TRACE_ENV_VAR)
+        if not self.enabled or not path:
+            return None
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "otherData": {"origin_epoch": self.origin_epoch, "argv": sys.argv},
+            }, f)
+        return path
+
+
+class _TimedLoader:
+    """
+    Loader proxy timing `exec_module`, everything else is delegated to the wrapped loader.
+    """
+
+    def __init__(self, loader, trace):
+        self._loader = loader
+        self._trace = trace
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._trace.span(module.__name__, category="import"):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTracer(MetaPathFinder):
+    """
+    Meta path finder wrapping the loader found by the other finders with a `_TimedLoader`.
+    """
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self.trace)
+                return spec
+        return None
+
+
+trace = StartupTrace(enabled=bool(os.environ.get(TRACE_ENV_VAR)))
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import tempfile
+from functools import lru_cache
+from importlib import metadata, util
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+THEME_CACHE_DIR = Path(os.environ.get("APP_THEME_CACHE_DIR", BASE_DIR / "cache" / "themes"))
+
+# Thèmes déjà chargés dans ce processus : clé -> (feuille de style, couleur primaire)
+_loaded_themes = {}
+_fonts_added = False
+
+
+@lru_cache(maxsize=None)
+def qt_material_version():
+    """Return the installed qt-material version, part of every cache key."""
+    try:
+        return metadata.version("qt-material")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@lru_cache(maxsize=None)
+def qt_material_dir():
+    """Return the qt_material package directory without importing it."""
+    spec = util.find_spec("qt_material")
+    return Path(spec.origin).parent
+
+
+def theme_file(theme):
+    """
+    Resolve a theme name the way qt_material does.
+
+    Args:
+        theme (str): A theme name (e.g. "default_light.xml") or the path of a theme file.
+
+    Returns:
+        Path: The theme file.
+    """
+    themes_dir = qt_material_dir() / "themes"
+    if theme in ("default_dark.xml", "default_dark"):
+        return themes_dir / "dark_teal.xml"
+    if theme in ("default_light.xml", "default_light", "default.xml", "default"):
+        return themes_dir / "light_cyan_500.xml"
+    if os.path.exists(theme):
+        return Path(theme)
+    return themes_dir / theme
+
+
+def theme_cache_key(theme, invert_secondary=False, extra=None):
+    """
+    Compute the cache key of a theme.
+
+    The key covers the theme file content, the options, the qt-material version and the
+    platform (the template renders platform specific rules).
+
+    Returns:
+        str: A hexadecimal digest.
+    """
+    path = theme_file(theme)
+    key = hashlib.sha256()
+    key.update(theme.encode("utf-8"))
+    key.update(path.read_bytes() if path.exists() else b"")
+    key.update(json.dumps({
+        "invert_secondary": invert_secondary,
+        "extra": extra or {},
+        "qt_material": qt_material_version(),
+        "platform": platform.system(),
+    }, sort_keys=True, default=str).encode("utf-8"))
+    return key.hexdigest()[:24]
+
+
+def theme_cache_dir(key):
+    return THEME_CACHE_DIR / qt_material_version() / key
+
+
+def render_theme(theme, invert_secondary=False, extra=None):
+    """
+    Render a theme with qt_material into its cache directory.
+
+    The icons are generated in the cache directory and the stylesheet refers to them by
+    absolute path, so cached themes do not depend on (nor overwrite) `~/.qt_material`.
+
+    Returns:
+        Path: The cache directory of the theme, or None if the theme does not exist.
+    """
+    from qt_material import build_stylesheet
+
+    key = theme_cache_key(theme, invert_secondary, extra)
+    target = theme_cache_dir(key)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    # Rendered in a temporary directory then renamed, so a concurrent launch never reads a partial theme
+    work_dir = Path(tempfile.mkdtemp(prefix=f"{key}.", dir=target.parent))
+    try:
+        icons_dir = work_dir / "icons"
+        stylesheet = build_stylesheet(theme, invert_secondary, dict(extra or {}), parent=str(icons_dir))
+        if stylesheet is None:
+            return None
+
+        icons_url = (target / "icons").as_posix()
+        stylesheet = re.sub(r"url\(icon:/([^)]*)\)", lambda match: f'url("{icons_url}/{match.group(1)}")', stylesheet)
+        (work_dir / "stylesheet.qss").write_text(stylesheet, encoding="utf-8")
+
+        path = theme_file(theme)
+        (work_dir / "theme.json").write_text(json.dumps({
+            "theme": theme,
+            "file": str(path),
+            "primary_color": _primary_color(path),
+            "qt_material": qt_material_version(),
+        }), encoding="utf-8")
+
+        try:
+            os.replace(work_dir, target)
+        except OSError:
+            # Already rendered by another process in the meantime
+            pass
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Rendered theme {theme} into {target}")
+    return target
+
+
+def load_theme(theme, invert_secondary=False, extra=None):
+    """
+    Return the stylesheet of a theme, rendering it only if it is not cached yet.
+
+    Returns:
+        tuple: The stylesheet and the theme primary color, or (None, None) if the theme does not exist.
+    """
+    key = theme_cache_key(theme, invert_secondary, extra)
+    if key in _loaded_themes:
+        return _loaded_themes[key]
+
+    target = theme_cache_dir(key)
+    if not (target / "stylesheet.qss").exists():
+        target = render_theme(theme, invert_secondary, extra)
+        if target is None:
+            return None, None
+
+    stylesheet = (target / "stylesheet.qss").read_text(encoding="utf-8")
+    primary_color = json.loads((target / "theme.json").read_text(encoding="utf-8"))["primary_color"]
+    _loaded_themes[key] = (stylesheet, primary_color)
+    return stylesheet, primary_color
+
+
+def apply_cached_stylesheet(widget, theme, invert_secondary=False, extra=None):
+    """
+    Drop-in replacement for `qt_material.apply_stylesheet` backed by the theme cache.
+
+    Args:
+        widget (QWidget or QApplication): The object receiving the stylesheet.
+        theme (str): The qt_material theme (e.g. "default_light.xml").
+        invert_secondary (bool, optional): Invert the secondary colors. Defaults to False.
+        extra (dict, optional): Extra template values. Defaults to None.
+    """
+    stylesheet, primary_color = load_theme(theme, invert_secondary, extra)
+    if stylesheet is None:
+        logger.warning(f"Theme {theme} does not exist.")
+        return
+
+    add_fonts()
+    set_placeholder_color(primary_color)
+    widget.setStyleSheet(stylesheet)
+
+
+def add_fonts():
+    """Register the qt_material fonts, once per process."""
+    global _fonts_added
+    if _fonts_added:
+        return
+
+    from PySide6.QtGui import QFontDatabase
+
+    fonts_dir = qt_material_dir() / "fonts" / "roboto"
+    for font in fonts_dir.glob("*.ttf"):
+        QFontDatabase.addApplicationFont(str(font))
+    _fonts_added = True
+
+
+def set_placeholder_color(primary_color):
+    """Apply the placeholder text color set by qt_material on the application palette."""
+    from PySide6.QtGui import QColor, QGuiApplication, QPalette
+
+    if not primary_color:
+        return
+    palette = QGuiApplication.palette()
+    color = QColor(*[int(primary_color[i:i + 2], 16) for i in range(1, 6, 2)] + [92])
+    palette.setColor(QPalette.PlaceholderText, color)
+    QGuiApplication.setPalette(palette)
+
+
+def _primary_color(path):
+    from xml.dom.minidom import parse
+
+    if not path.exists():
+        return None
+    document = parse(str(path))
+    for child in document.getElementsByTagName("color"):
+        if child.getAttribute("name") == "primaryColor":
+            return child.firstChild.nodeValue
+    return None
+
+
+def clear_theme_cache():
+    """Remove every cached theme."""
+    _loaded_themes.clear()
+    shutil.rmtree(THEME_CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m utils.theme_cache [--clear] [theme ...] : pré-génère les thèmes (ex: à l'installation)
+    args = sys.argv[1:]
+    if "--clear" in args:
+        clear_theme_cache()
+        args.remove("--clear")
+
+    from PySide6.QtWidgets import QApplication
+    app = QApplication([])
+    for theme_name in args or ["default_light.xml"]:
+        print(render_theme(theme_name))
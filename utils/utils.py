@@ -1,9 +1,6 @@
-import json
 from pathlib import Path
 
-from pyside6_imports import QIcon
-
-config_file = Path("config.json")
+from utils.config import get_config
 
 secret_questions = [
     ('Quel est le nom de votre premier animal de compagnie ?', 1),
@@ -24,29 +21,22 @@ secret_questions = [
 ]
 
 def set_app_icon(self):
+        from pyside6_imports import QIcon
         icon_path = Path("resources/icons/icon.ico")  
         self.setWindowIcon(QIcon(str(icon_path)))
 
 def read_config_file_data():
-    
-    if config_file.exists():
-        with config_file.open('r') as f:
-            data = json.load(f)
-        return data
+    """
+    Return a copy of the configuration, see `utils.config.get_config`.
+    """
+    return get_config().data()
 
 def save_config_data(value_1:str, value_2:str):
     """
-    Save data to config file.
+    Save the signed-in user to the config file, keeping the other settings.
     
     Args:
         `value_1` (str): key of the first key
         `value_2` (str): value of the first key
     """
-
-    config = {
-        "user_id": value_1,
-        "user_name": value_2,
-    }
-    
-    with config_file.open('w') as f:
-        json.dump(config, f)
\ No newline at end of file
+    get_config().update(user_id=value_1, user_name=value_2)
\ No newline at end of file
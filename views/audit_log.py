@@ -0,0 +1,174 @@
+from datetime import datetime, timezone
+
+from controllers.audit_controller import PAGE_SIZE, AuditLogController
+from database.database import compact_json
+from models.audit_model import AuditLog
+from pyside6_imports import QHBoxLayout, QHeaderView, QTableWidget, QTableWidgetItem, QVBoxLayout
+from pyside6_custom_widgets.button import Button
+from pyside6_custom_widgets.combobox import ComboBox
+from pyside6_custom_widgets.label import Label
+from pyside6_custom_widgets.line_edit import LineEdit
+from views.generic.base import ListView
+
+
+def format_timestamp(value):
+    """Format a stored (UTC) timestamp in local time."""
+    try:
+        moment = datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc).astimezone()
+    except ValueError:
+        return str(value)
+    return moment.strftime("%d/%m/%Y %H:%M:%S")
+
+
+def format_changes(action, changes):
+    """Format a JSON diff on one line: "amount: 10 → 12.5" for an update, "amount=10, ..." otherwise."""
+    if not changes:
+        return ""
+    if action == "update":
+        return ", ".join(f"{column}: {old} → {new}" for column, (old, new) in changes.items())
+    return ", ".join(f"{column}={value}" for column, value in changes.items())
+
+
+class AuditLogView(ListView):
+    """
+    Read-only view of the audit log, newest entries first, filtered by user, table and record.
+
+    Pages are fetched by key (see `controllers.audit_controller`), so moving through millions
+    of entries costs the same on every page; only the keys of the pages already seen are kept,
+    to go back.
+    """
+
+    headers = ["Date", "Utilisateur", "Table", "Enregistrement", "Action", "Description", "Changements"]
+
+    def __init__(self, controller=None):
+        self.page_keys = [None]
+        self.rows = []
+        super().__init__(model=AuditLog, controller=controller or AuditLogController())
+        self.refresh_data()
+
+    def setup_ui(self):
+        self.main_layout = QVBoxLayout()
+
+        filter_layout = QHBoxLayout()
+        self.user_filter = ComboBox(items_with_data=self.controller.users(), placeholder="Tous les utilisateurs")
+        self.user_filter.combobox.currentIndexChanged.connect(self.apply_filters)
+        self.table_filter = ComboBox(items_with_data=[(name, name) for name in self.controller.table_names()], placeholder="Toutes les tables")
+        self.table_filter.combobox.currentIndexChanged.connect(self.apply_filters)
+        self.record_filter = LineEdit(placeholder_text="N° d'enregistrement", input_type="numeric", on_text_changer_func=self.apply_filters)
+        filter_layout.addWidget(self.user_filter)
+        filter_layout.addWidget(self.table_filter)
+        filter_layout.addWidget(self.record_filter)
+        self.main_layout.addLayout(filter_layout)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.headers))
+        self.table.setHorizontalHeaderLabels(self.headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(len(self.headers) - 1, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setAlternatingRowColors(True)
+        self.main_layout.addWidget(self.table)
+
+        pagination_layout = QHBoxLayout()
+        self.prev_button = Button(text="", command=self.show_prev_page, icon_name="fa5s.arrow-left")
+        self.prev_button.setFixedSize(30, 30)
+        self.next_button = Button(text="", command=self.show_next_page, icon_name="fa5s.arrow-right")
+        self.next_button.setFixedSize(30, 30)
+        self.pagination_info_label = Label(text="", theme_name="success")
+        pagination_layout.addWidget(self.prev_button)
+        pagination_layout.addWidget(self.next_button)
+        pagination_layout.addWidget(self.pagination_info_label)
+        pagination_layout.addStretch()
+        self.main_layout.addLayout(pagination_layout)
+
+        self.setLayout(self.main_layout)
+
+    def filters(self):
+        """Return the `AuditLogController.page` filters of the filter widgets."""
+        filters = {}
+        user_id = self.user_filter.get_selected_user_data()
+        if user_id:
+            filters["user_id"] = user_id
+        table_name = self.table_filter.get_selected_user_data()
+        if table_name:
+            filters["table_name"] = table_name
+            record_id = self.record_filter.get_text().strip()
+            # Le filtre par enregistrement n'a d'index qu'avec la table
+            if record_id.isdigit():
+                filters["record_id"] = int(record_id)
+        return filters
+
+    def load_page(self):
+        # Une ligne de plus que la page : savoir s'il y a une page suivante sans compter
+        rows = self.controller.page(after=self.page_keys[-1], limit=PAGE_SIZE + 1, **self.filters())
+        self.has_next_page = len(rows) > PAGE_SIZE
+        self.rows = rows[:PAGE_SIZE]
+        self.populate_table()
+
+    def populate_table(self):
+        self.table.setRowCount(len(self.rows))
+        for row, entry in enumerate(self.rows):
+            values = [
+                format_timestamp(entry["timestamp"]),
+                entry["username"] or str(entry["user_id"]),
+                entry["table_name"],
+                str(entry["record_id"]),
+                entry["action"],
+                entry["description"],
+                format_changes(entry["action"], entry["changes"]),
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == len(values) - 1 and entry["changes"]:
+                    item.setToolTip(compact_json(entry["changes"]))
+                self.table.setItem(row, col, item)
+
+        self.prev_button.setEnabled(len(self.page_keys) > 1)
+        self.next_button.setEnabled(self.has_next_page)
+        self.pagination_info_label.setText(f"Page {len(self.page_keys)} | {len(self.rows)} entrées")
+
+    def apply_filters(self, *args):
+        self.page_keys = [None]
+        self.load_page()
+
+    def refresh_data(self):
+        """
+        Reload the current page (new entries appear on the first page).
+        """
+        self.load_page()
+
+    def show_next_page(self):
+        if self.has_next_page:
+            self.page_keys.append(self.controller.key(self.rows[-1]))
+            self.load_page()
+
+    def show_prev_page(self):
+        if len(self.page_keys) > 1:
+            self.page_keys.pop()
+            self.load_page()
+
+    def save_state(self):
+        """
+        Returns the filters and the keys of the pages seen, used when the page is evicted and rebuilt by `Content`.
+        """
+        return {
+            "user_index": self.user_filter.get_selected_index(),
+            "table_index": self.table_filter.get_selected_index(),
+            "record_id": self.record_filter.get_text(),
+            "page_keys": list(self.page_keys),
+        }
+
+    def restore_state(self, state):
+        """
+        Restores a state returned by `save_state`.
+        """
+        for widget in (self.user_filter.combobox, self.table_filter.combobox):
+            widget.blockSignals(True)
+        self.user_filter.combobox.setCurrentIndex(state.get("user_index", 0))
+        self.table_filter.combobox.setCurrentIndex(state.get("table_index", 0))
+        for widget in (self.user_filter.combobox, self.table_filter.combobox):
+            widget.blockSignals(False)
+        self.record_filter.set_text(state.get("record_id", ""))
+        self.page_keys = state.get("page_keys") or [None]
+        self.load_page()
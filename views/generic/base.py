@@ -1,5 +1,4 @@
-from sqlalchemy import Date, DateTime, Enum, Float, Integer, String
-
+from models.meta import DATE_EDIT, ENUM_COMBOBOX, FOREIGN_KEY_COMBOBOX, LINE_EDIT, get_model_meta
 from pyside6_imports import QDialog, QVBoxLayout, QHBoxLayout, QFrame, QSpacerItem, QSizePolicy, QMessageBox, QWidget, Signal, QCloseEvent
 from pyside6_custom_widgets.button import Button
 from pyside6_custom_widgets.label import Label
@@ -19,6 +18,7 @@ class BaseFormWidget(QDialog):
         set_app_icon(self)
         self.title = title
         self.model = model
+        self.meta = get_model_meta(model)
         self.controller = controller
         self.fields = []
         self.setup_ui()
@@ -60,10 +60,7 @@ class BaseFormWidget(QDialog):
         """
         Dynamically create input fields based on the model attributes.
         """
-        for column in self.model.__table__.columns:
-            if column.name == 'id':
-                continue 
-            
+        for column in self.meta.form_columns:
             field_widget = self.create_field_widget(column)
             
             if field_widget:
@@ -74,45 +71,44 @@ class BaseFormWidget(QDialog):
     def create_field_widget(self, column):
         """
         Create the appropriate field widget based on column attributes.
-        """
-        verbose_name = column.info.get("verbose_name", column.name)
-        required = not column.nullable
-        editable = column.info.get("editable", "true") != "false"
-        input_type = column.info.get("column_type", "text")
 
-        if required:
-            verbose_name = f'{verbose_name}(*)'
-    
-        if not editable:
+        Args:
+            column (ColumnMeta): The column metadata, see `models.meta`.
+        """
+        if not column.editable:
             return 
 
         # Handle String, Integer, Float columns without foreign keys
-        if isinstance(column.type, (String, Integer, Float)) and not column.foreign_keys and input_type != "enum":
-            return LabeledLineEdit(label_text=verbose_name, required=required, input_type=input_type)
+        if column.widget == LINE_EDIT:
+            return LabeledLineEdit(label_text=column.label, required=column.required, input_type=column.input_type)
 
         # Handle ForeignKey columns
-        elif column.foreign_keys:
-            return LabeledComboBox(label_text=verbose_name, items=self.get_cbx_items(column.name), required=required)
+        elif column.widget == FOREIGN_KEY_COMBOBOX:
+            return LabeledComboBox(label_text=column.label, items=self.get_cbx_items(column.name), required=column.required)
 
         # Handle Date or DateTime columns
-        elif isinstance(column.type, (Date, DateTime)):
-            return LabeledDateEdit(label_text=verbose_name, required=required)
+        elif column.widget == DATE_EDIT:
+            return LabeledDateEdit(label_text=column.label, required=column.required)
 
         # Handle Enum columns (like gender)
-        elif isinstance(column.type, Enum):
-            return LabeledComboBox(label_text=verbose_name, items=column.type.enums, required=required)
+        elif column.widget == ENUM_COMBOBOX:
+            return LabeledComboBox(label_text=column.label, items=column.enum_values, required=column.required)
 
         return None
 
     def create_non_editable_field(self, column, verbose_name, required):
         """
         Create a non-editable field based on the column type.
+
+        Args:
+            column (ColumnMeta): The column metadata, see `models.meta`.
         """
-        if isinstance(column.type, (String, Integer, Float)) and not column.foreign_keys:
+        field_widget = None
+        if column.widget == LINE_EDIT:
             field_widget = LabeledLineEdit(label_text=verbose_name, required=required)
-        elif column.foreign_keys:
+        elif column.widget == FOREIGN_KEY_COMBOBOX:
             field_widget = LabeledComboBox(label_text=verbose_name, required=required)
-        elif isinstance(column.type, (Date, DateTime)):
+        elif column.widget == DATE_EDIT:
             field_widget = LabeledDateEdit(label_text=verbose_name, required=required)
 
         if field_widget:
@@ -199,11 +195,10 @@ class UpdateView(BaseFormWidget):
                 value = getattr(instance_data, column_name)
 
                 if isinstance(field, LabeledComboBox):
-                    foreign_key = getattr(self.model.__table__.columns[column_name], 'foreign_keys', None)
-                    if foreign_key:
-                        related_model = self.controller.get_related_model(column_name)
-                        related_instance = self.controller.get_related_model_item_by_id("category_id", value)
-                        display_value = getattr(related_instance, 'title')  
+                    column = self.meta.column(column_name)
+                    if column.is_foreign_key:
+                        related_instance = self.controller.get_related_model_item_by_id(column_name, value)
+                        display_value = getattr(related_instance, column.related_column) if column.related_column else str(related_instance)
                         field.set_value(display_value)
                     else:
                         field.set_value(str(value))
@@ -266,6 +261,18 @@ class ListView(QWidget):
         """
         self.custom_table.refresh_data()
 
+    def save_state(self):
+        """
+        Returns the table state, used when the page is evicted and rebuilt by `Content`.
+        """
+        return self.custom_table.save_state()
+
+    def restore_state(self, state):
+        """
+        Restores a table state returned by `save_state`.
+        """
+        self.custom_table.restore_state(state)
+
     def edit_row(self, instance_id):
         """
         Edits the data of a specific row by invoking the controller.